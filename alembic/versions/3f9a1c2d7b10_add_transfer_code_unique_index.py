@@ -0,0 +1,43 @@
+"""Add unique index on upper(wallet_transactions.transfer_code)
+
+Revision ID: 3f9a1c2d7b10
+Revises: ea82ecd7c2c5
+Create Date: 2026-10-19 09:12:03.114201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b10'
+down_revision = 'ea82ecd7c2c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Webhook matching and deposit creation look transfer codes up case-insensitively.
+    # Duplicate codes (case-insensitive) must be cleaned up before this can be applied.
+    # Built concurrently so wallet_transactions stays writable; CONCURRENTLY can't
+    # run inside a transaction. A failed build leaves an INVALID index: drop it
+    # before rerunning.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_wallet_transactions_transfer_code',
+            'wallet_transactions',
+            [sa.text('upper(transfer_code)')],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_wallet_transactions_transfer_code',
+            table_name='wallet_transactions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
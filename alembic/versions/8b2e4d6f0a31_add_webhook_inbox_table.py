@@ -0,0 +1,43 @@
+"""Add webhook_inbox table
+
+Revision ID: 8b2e4d6f0a31
+Revises: 3f9a1c2d7b10
+Create Date: 2026-10-19 10:02:47.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f0a31'
+down_revision = '3f9a1c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'webhook_inbox',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('provider', sa.String(length=30), nullable=False),
+        sa.Column('provider_tx_id', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider', 'provider_tx_id', name='uq_webhook_inbox_provider_tx'),
+    )
+    op.create_index(op.f('ix_webhook_inbox_id'), 'webhook_inbox', ['id'], unique=False)
+    op.create_index('idx_webhook_inbox_status_next_attempt', 'webhook_inbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_webhook_inbox_status_next_attempt', table_name='webhook_inbox')
+    op.drop_index(op.f('ix_webhook_inbox_id'), table_name='webhook_inbox')
+    op.drop_table('webhook_inbox')
@@ -0,0 +1,28 @@
+"""Count each wallet's ledger entries since its last snapshot
+
+Revision ID: a3d8f1c6e520
+Revises: d9f2b6c8e013
+Create Date: 2026-10-19 21:05:13.402871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d8f1c6e520'
+down_revision = 'd9f2b6c8e013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing wallets start at 0: their next snapshot folds in the older entries
+    op.add_column(
+        'wallets',
+        sa.Column('ledger_entries_since_snapshot', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('wallets', 'ledger_entries_since_snapshot')
@@ -0,0 +1,26 @@
+"""Keep the previous refresh token of each session for the reuse grace window
+
+Revision ID: b6e2d9a4f731
+Revises: a3d8f1c6e520
+Create Date: 2026-10-19 21:40:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d9a4f731'
+down_revision = 'a3d8f1c6e520'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('user_sessions', sa.Column('previous_token_hash', sa.String(length=64), nullable=True))
+    op.add_column('user_sessions', sa.Column('rotated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user_sessions', 'rotated_at')
+    op.drop_column('user_sessions', 'previous_token_hash')
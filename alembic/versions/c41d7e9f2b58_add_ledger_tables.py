@@ -0,0 +1,82 @@
+"""Add append-only ledger_entries and ledger_snapshots tables
+
+Revision ID: c41d7e9f2b58
+Revises: 8b2e4d6f0a31
+Create Date: 2026-10-19 11:26:40.871932
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e9f2b58'
+down_revision = '8b2e4d6f0a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ledger_entries',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('journal_id', sa.UUID(), nullable=False),
+        sa.Column('account', sa.String(length=80), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('entry_type', sa.String(length=20), nullable=False),
+        sa.Column('wallet_transaction_id', sa.UUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('clock_timestamp()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('idx_ledger_entries_account_id', 'ledger_entries', ['account', 'id'], unique=False)
+    op.create_index('idx_ledger_entries_journal', 'ledger_entries', ['journal_id'], unique=False)
+    op.create_table(
+        'ledger_snapshots',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('account', sa.String(length=80), nullable=False),
+        sa.Column('last_entry_id', sa.BigInteger(), nullable=False),
+        sa.Column('balance', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('as_of', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('idx_ledger_snapshots_account_entry', 'ledger_snapshots', ['account', 'last_entry_id'], unique=False)
+    op.create_index('idx_ledger_snapshots_account_as_of', 'ledger_snapshots', ['account', 'as_of'], unique=False)
+
+    # Enforce append-only at the database level, not just through the ORM
+    op.execute("""
+        CREATE FUNCTION ledger_reject_mutation() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION '% is append-only', TG_TABLE_NAME;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in ('ledger_entries', 'ledger_snapshots'):
+        op.execute(
+            f"CREATE TRIGGER {table}_append_only BEFORE UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION ledger_reject_mutation()"
+        )
+
+    # Opening balances so the ledger agrees with existing wallets
+    op.execute("""
+        WITH opening AS (
+            SELECT id AS wallet_id, balance, gen_random_uuid() AS journal_id
+            FROM wallets WHERE balance <> 0
+        )
+        INSERT INTO ledger_entries (journal_id, account, amount, entry_type)
+        SELECT journal_id, 'wallet:' || wallet_id, balance, 'OPENING' FROM opening
+        UNION ALL
+        SELECT journal_id, 'system:opening', -balance, 'OPENING' FROM opening
+    """)
+
+
+def downgrade() -> None:
+    for table in ('ledger_entries', 'ledger_snapshots'):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_append_only ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS ledger_reject_mutation()")
+    op.drop_index('idx_ledger_snapshots_account_as_of', table_name='ledger_snapshots')
+    op.drop_index('idx_ledger_snapshots_account_entry', table_name='ledger_snapshots')
+    op.drop_table('ledger_snapshots')
+    op.drop_index('idx_ledger_entries_journal', table_name='ledger_entries')
+    op.drop_index('idx_ledger_entries_account_id', table_name='ledger_entries')
+    op.drop_table('ledger_entries')
@@ -0,0 +1,38 @@
+"""Add partial indexes for the pending deposit/purchase expiry sweeper
+
+Revision ID: c8e1a5b7d492
+Revises: a3c6e8f1b254
+Create Date: 2026-10-19 19:10:05.261934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e1a5b7d492'
+down_revision = 'a3c6e8f1b254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_wallet_transactions_pending_deposits',
+        'wallet_transactions',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING' AND transaction_type = 'DEPOSIT'"),
+    )
+    op.create_index(
+        'idx_purchases_pending_created',
+        'purchases',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_purchases_pending_created', table_name='purchases')
+    op.drop_index('idx_wallet_transactions_pending_deposits', table_name='wallet_transactions')
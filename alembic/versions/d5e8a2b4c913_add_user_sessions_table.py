@@ -0,0 +1,40 @@
+"""Add user_sessions table
+
+Revision ID: d5e8a2b4c913
+Revises: c41d7e9f2b58
+Create Date: 2026-10-19 14:21:05.318442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8a2b4c913'
+down_revision = 'c41d7e9f2b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_sessions',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('refresh_token_hash', sa.String(length=64), nullable=False),
+        sa.Column('user_agent', sa.String(length=255), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('refresh_token_hash'),
+    )
+    op.create_index('idx_user_sessions_user_id', 'user_sessions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_user_sessions_user_id', table_name='user_sessions')
+    op.drop_table('user_sessions')
@@ -0,0 +1,42 @@
+"""Add indexes for the hot query filters (built concurrently)
+
+Revision ID: d9f2b6c8e013
+Revises: c8e1a5b7d492
+Create Date: 2026-10-19 19:48:22.630117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9f2b6c8e013'
+down_revision = 'c8e1a5b7d492'
+branch_labels = None
+depends_on = None
+
+# CREATE INDEX CONCURRENTLY can't run inside a transaction, so every index is
+# built in an autocommit block. IF NOT EXISTS makes a rerun after a failed
+# build safe (drop the INVALID index first if the build was interrupted).
+INDEXES = [
+    ('idx_purchases_user_status', 'purchases', [sa.text('user_id'), sa.text('status')]),
+    ('idx_purchases_workflow_status', 'purchases', [sa.text('workflow_id'), sa.text('status')]),
+    ('idx_favorites_workflow_id', 'favorites', [sa.text('workflow_id')]),
+    ('idx_comments_workflow_id', 'comments', [sa.text('workflow_id')]),
+    ('idx_notifications_user_unread_created', 'notifications',
+     [sa.text('user_id'), sa.text('is_unread'), sa.text('created_at')]),
+    ('idx_workflows_status_popularity', 'workflows',
+     [sa.text('status'), sa.text('downloads_count DESC'), sa.text('rating_avg DESC')]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
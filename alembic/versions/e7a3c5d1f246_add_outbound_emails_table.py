@@ -0,0 +1,43 @@
+"""Add outbound_emails table
+
+Revision ID: e7a3c5d1f246
+Revises: d5e8a2b4c913
+Create Date: 2026-10-19 15:40:12.774190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c5d1f246'
+down_revision = 'd5e8a2b4c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbound_emails',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('recipient', sa.String(length=150), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('html_body', sa.Text(), nullable=False),
+        sa.Column('text_body', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_outbound_emails_id'), 'outbound_emails', ['id'], unique=False)
+    op.create_index('idx_outbound_emails_status_next_attempt', 'outbound_emails', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_outbound_emails_status_next_attempt', table_name='outbound_emails')
+    op.drop_index(op.f('ix_outbound_emails_id'), table_name='outbound_emails')
+    op.drop_table('outbound_emails')
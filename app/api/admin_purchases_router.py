@@ -8,6 +8,8 @@ import csv
 from io import StringIO
 from datetime import datetime, date
 
+from app.core.metrics import PURCHASE_AMOUNT, PURCHASES
+from app.core.responses import FastJSONResponse
 from app.db.database import get_db
 from app.models.user import User
 from app.models.purchase import Purchase
@@ -74,8 +76,13 @@ async def get_purchases(
 ):
     """List all purchase transactions. If search is provided, filter by user name OR workflow title. No pagination."""
     try:
-        # Base query with joins
-        query = db.query(Purchase).join(User).join(Workflow)
+        # Base query with joins; only the columns the list shows, as plain rows
+        query = db.query(
+            Purchase.id, Purchase.status, Purchase.created_at,
+            User.id.label("user_id"), User.name.label("user_name"), User.email.label("user_email"),
+            Workflow.id.label("workflow_id"), Workflow.title.label("workflow_title"),
+            Workflow.price.label("workflow_price"),
+        ).join(User, Purchase.user_id == User.id).join(Workflow, Purchase.workflow_id == Workflow.id)
         
         # Apply filters
         if search and search.strip():
@@ -86,33 +93,31 @@ async def get_purchases(
                     Workflow.title.ilike(search_term)
                 )
             )
-        purchases = query.options(
-            joinedload(Purchase.user),
-            joinedload(Purchase.workflow)
-        ).all()
         
         # Build response
         purchases_data = []
-        for purchase in purchases:
+        for row in query.all():
+            price = float(row.workflow_price)
             purchases_data.append({
-                "id": str(purchase.id),
+                "id": str(row.id),
                 "user": {
-                    "id": str(purchase.user.id),
-                    "name": purchase.user.name,
-                    "email": purchase.user.email
+                    "id": str(row.user_id),
+                    "name": row.user_name,
+                    "email": row.user_email
                 },
                 "workflow": {
-                    "id": str(purchase.workflow.id),
-                    "title": purchase.workflow.title,
-                    "price": float(purchase.workflow.price)
+                    "id": str(row.workflow_id),
+                    "title": row.workflow_title,
+                    "price": price
                 },
-                "amount": float(purchase.workflow.price),
-                "status": purchase.status,
+                "amount": price,
+                "status": row.status,
                 "payment_method": "WALLET",  # Default for now
-                "paid_at": purchase.created_at.isoformat() if purchase.created_at else None
+                "paid_at": row.created_at.isoformat() if row.created_at else None
             })
         
-        return {"purchases": purchases_data}
+        # Already JSON-ready: skip jsonable_encoder
+        return FastJSONResponse({"purchases": purchases_data})
         
     except HTTPException:
         raise
@@ -186,8 +191,13 @@ async def update_purchase_status(
                 detail="Purchase not found"
             )
         
+        activated = purchase.status != "ACTIVE" and status_data.status == "ACTIVE"
         purchase.status = status_data.status
         db.commit()
+        if activated:
+            # QR orders are counted as PENDING when created and here once paid
+            PURCHASES.labels(purchase.payment_method, "ACTIVE").inc()
+            PURCHASE_AMOUNT.labels(purchase.payment_method).inc(float(purchase.amount))
         
         return PurchaseStatusUpdateResponse(
             success=True,
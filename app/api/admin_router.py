@@ -1,13 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.profiling import profile_path
 from app.db.database import get_db
 from app.models.user import User
 from app.api.auth_router import get_current_user
+from app.services import password_hasher
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
-import bcrypt
 import uuid
 from app.schemas.admin import AdminUpdateRequest
 router = APIRouter()
@@ -28,16 +31,6 @@ async def get_current_admin(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
-# Helper function to verify password
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-
-# Helper function to hash password
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
 # 1. POST /api/admin/login - Login admin account
 @router.post("/login", response_model=AdminLoginResponse)
 async def admin_login(
@@ -59,12 +52,18 @@ async def admin_login(
             )
         
         # Verify password
-        if not verify_password(login_data.password, admin.password_hash):
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, admin.password_hash)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
+        # Upgrade hashes made with an outdated bcrypt cost
+        if new_hash:
+            admin.password_hash = new_hash
+            db.commit()
+        
         # Generate JWT token (reuse existing auth logic)
         from app.services.auth import create_access_token
         from datetime import timedelta
@@ -113,7 +112,7 @@ async def create_admin(
             id=uuid.uuid4(),
             name=admin_data.name,
             email=admin_data.email,
-            password_hash=hash_password(admin_data.password),
+            password_hash=await password_hasher.hash_password(admin_data.password),
             role="ADMIN",
             is_deleted=False
         )
@@ -177,7 +176,7 @@ async def delete_admin(
     """Delete admin account"""
     try:
         # Verify current admin password
-        if not verify_password(delete_data.adminPassword, current_admin.password_hash):
+        if not await password_hasher.verify_password(delete_data.adminPassword, current_admin.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid admin password"
@@ -237,14 +236,14 @@ async def change_password(
             )
 
         # Verify current password
-        if not verify_password(password_data.currentPassword, current_admin.password_hash):
+        if not await password_hasher.verify_password(password_data.currentPassword, current_admin.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Current password is incorrect"
             )
         
         # Update password
-        current_admin.password_hash = hash_password(password_data.newPassword)
+        current_admin.password_hash = await password_hasher.hash_password(password_data.newPassword)
         
         db.commit()
         
@@ -308,3 +307,18 @@ async def update_admin_profile(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update profile: {str(e)}"
         )
+
+# 8. GET /api/admin/profiling/{profile_id} - Download a request profile
+@router.get("/profiling/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(
+    profile_id: str,
+    current_admin: User = Depends(get_current_admin)
+):
+    """Collapsed stacks of a profiled request (id from its X-Profile-Id header), for flamegraph tools"""
+    path = profile_path(settings.PROFILING_DIR, profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found on this worker"
+        )
+    return FileResponse(path, media_type="text/plain")
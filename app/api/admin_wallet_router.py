@@ -1,17 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from sqlalchemy import func
 from uuid import UUID
+from datetime import datetime
 
 from app.db.database import get_db
 from app.models.user import User
 from app.models.wallet import Wallet, WalletTransaction
 from app.models.enums import TransactionType, TransactionStatus
 from app.api.auth_router import get_current_user
+from app.core.metrics import DEPOSITS
 from app.schemas.wallet import DepositOverviewResponse
 from app.schemas.wallet import MessageResponse
-from app.services.websocket_manager import manager
+from app.services.outbox import add_websocket_message, outbox_dispatcher
+from app.services.ledger import audit_wallet
 
 router = APIRouter(prefix="/api/admin/wallet", tags=["Admin - Wallet"])
 
@@ -112,11 +115,11 @@ async def reject_deposit_transaction(
         wallet = db.query(Wallet).filter(Wallet.id == tx.wallet_id).first()
         if wallet:
             tx.status = TransactionStatus.FAILED
-            db.commit()
+            db.flush()
             db.refresh(tx)
             
-            # Send WebSocket notification to user with full transaction details
-            await manager.send_personal_message({
+            # Notify the user with full transaction details; delivered by the outbox after commit
+            add_websocket_message(db, wallet.user_id, {
                 "type": "wallet_status_update",
                 "event": "deposit_rejected",
                 "transaction": {
@@ -135,7 +138,10 @@ async def reject_deposit_transaction(
                 },
                 "message": "Deposit transaction has been rejected",
                 "timestamp": tx.updated_at.isoformat() if tx.updated_at else None
-            }, str(wallet.user_id))
+            })
+            db.commit()
+            outbox_dispatcher.wake()
+            DEPOSITS.labels("rejected").inc()
             
             return MessageResponse(success=True, message="Deposit transaction rejected.")
         else:
@@ -147,5 +153,20 @@ async def reject_deposit_transaction(
         raise HTTPException(status_code=500, detail=f"Failed to reject deposit: {str(e)}")
 
 
-
-
+@router.get("/wallets/{wallet_id}/audit", response_model=dict)
+async def audit_wallet_balance(
+    wallet_id: UUID,
+    at: Optional[datetime] = Query(None, description="Point in time; defaults to now"),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Recompute a wallet balance from the ledger (nearest snapshot forward) and compare it with the wallet"""
+    try:
+        wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
+        if not wallet:
+            raise HTTPException(status_code=404, detail="Wallet not found")
+        return audit_wallet(db, wallet, at)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to audit wallet: {str(e)}")
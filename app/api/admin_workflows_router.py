@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File, Form
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, load_only
 from sqlalchemy import func, and_, or_
 from typing import List, Optional
 from uuid import UUID
@@ -47,7 +47,11 @@ async def list_all_workflows(
 ):
     """Return all workflows (no pagination), with basic stats for admin table."""
     try:
-        workflows = db.query(Workflow).all()
+        # Only the columns the table shows (not flow or description)
+        workflows = db.query(Workflow).options(
+            load_only(Workflow.id, Workflow.title, Workflow.price, Workflow.created_at, Workflow.status),
+            joinedload(Workflow.categories).joinedload(WorkflowCategory.category)
+        ).all()
 
         results: List[AdminWorkflowListResponse] = []
         for wf in workflows:
@@ -1,13 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import List
+from uuid import UUID
 import uuid
-from datetime import datetime, timedelta
-import jwt
 import secrets
-import bcrypt
 
 from app.schemas.auth import (
     UserRegisterRequest,
@@ -18,6 +16,7 @@ from app.schemas.auth import (
     SetNewPasswordRequest,
     RefreshTokenRequest,
     TokenResponse,
+    SessionResponse,
     UserResponse,
     MessageResponse,
 )
@@ -25,6 +24,13 @@ from app.db.database import get_db
 from app.models.user import User
 from app.core.config import settings
 from app.services.email_service import email_service
+from app.services.email_queue import email_worker
+from app.services.email_templates import email_templates
+from app.services import password_hasher
+from app.services.principal_cache import load_principal
+from app.services.token_service import ACCESS, TokenError, token_service
+from app.services.ttl_store import create_store
+from app.services import session_service
 
 # Initialize router
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
@@ -32,71 +38,22 @@ router = APIRouter(prefix="/api/auth", tags=["Auth"])
 # Security
 security = HTTPBearer()
 
-# Mock JWT settings (replace with your actual settings)
-SECRET_KEY = settings.SECRET_KEY
-ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# Mock OTP storage (in production, use Redis or database)
-otp_storage: Dict[str, Dict[str, Any]] = {}
+# OTPs by email, expired automatically by the store
+OTP_EXPIRE_MINUTES = 10
+otp_store = create_store("otp")
 
-# Mock user storage (in production, use database)
-users_storage: Dict[str, Dict[str, Any]] = {}
 
-# Mock blacklisted tokens (in production, use Redis)
-blacklisted_tokens: set = set()
-
-
-def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
-    """Create JWT access token"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-
-def create_refresh_token(data: dict) -> str:
-    """Create JWT refresh token"""
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-
-def verify_token(token: str) -> dict:
+def verify_token(token: str, token_type: str = ACCESS) -> dict:
     """Verify JWT token"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
+        return token_service.decode(token, token_type)
+    except TokenError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired"
+            detail=str(e)
         )
-    except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
-
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-
-def verify_password(password: str, hashed_password: str) -> bool:
-    """Verify password against bcrypt hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
 def generate_otp() -> str:
@@ -104,28 +61,11 @@ def generate_otp() -> str:
     return str(secrets.randbelow(900000) + 100000)
 
 
-async def send_otp_background(email: str, otp: str):
-    """Background task to send OTP email"""
-    try:
-        email_sent = await email_service.send_otp_email(email, otp, "email_verification")
-        if email_sent:
-            print(f"✅ OTP email sent successfully to {email}")
-        else:
-            print(f"❌ Failed to send OTP email to {email}: {otp}")
-    except Exception as e:
-        print(f"❌ Background email error for {email}: {str(e)}")
-
-
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> User:
     """Get current authenticated user"""
     token = credentials.credentials
     
-    if token in blacklisted_tokens:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked"
-        )
-    
+    # Revoked tokens, and tokens of revoked sessions (sid), are rejected by the token service
     payload = verify_token(token)
     user_id = payload.get("sub")
     
@@ -135,9 +75,9 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Invalid token"
         )
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id, User.is_deleted == False).first()
-    if not user:
+    # Get user from the principal cache (database on a miss)
+    user = load_principal(db, user_id)
+    if not user or user.is_deleted:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
@@ -166,7 +106,7 @@ async def register_user(user_data: UserRegisterRequest, db: Session = Depends(ge
         
         # Create new user
         user_id = str(uuid.uuid4())
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await password_hasher.hash_password(user_data.password)
         
         new_user = User(
             id=user_id,
@@ -201,11 +141,10 @@ async def register_user(user_data: UserRegisterRequest, db: Session = Depends(ge
         
         # Generate OTP for email verification
         otp_code = generate_otp()
-        otp_storage[user_data.email] = {
+        otp_store.set(user_data.email, {
             "otp": otp_code,
-            "expires_at": datetime.now() + timedelta(minutes=10),
             "type": "email_verification"
-        }
+        }, OTP_EXPIRE_MINUTES * 60)
         
         # Store OTP for verification (no email sent during registration)
         print(f"OTP for {user_data.email}: {otp_code}")
@@ -239,7 +178,7 @@ async def register_user(user_data: UserRegisterRequest, db: Session = Depends(ge
     summary="User login",
     description="Authenticate user and return JWT tokens"
 )
-async def login_user(login_data: UserLoginRequest, db: Session = Depends(get_db)):
+async def login_user(login_data: UserLoginRequest, request: Request, db: Session = Depends(get_db)):
     """Login user and return JWT tokens"""
     try:
         # Find user by email
@@ -252,21 +191,31 @@ async def login_user(login_data: UserLoginRequest, db: Session = Depends(get_db)
             )
         
         # Verify password
-        if not verify_password(login_data.password, user.password_hash):
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.password_hash)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
-        # Create tokens
-        access_token = create_access_token({"sub": str(user.id)})
-        refresh_token = create_refresh_token({"sub": str(user.id)})
+        # Upgrade hashes made with an outdated bcrypt cost
+        if new_hash:
+            user.password_hash = new_hash
+        
+        # Start a session; its refresh token rotates on every refresh
+        tokens = session_service.create_session(
+            db,
+            user.id,
+            user_agent=request.headers.get("user-agent"),
+            ip_address=request.client.host if request.client else None
+        )
+        db.commit()
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
-                "access_token": access_token,
-                "refresh_token": refresh_token,
+                "access_token": tokens.access_token,
+                "refresh_token": tokens.refresh_token,
                 "token_type": "bearer",
                 "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
             }
@@ -288,11 +237,19 @@ async def login_user(login_data: UserLoginRequest, db: Session = Depends(get_db)
     summary="User logout",
     description="Invalidate current access token"
 )
-async def logout_user(current_user: dict = Depends(get_current_user)):
+async def logout_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Logout user and invalidate token"""
     try:
-        # In production, add token to blacklist in Redis
-        # For now, we'll just return success
+        # Revoke the access token's jti until it expires, and its session
+        payload = verify_token(credentials.credentials)
+        token_service.revoke(payload)
+        if payload.get("sid"):
+            session_service.revoke_session(db, payload["sid"], current_user.id)
+            db.commit()
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
@@ -308,6 +265,98 @@ async def logout_user(current_user: dict = Depends(get_current_user)):
         )
 
 
+@router.post(
+    "/logout-all",
+    response_model=MessageResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Log out all devices",
+    description="Revoke every session of the current user"
+)
+async def logout_all_sessions(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke all sessions; their refresh tokens stop working immediately"""
+    try:
+        # Read the claims first: once the sessions are revoked the token no longer verifies
+        payload = verify_token(credentials.credentials)
+        revoked = session_service.revoke_all_sessions(db, current_user.id)
+        db.commit()
+        token_service.revoke(payload)
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "message": f"Logged out of {revoked} session(s)",
+                "success": True
+            }
+        )
+        
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Logout failed: {str(e)}"
+        )
+
+
+@router.get(
+    "/sessions",
+    response_model=List[SessionResponse],
+    status_code=status.HTTP_200_OK,
+    summary="List sessions",
+    description="Active sessions (logged-in devices) of the current user"
+)
+async def list_user_sessions(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's active sessions"""
+    current_sid = verify_token(credentials.credentials).get("sid")
+    return [
+        SessionResponse(
+            id=str(s.id),
+            user_agent=s.user_agent,
+            ip_address=s.ip_address,
+            created_at=s.created_at,
+            last_used_at=s.last_used_at,
+            expires_at=s.expires_at,
+            current=str(s.id) == current_sid
+        )
+        for s in session_service.list_sessions(db, current_user.id)
+    ]
+
+
+@router.delete(
+    "/sessions/{session_id}",
+    response_model=MessageResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Revoke session",
+    description="Log out one device of the current user"
+)
+async def revoke_user_session(
+    session_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke one of the current user's sessions"""
+    if not session_service.revoke_session(db, session_id, current_user.id):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    db.commit()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "message": "Session revoked",
+            "success": True
+        }
+    )
+
+
 @router.post(
     "/resend-otp",
     response_model=MessageResponse,
@@ -315,7 +364,7 @@ async def logout_user(current_user: dict = Depends(get_current_user)):
     summary="Resend OTP or Request Password Reset",
     description="Resend OTP for email verification or request password reset OTP"
 )
-async def resend_otp(request: ForgotPasswordRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def resend_otp(request: ForgotPasswordRequest, http_request: Request, db: Session = Depends(get_db)):
     """Resend OTP for email verification or request password reset"""
     try:
         # Check if user exists in database
@@ -328,14 +377,22 @@ async def resend_otp(request: ForgotPasswordRequest, background_tasks: Backgroun
         
         # Generate new OTP
         otp_code = generate_otp()
-        otp_storage[request.email] = {
+        otp_store.set(request.email, {
             "otp": otp_code,
-            "expires_at": datetime.now() + timedelta(minutes=10),
             "type": "email_verification"  # Default to email verification
-        }
-        
-        # Send OTP via email in background (non-blocking)
-        background_tasks.add_task(send_otp_background, request.email, otp_code)
+        }, OTP_EXPIRE_MINUTES * 60)
+        
+        # Queue the OTP email; the email worker sends it (with retries)
+        email_service.queue_otp_email(
+            db,
+            request.email,
+            otp_code,
+            "email_verification",
+            language=email_templates.negotiate(http_request.headers.get("accept-language")),
+            expire_minutes=OTP_EXPIRE_MINUTES,
+        )
+        db.commit()
+        email_worker.wake()
         
         # Return response immediately
         return JSONResponse(
@@ -364,40 +421,37 @@ async def resend_otp(request: ForgotPasswordRequest, background_tasks: Backgroun
     description="Get new access token using refresh token"
 )
 async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
-    """Refresh access token using refresh token"""
+    """Rotate the refresh token and issue a new access token"""
     try:
-        token = request.refresh_token
-        payload = verify_token(token)
-        
-        if payload.get("type") != "refresh":
+        try:
+            tokens = session_service.rotate(db, request.refresh_token)
+        except TokenError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type"
+                detail=str(e)
             )
-        
-        user_id = payload.get("sub")
-        if not user_id:
+        except session_service.SessionError as e:
+            db.commit()  # Keep the revocation made on token reuse
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
+                detail=str(e)
             )
         
-        # Check if user exists in database
-        user = db.query(User).filter(User.id == user_id, User.is_deleted == False).first()
-        if not user:
+        # Banned users cannot refresh
+        user = load_principal(db, tokens.user_id)
+        if not user or user.is_deleted:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
-        
-        # Create new access token
-        access_token = create_access_token({"sub": str(user.id)})
+        db.commit()
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
-                "access_token": access_token,
-                "refresh_token": token,  # Keep the same refresh token
+                "access_token": tokens.access_token,
+                "refresh_token": tokens.refresh_token,
                 "token_type": "bearer",
                 "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
             }
@@ -427,14 +481,14 @@ async def change_password(
     """Change password for authenticated user"""
     try:
         # Verify current password
-        if not verify_password(password_data.current_password, current_user.password_hash):
+        if not await password_hasher.verify_password(password_data.current_password, current_user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Update password in database
-        new_password_hash = hash_password(password_data.new_password)
+        new_password_hash = await password_hasher.hash_password(password_data.new_password)
         current_user.password_hash = new_password_hash
         db.commit()
         
@@ -466,21 +520,12 @@ async def change_password(
 async def verify_reset_otp(request: VerifyOTPRequest):
     """Verify OTP for password reset"""
     try:
-        # Check if OTP exists and is valid
-        if request.email not in otp_storage:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No OTP found for this email"
-            )
-        
-        stored_otp = otp_storage[request.email]
-        
-        # Check if OTP has expired
-        if datetime.now() > stored_otp["expires_at"]:
-            del otp_storage[request.email]
+        # Check if OTP exists (expired OTPs are gone from the store)
+        stored_otp = otp_store.get(request.email)
+        if stored_otp is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="OTP has expired"
+                detail="No OTP found for this email or it has expired"
             )
         
         # Check OTP code
@@ -490,8 +535,13 @@ async def verify_reset_otp(request: VerifyOTPRequest):
                 detail="Invalid OTP code"
             )
         
-        # Mark OTP as verified
-        otp_storage[request.email]["verified"] = True
+        # Mark OTP as verified (keeps the original expiry)
+        stored_otp["verified"] = True
+        if not otp_store.replace(request.email, stored_otp):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="OTP has expired"
+            )
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
@@ -521,14 +571,13 @@ async def set_new_password(request: SetNewPasswordRequest, db: Session = Depends
     """Set new password after OTP verification"""
     try:
         # Check if OTP exists and is verified
-        if request.email not in otp_storage:
+        stored_otp = otp_store.get(request.email)
+        if stored_otp is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No OTP found for this email"
+                detail="No OTP found for this email or it has expired"
             )
         
-        stored_otp = otp_storage[request.email]
-        
         # Check if OTP is verified
         if not stored_otp.get("verified", False):
             raise HTTPException(
@@ -552,12 +601,12 @@ async def set_new_password(request: SetNewPasswordRequest, db: Session = Depends
             )
         
         # Update password in database
-        new_password_hash = hash_password(request.new_password)
+        new_password_hash = await password_hasher.hash_password(request.new_password)
         user.password_hash = new_password_hash
         db.commit()
         
         # Remove OTP from storage
-        del otp_storage[request.email]
+        otp_store.delete(request.email)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
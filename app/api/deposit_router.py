@@ -9,15 +9,17 @@ from typing import Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.api.auth_router import get_current_user
+from app.core.metrics import DEPOSITS
 from app.db.database import get_db
 from app.models.user import User
 from app.models.wallet import Wallet, WalletTransaction
 from app.models.enums import TransactionType, TransactionStatus
 from app.models.notification import Notification
-from app.services.websocket_manager import manager
+from app.services.outbox import add_websocket_message, outbox_dispatcher
 
 
 logger = logging.getLogger(__name__)
@@ -68,9 +70,8 @@ async def init_deposit(
         # Generate unique transfer code; retry a few times on collision
         transfer_code = _generate_transfer_code(8)
         for _ in range(3):
-            exists = db.query(WalletTransaction).filter(
-                WalletTransaction.transaction_type == TransactionType.DEPOSIT,
-                WalletTransaction.transfer_code == transfer_code
+            exists = db.query(WalletTransaction.id).filter(
+                func.upper(WalletTransaction.transfer_code) == transfer_code
             ).first()
             if not exists:
                 break
@@ -88,7 +89,7 @@ async def init_deposit(
             note=f"Deposit init - transfer: {transfer_code}"
         )
         db.add(tx)
-        db.commit()
+        db.flush()
         db.refresh(tx)
 
         # Build QR URL using provided bank_name (passed through to 'bank' param)
@@ -101,9 +102,8 @@ async def init_deposit(
             current_user.email, tx.id, body.amount, transfer_code, qr_url
         )
 
-        # Create notifications for admins and send realtime message
+        # Create notifications for admins and queue realtime messages in the same transaction
         admins = db.query(User).filter(User.role == "ADMIN").all()
-        created = []
         for admin in admins:
             notif = Notification(
                 id=uuid.uuid4(),
@@ -116,11 +116,7 @@ async def init_deposit(
             db.add(notif)
             db.flush()
             db.refresh(notif)
-            created.append((admin.id, notif))
-        db.commit()
-
-        for admin_id, notif in created:
-            await manager.send_personal_message({
+            add_websocket_message(db, admin.id, {
                 "type": "new_deposit_request",
                 "event": "deposit_created",
                 "transaction": {
@@ -147,7 +143,10 @@ async def init_deposit(
                 },
                 "message": f"User {current_user.name or current_user.email} suggested a new deposit request",
                 "timestamp": tx.created_at.isoformat() if tx.created_at else None
-            }, str(admin_id))
+            })
+        db.commit()
+        outbox_dispatcher.wake()
+        DEPOSITS.labels("requested").inc()
 
         return DepositInitResponse(
             transfer_code=transfer_code,
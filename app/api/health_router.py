@@ -0,0 +1,119 @@
+import asyncio
+import math
+import smtplib
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from alembic.script import ScriptDirectory
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.database import engine
+
+router = APIRouter()
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+class CheckFailed(Exception):
+    """A readiness check ran but found the dependency unusable"""
+
+
+@lru_cache(maxsize=1)
+def _probe_engine():
+    # A connection of its own: a saturated app pool must not block (or hide) the DB check
+    return create_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={
+            "connect_timeout": max(1, math.ceil(settings.HEALTH_CHECK_TIMEOUT_SECONDS)),
+            "options": f"-c statement_timeout={int(settings.HEALTH_CHECK_TIMEOUT_SECONDS * 1000)}",
+        },
+    )
+
+
+@lru_cache(maxsize=1)
+def expected_heads() -> frozenset:
+    return frozenset(ScriptDirectory(str(ALEMBIC_DIR)).get_heads())
+
+
+def check_database() -> Dict[str, Any]:
+    with _probe_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {}
+
+
+def check_migrations() -> Dict[str, Any]:
+    """The database schema is at the alembic head this code was written for"""
+    with _probe_engine().connect() as conn:
+        versions: List[str] = []
+        if conn.execute(text("SELECT to_regclass('alembic_version')")).scalar() is not None:
+            versions = sorted(conn.execute(text("SELECT version_num FROM alembic_version")).scalars())
+    heads = sorted(expected_heads())
+    if versions != heads:
+        raise CheckFailed(f"database is at {versions or 'no version'}, code expects {heads}")
+    return {"head": heads}
+
+
+def check_pool() -> Dict[str, Any]:
+    pool = engine.pool
+    capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+    in_use = pool.checkedout()
+    details = {"in_use": in_use, "capacity": capacity}
+    if capacity and in_use / capacity >= settings.HEALTH_POOL_MAX_UTILIZATION:
+        raise CheckFailed(f"{in_use} of {capacity} connections in use")
+    return details
+
+
+def check_smtp() -> Dict[str, Any]:
+    smtp_class = smtplib.SMTP_SSL if settings.MAIL_SSL else smtplib.SMTP
+    with smtp_class(settings.MAIL_SERVER, settings.MAIL_PORT, timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS) as smtp:
+        code, _ = smtp.noop()
+    if code != 250:
+        raise CheckFailed(f"NOOP returned {code}")
+    return {"server": f"{settings.MAIL_SERVER}:{settings.MAIL_PORT}"}
+
+
+async def run_check(check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run a blocking check in the threadpool; returns its status, latency and details"""
+    started = time.perf_counter()
+    try:
+        details = await asyncio.wait_for(run_in_threadpool(check), settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        result = {"status": "ok", **details}
+    except asyncio.TimeoutError:
+        result = {"status": "fail", "error": f"timed out after {settings.HEALTH_CHECK_TIMEOUT_SECONDS}s"}
+    except Exception as exc:
+        message = str(exc).strip().splitlines()
+        result = {"status": "fail", "error": message[0] if message else type(exc).__name__}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+@router.get("/health/live")
+def liveness():
+    """The process is up and serving requests; restart it only if this fails"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """Whether this worker should receive traffic; 503 if any dependency check fails"""
+    pending = {
+        "database": run_check(check_database),
+        "migrations": run_check(check_migrations),
+        "pool": run_check(check_pool),
+    }
+    if settings.HEALTH_CHECK_SMTP:
+        pending["smtp"] = run_check(check_smtp)
+    checks = dict(zip(pending, await asyncio.gather(*pending.values())))
+    ready = all(check["status"] == "ok" for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks},
+    )
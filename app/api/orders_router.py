@@ -7,6 +7,7 @@ from app.models.workflow import Workflow
 from app.models.workflow_category import WorkflowCategory
 from app.models.category import Category
 from app.api.auth_router import get_current_user
+from app.core.metrics import PURCHASES
 from app.models.user import User
 from pydantic import BaseModel
 from typing import List
@@ -136,6 +137,7 @@ async def create_order(
         db.add(purchase)
         db.commit()
         db.refresh(purchase)
+        PURCHASES.labels("QR", "PENDING").inc()
         
         return OrderResponse(
             success=True,
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Query
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.models.user import User
@@ -8,18 +10,22 @@ from app.models.workflow import Workflow
 from app.models.notification import Notification
 from app.models.enums import TransactionType, TransactionStatus
 from app.api.auth_router import get_current_user
-from app.services.websocket_manager import manager
+from app.core.metrics import DEPOSIT_AMOUNT, DEPOSITS, PURCHASE_AMOUNT, PURCHASES
+from app.services.outbox import add_websocket_message, outbox_dispatcher
+from app.services.deposit_matcher import normalize_transfer_code
+from app.services import wallet_ledger
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import List, Optional
+from typing import Optional
 from uuid import UUID
 from datetime import datetime
+import base64
 import uuid
 
 router = APIRouter()
 
 # Import schemas from schemas module
 from app.schemas.wallet import (
-    WalletResponse, WalletTransactionResponse, DepositRequest, DepositResponse,
+    WalletResponse, WalletTransactionResponse, WalletTransactionPageResponse, DepositRequest, DepositResponse,
     PurchaseWithWalletRequest, PurchaseWithWalletResponse, LastBankInfoResponse,
     AdminActivateDepositRequest, AdminActivateDepositResponse
 )
@@ -63,36 +69,105 @@ async def get_wallet_info(
         )
 
 # 34. GET /api/wallet/transactions - Lấy lịch sử giao dịch ví của người dùng
-@router.get("/transactions", response_model=List[WalletTransactionResponse])
+def _encode_cursor(tx: WalletTransaction) -> str:
+    raw = f"{tx.created_at.isoformat()}|{tx.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, tx_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(tx_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/transactions", response_model=WalletTransactionPageResponse)
 async def get_wallet_transactions(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    transaction_type: Optional[TransactionType] = Query(None),
+    status_filter: Optional[TransactionStatus] = Query(None, alias="status"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Lấy lịch sử giao dịch ví của người dùng"""
+    """Lấy lịch sử giao dịch ví của người dùng (phân trang theo cursor, mới nhất trước).
+
+    Pages walk idx_wallet_transactions_wallet_created backwards with a
+    (created_at, id) keyset. The first page also carries per-type totals for
+    the filtered range, computed by a scalar subquery in the same statement.
+    """
     try:
         wallet = get_or_create_wallet(current_user.id, db)
         
-        # Get all transactions
-        transactions = db.query(WalletTransaction)\
-            .filter(WalletTransaction.wallet_id == wallet.id)\
-            .order_by(WalletTransaction.created_at.desc())\
+        filters = [WalletTransaction.wallet_id == wallet.id]
+        if transaction_type:
+            filters.append(WalletTransaction.transaction_type == transaction_type)
+        if status_filter:
+            filters.append(WalletTransaction.status == status_filter)
+        if date_from:
+            filters.append(WalletTransaction.created_at >= date_from)
+        if date_to:
+            filters.append(WalletTransaction.created_at < date_to)
+        
+        query = db.query(WalletTransaction).filter(*filters)
+        if cursor:
+            cursor_created_at, cursor_id = _decode_cursor(cursor)
+            query = query.filter(
+                tuple_(WalletTransaction.created_at, WalletTransaction.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        else:
+            per_type = select(
+                WalletTransaction.transaction_type,
+                func.count().label("count"),
+                func.sum(WalletTransaction.amount).label("total_amount")
+            ).where(*filters).group_by(WalletTransaction.transaction_type).subquery()
+            summary_column = select(
+                func.json_object_agg(
+                    per_type.c.transaction_type,
+                    func.json_build_object("count", per_type.c.count, "total_amount", per_type.c.total_amount)
+                )
+            ).scalar_subquery()
+            query = query.add_columns(summary_column.label("summary"))
+        
+        rows = query.order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.desc())\
+            .limit(limit + 1)\
             .all()
         
-        return [
-            WalletTransactionResponse(
-                id=tx.id,
-                transaction_type=tx.transaction_type,
-                amount=float(tx.amount),
-                status=tx.status,
-                bank_name=tx.bank_name,
-                bank_account=tx.bank_account,
-                transfer_code=tx.transfer_code,
-                note=tx.note,
-                created_at=tx.created_at
-            )
-            for tx in transactions
-        ]
+        summary = None
+        if not cursor:
+            summary = rows[0].summary if rows else {}
+            rows = [row[0] for row in rows]
+        
+        has_more = len(rows) > limit
+        transactions = rows[:limit]
+        
+        return WalletTransactionPageResponse(
+            items=[
+                WalletTransactionResponse(
+                    id=tx.id,
+                    transaction_type=tx.transaction_type,
+                    amount=float(tx.amount),
+                    status=tx.status,
+                    bank_name=tx.bank_name,
+                    bank_account=tx.bank_account,
+                    transfer_code=tx.transfer_code,
+                    note=tx.note,
+                    created_at=tx.created_at
+                )
+                for tx in transactions
+            ],
+            next_cursor=_encode_cursor(transactions[-1]) if has_more else None,
+            summary=summary
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -148,9 +223,8 @@ async def create_deposit_request(
         wallet = get_or_create_wallet(current_user.id, db)
         
         # Check if transfer_code already exists
-        existing_tx = db.query(WalletTransaction).filter(
-            WalletTransaction.note.like(f"%{deposit_data.transfer_code}%"),
-            WalletTransaction.transaction_type == TransactionType.DEPOSIT
+        existing_tx = db.query(WalletTransaction.id).filter(
+            func.upper(WalletTransaction.transfer_code) == normalize_transfer_code(deposit_data.transfer_code)
         ).first()
         
         if existing_tx:
@@ -173,16 +247,23 @@ async def create_deposit_request(
         )
         
         db.add(transaction)
-        db.commit()
+        try:
+            db.flush()
+        except IntegrityError:
+            # Lost the race against a concurrent request with the same code
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Transfer code already exists"
+            )
         db.refresh(transaction)
         
         # Get user info for notification
         user = db.query(User).filter(User.id == current_user.id).first()
         
-        # Create notification and send WebSocket message to all admins
+        # Create notification and queue a WebSocket message for every admin in the same transaction
         admins = db.query(User).filter(User.role == "ADMIN").all()
         
-        notifications_list = []
         for admin in admins:
             # Create notification for admin
             notification = Notification(
@@ -196,13 +277,7 @@ async def create_deposit_request(
             db.add(notification)
             db.flush()  # Flush to get notification.id
             db.refresh(notification)
-            notifications_list.append((notification, admin.id))
-        
-        db.commit()
-        
-        # Send WebSocket messages after commit
-        for notification, admin_id in notifications_list:
-            await manager.send_personal_message({
+            add_websocket_message(db, admin.id, {
                 "type": "new_deposit_request",
                 "event": "deposit_created",
                 "transaction": {
@@ -229,7 +304,11 @@ async def create_deposit_request(
                 },
                 "message": f"User {user.name} suggested a new deposit request",
                 "timestamp": transaction.created_at.isoformat() if transaction.created_at else None
-            }, str(admin_id))
+            })
+        
+        db.commit()
+        outbox_dispatcher.wake()
+        DEPOSITS.labels("requested").inc()
         
         return DepositResponse(
             success=True,
@@ -332,13 +411,6 @@ async def purchase_workflow_with_wallet(
         # Get or create wallet
         wallet = get_or_create_wallet(current_user.id, db)
         
-        # Check if user has enough balance
-        if wallet.balance < workflow.price:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient wallet balance"
-            )
-        
         # Create purchase
         purchase = Purchase(
             id=uuid.uuid4(),
@@ -369,9 +441,15 @@ async def purchase_workflow_with_wallet(
         
         db.add(wallet_transaction)
         
-        # Update wallet balance
-        wallet.balance -= workflow.price
-        wallet.total_spent += workflow.price
+        # Update wallet balance (atomic: fails instead of overdrawing under concurrency)
+        try:
+            new_balance = wallet_ledger.debit(db, wallet.id, workflow.price, wallet_transaction.id)
+        except wallet_ledger.InsufficientBalanceError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient wallet balance"
+            )
         
         # Create invoice
         from app.models.invoice import Invoice
@@ -385,11 +463,13 @@ async def purchase_workflow_with_wallet(
         
         db.add(invoice)
         db.commit()
+        PURCHASES.labels("WALLET", "ACTIVE").inc()
+        PURCHASE_AMOUNT.labels("WALLET").inc(float(workflow.price))
         
         return PurchaseWithWalletResponse(
             success=True,
             message="Workflow purchased successfully",
-            wallet_balance=float(wallet.balance),
+            wallet_balance=float(new_balance),
             purchase_id=purchase.id
         )
         
@@ -410,41 +490,19 @@ async def admin_activate_deposit(
 ):
     """Admin endpoint to activate a pending deposit and add money to wallet"""
     try:
-        # Find the pending deposit transaction
-        transaction = db.query(WalletTransaction).filter(
-            WalletTransaction.id == request.transaction_id,
-            WalletTransaction.transaction_type == TransactionType.DEPOSIT,
-            WalletTransaction.status == TransactionStatus.PENDING
-        ).first()
-        
-        if not transaction:
+        # Settle the pending deposit; the conditional UPDATE makes a second activation a no-op
+        settled = wallet_ledger.settle_pending_deposit(db, request.transaction_id, " - Activated by admin")
+        if not settled:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Pending deposit transaction not found"
             )
         
-        # Get the wallet
-        wallet = db.query(Wallet).filter(Wallet.id == transaction.wallet_id).first()
-        if not wallet:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Wallet not found"
-            )
+        wallet = db.query(Wallet).filter(Wallet.id == settled.wallet_id).first()
+        transaction = db.query(WalletTransaction).filter(WalletTransaction.id == settled.transaction_id).first()
         
-        # Update transaction status to SUCCESS
-        transaction.status = TransactionStatus.SUCCESS
-        transaction.note = f"{transaction.note} - Activated by admin"
-        
-        # Update wallet balance
-        wallet.balance += transaction.amount
-        wallet.total_deposited += transaction.amount
-        
-        db.commit()
-        db.refresh(wallet)
-        db.refresh(transaction)
-        
-        # Send WebSocket notification to user with full transaction details
-        await manager.send_personal_message({
+        # Notify the user with full transaction details; delivered by the outbox after commit
+        add_websocket_message(db, wallet.user_id, {
             "type": "wallet_status_update",
             "event": "deposit_activated",
             "transaction": {
@@ -464,7 +522,12 @@ async def admin_activate_deposit(
             },
             "message": "Deposit transaction has been activated successfully",
             "timestamp": transaction.updated_at.isoformat() if transaction.updated_at else None
-        }, str(wallet.user_id))
+        })
+        
+        db.commit()
+        outbox_dispatcher.wake()
+        DEPOSITS.labels("completed").inc()
+        DEPOSIT_AMOUNT.inc(float(transaction.amount))
         
         return AdminActivateDepositResponse(
             success=True,
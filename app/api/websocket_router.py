@@ -55,7 +55,7 @@ async def wallet_status_websocket(websocket: WebSocket, token: str):
             return
         
         # Connect to manager (connection already accepted)
-        await manager.connect(websocket, str(user.id), already_accepted=True)
+        await manager.connect(websocket, str(user.id), already_accepted=True, channel="wallet")
         
         # Send welcome message
         await websocket.send_json({
@@ -101,7 +101,7 @@ async def notifications_websocket(websocket: WebSocket, token: str):
             return
         
         # Connect to manager (connection already accepted)
-        await manager.connect(websocket, str(user.id), already_accepted=True)
+        await manager.connect(websocket, str(user.id), already_accepted=True, channel="notifications")
         
         # Send welcome message
         await websocket.send_json({
@@ -153,7 +153,7 @@ async def admin_deposits_websocket(websocket: WebSocket, token: str):
             return
         
         # Connect to manager (connection already accepted)
-        await manager.connect(websocket, str(user.id), already_accepted=True)
+        await manager.connect(websocket, str(user.id), already_accepted=True, channel="admin_deposits")
         
         # Send welcome message
         await websocket.send_json({
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, load_only
 from app.db.database import get_db
 from app.models.favorite import Favorite
 from app.models.workflow import Workflow
@@ -21,7 +21,10 @@ async def get_wishlist(
         favorites = db.query(Favorite)\
             .join(Workflow)\
             .filter(Favorite.user_id == current_user.id)\
-            .options(joinedload(Favorite.workflow).joinedload(Workflow.categories).joinedload(WorkflowCategory.category))\
+            .options(
+                joinedload(Favorite.workflow).load_only(Workflow.id, Workflow.title, Workflow.price, Workflow.created_at),
+                joinedload(Favorite.workflow).joinedload(Workflow.categories).joinedload(WorkflowCategory.category)
+            )\
             .all()
         
         result = []
@@ -1,23 +1,29 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query, Header
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, load_only
 from sqlalchemy import func, and_, or_
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 
+from app.core.responses import FastJSONResponse
 from app.db.database import get_db
 from app.models import (
     Workflow, Category, WorkflowCategory, WorkflowAsset, 
     Favorite, Comment, Purchase, Invoice, User
 )
 from app.schemas.workflow import (
-    WorkflowResponse, WorkflowDetailResponse, WorkflowCreateRequest, WorkflowUpdateRequest,
+    WorkflowResponse, WorkflowListingResponse, WorkflowDetailResponse,
+    WorkflowCreateRequest, WorkflowUpdateRequest,
     CategoryResponse, CategoryCreateRequest, CategoryUpdateRequest,
     ReviewCreateRequest, ReviewResponse
 )
 from app.schemas.admin import MessageResponse
 from app.api.auth_router import get_current_user
+from app.services.principal_cache import load_principal
+from app.services.token_service import token_service
+from app.services.scheduled_jobs import enqueue_rating_recompute
+from app.services.workflow_fields import parse_fields, workflow_load_options, workflow_row
 from fastapi import HTTPException, status
 
 router = APIRouter(prefix="/api/workflows", tags=["Workflows"])
@@ -31,30 +37,39 @@ def get_optional_user(
         return None
     
     try:
-        # Decode JWT token manually to avoid exceptions from get_current_user
-        import jwt
-        from app.core.config import settings
-        
-        token = credentials.credentials
-        
-        # Decode token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        # Decode without raising, unlike get_current_user
+        payload = token_service.decode(credentials.credentials)
         user_id = payload.get("sub")
         
         if not user_id:
             return None
         
-        # Get user from database
-        user = db.query(User).filter(User.id == user_id).first()
-        return user
+        # Get user from the principal cache (database on a miss)
+        return load_principal(db, user_id)
         
     except Exception:
         # If any exception occurs, return None
         return None
 
 
-@router.get("/", response_model=List[WorkflowResponse])
+def listing_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated WorkflowResponse fields to return, e.g. title,price,image_urls; "
+                    "id is always included. Without it rows have every field except flow, "
+                    "description and features."
+    )
+):
+    """Sparse fieldset of a workflow listing"""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/", response_model=List[WorkflowListingResponse])
 async def get_workflows(
+    fields: Tuple[str, ...] = Depends(listing_fields),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_user)
 ):
@@ -76,54 +91,36 @@ async def get_workflows(
             # Exclude purchased workflows
             query = query.filter(~Workflow.id.in_(purchased_workflow_ids))
         
-        workflows = query.options(
-            joinedload(Workflow.categories).joinedload(WorkflowCategory.category),
-            joinedload(Workflow.assets),
-            joinedload(Workflow.favorites)
-        ).all()
+        workflows = query.options(*workflow_load_options(fields)).all()
+        
+        # Which of these workflows the current user has liked, in one query for the page
+        liked_workflow_ids = set()
+        if current_user and "is_like" in fields and workflows:
+            liked_workflow_ids = {
+                workflow_id for (workflow_id,) in db.query(Favorite.workflow_id)
+                .filter(
+                    Favorite.user_id == current_user.id,
+                    Favorite.workflow_id.in_([workflow.id for workflow in workflows])
+                )
+            }
         
         result = []
         for workflow in workflows:
-            categories = [wc.category.name for wc in workflow.categories]
-            # Get image URLs from assets (filter by kind="image")
-            image_urls = [asset.asset_url for asset in workflow.assets if asset.kind == "image"]
-            
             # Check if current user has liked/purchased this workflow (only if authenticated)
             is_like = None
             is_buy = None
             
+            if current_user and "is_like" in fields:
+                is_like = workflow.id in liked_workflow_ids
+            
             if current_user:
-                # Check if current user has liked this workflow
-                favorite = db.query(Favorite)\
-                    .filter(Favorite.workflow_id == workflow.id, Favorite.user_id == current_user.id)\
-                    .first()
-                is_like = favorite is not None
-                
                 # Since we filtered out purchased workflows, is_buy should always be false
                 is_buy = False
             
-            result.append(WorkflowResponse(
-                id=str(workflow.id),
-                title=workflow.title,
-                description=workflow.description,
-                price=float(workflow.price),
-                status=workflow.status,
-                features=workflow.features or [],
-                downloads_count=workflow.downloads_count or 0,
-                wishlist_count=len(workflow.favorites),
-                time_to_setup=workflow.time_to_setup,
-                video_demo=workflow.video_demo,
-                flow=workflow.flow,
-                rating_avg=float(workflow.rating_avg) if workflow.rating_avg else None,
-                created_at=workflow.created_at.isoformat() if workflow.created_at else None,
-                updated_at=workflow.updated_at.isoformat() if workflow.updated_at else None,
-                categories=categories,
-                image_urls=image_urls,
-                is_like=is_like,
-                is_buy=is_buy
-            ))
+            result.append(workflow_row(workflow, fields, is_like=is_like, is_buy=is_buy))
         
-        return result
+        # Rows are shaped above; returned as-is instead of re-validated against response_model
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -131,8 +128,9 @@ async def get_workflows(
         )
 
 
-@router.get("/feature", response_model=List[WorkflowResponse])
+@router.get("/feature", response_model=List[WorkflowListingResponse])
 async def get_featured_workflows(
+    fields: Tuple[str, ...] = Depends(listing_fields),
     db: Session = Depends(get_db)
 ):
     """Get top 10 featured workflows by downloads_count, then by rating_avg."""
@@ -140,42 +138,11 @@ async def get_featured_workflows(
         workflows = db.query(Workflow)\
             .filter(Workflow.status == "active")\
             .order_by(Workflow.downloads_count.desc(), Workflow.rating_avg.desc())\
-            .options(
-                joinedload(Workflow.categories).joinedload(WorkflowCategory.category),
-                joinedload(Workflow.assets),
-                joinedload(Workflow.favorites)
-            )\
+            .options(*workflow_load_options(fields))\
             .limit(10)\
             .all()
         
-        result = []
-        for workflow in workflows:
-            categories = [wc.category.name for wc in workflow.categories]
-            # Get image URLs from assets (filter by kind="image")
-            image_urls = [asset.asset_url for asset in workflow.assets if asset.kind == "image"]
-            
-            result.append(WorkflowResponse(
-                id=str(workflow.id),
-                title=workflow.title,
-                description=workflow.description,
-                price=float(workflow.price),
-                status=workflow.status,
-                features=workflow.features or [],
-                downloads_count=workflow.downloads_count or 0,
-                wishlist_count=len(workflow.favorites),
-                time_to_setup=workflow.time_to_setup,
-                video_demo=workflow.video_demo,
-                flow=workflow.flow,
-                rating_avg=float(workflow.rating_avg) if workflow.rating_avg else None,
-                created_at=workflow.created_at.isoformat() if workflow.created_at else None,
-                updated_at=workflow.updated_at.isoformat() if workflow.updated_at else None,
-                categories=categories,
-                image_urls=image_urls,
-                is_like=None,
-                is_buy=None
-            ))
-        
-        return result
+        return FastJSONResponse([workflow_row(workflow, fields) for workflow in workflows])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -209,7 +176,10 @@ async def get_related_workflows(
                     WorkflowCategory.category_id.in_(category_ids)
                 )
             )\
-            .options(joinedload(Workflow.assets))\
+            .options(
+                load_only(Workflow.id, Workflow.title, Workflow.rating_avg, Workflow.price),
+                joinedload(Workflow.assets)
+            )\
             .limit(3).all()
         
         result = []
@@ -236,8 +206,9 @@ async def get_related_workflows(
         )
 
 
-@router.get("/my-workflow", response_model=List[WorkflowResponse])
+@router.get("/my-workflow", response_model=List[WorkflowListingResponse])
 async def get_my_workflows(
+    fields: Tuple[str, ...] = Depends(listing_fields),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -251,43 +222,10 @@ async def get_my_workflows(
                     Purchase.status == "ACTIVE"
                 )
             )\
-            .options(
-                joinedload(Purchase.workflow).joinedload(Workflow.categories).joinedload(WorkflowCategory.category),
-                joinedload(Purchase.workflow).joinedload(Workflow.assets),
-                joinedload(Purchase.workflow).joinedload(Workflow.favorites)
-            )\
+            .options(*workflow_load_options(fields, through=Purchase.workflow))\
             .all()
         
-        result = []
-        for purchase in purchases:
-            workflow = purchase.workflow
-            
-            # Get categories and images for the workflow
-            categories = [wc.category.name for wc in workflow.categories]
-            image_urls = [asset.asset_url for asset in workflow.assets if asset.kind == "image"]
-            
-            result.append(WorkflowResponse(
-                id=str(workflow.id),
-                title=workflow.title,
-                description=workflow.description,
-                price=float(workflow.price),
-                status=workflow.status,
-                features=workflow.features or [],
-                downloads_count=workflow.downloads_count or 0,
-                wishlist_count=len(workflow.favorites),
-                time_to_setup=workflow.time_to_setup,
-                video_demo=workflow.video_demo,
-                flow=workflow.flow,
-                rating_avg=float(workflow.rating_avg) if workflow.rating_avg else None,
-                created_at=workflow.created_at.isoformat() if workflow.created_at else None,
-                updated_at=workflow.updated_at.isoformat() if workflow.updated_at else None,
-                categories=categories,
-                image_urls=image_urls,
-                is_like=None,
-                is_buy=None
-            ))
-        
-        return result
+        return FastJSONResponse([workflow_row(purchase.workflow, fields) for purchase in purchases])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -295,6 +233,38 @@ async def get_my_workflows(
         )
 
 
+# Declared before /{workflow_id}, which would otherwise match "search" and
+# reject it as an invalid UUID (422)
+@router.get("/search", response_model=List[WorkflowListingResponse])
+async def search_workflows(
+    q: str = Query(..., min_length=1),
+    fields: Tuple[str, ...] = Depends(listing_fields),
+    db: Session = Depends(get_db)
+):
+    """Search workflows by keyword (no pagination params)."""
+    try:
+        search_term = f"%{q}%"
+        workflows = db.query(Workflow)\
+            .filter(
+                and_(
+                    Workflow.status == "active",
+                    or_(
+                        Workflow.title.ilike(search_term),
+                        Workflow.description.ilike(search_term)
+                    )
+                )
+            )\
+            .options(*workflow_load_options(fields))\
+            .all()
+        
+        return FastJSONResponse([workflow_row(workflow, fields) for workflow in workflows])
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search workflows: {str(e)}"
+        )
+
+
 @router.get("/{workflow_id}", response_model=WorkflowDetailResponse)
 async def get_workflow_detail(
     workflow_id: UUID,
@@ -380,66 +350,6 @@ async def get_workflow_detail(
         )
 
 
-@router.get("/search", response_model=List[WorkflowResponse])
-async def search_workflows(
-    q: str = Query(..., min_length=1),
-    db: Session = Depends(get_db)
-):
-    """Search workflows by keyword (no pagination params)."""
-    try:
-        search_term = f"%{q}%"
-        workflows = db.query(Workflow)\
-            .filter(
-                and_(
-                    Workflow.status == "active",
-                    or_(
-                        Workflow.title.ilike(search_term),
-                        Workflow.description.ilike(search_term)
-                    )
-                )
-            )\
-            .options(
-                joinedload(Workflow.categories).joinedload(WorkflowCategory.category),
-                joinedload(Workflow.assets),
-                joinedload(Workflow.favorites)
-            )\
-            .all()
-        
-        result = []
-        for workflow in workflows:
-            categories = [wc.category.name for wc in workflow.categories]
-            # Get image URLs from assets (filter by kind="image")
-            image_urls = [asset.asset_url for asset in workflow.assets if asset.kind == "image"]
-            
-            result.append(WorkflowResponse(
-                id=str(workflow.id),
-                title=workflow.title,
-                description=workflow.description,
-                price=float(workflow.price),
-                status=workflow.status,
-                features=workflow.features or [],
-                downloads_count=workflow.downloads_count or 0,
-                wishlist_count=len(workflow.favorites),
-                time_to_setup=workflow.time_to_setup,
-                video_demo=workflow.video_demo,
-                flow=workflow.flow,
-                rating_avg=float(workflow.rating_avg) if workflow.rating_avg else None,
-                created_at=workflow.created_at.isoformat() if workflow.created_at else None,
-                updated_at=workflow.updated_at.isoformat() if workflow.updated_at else None,
-                categories=categories,
-                image_urls=image_urls,
-                is_like=None,
-                is_buy=None
-            ))
-        
-        return result
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to search workflows: {str(e)}"
-        )
-
-
 @router.post("/{workflow_id}/wishlist", response_model=MessageResponse)
 async def add_to_wishlist(
     workflow_id: UUID,
@@ -552,14 +462,11 @@ async def create_review(
             content=review_data.content
         )
         db.add(review)
-        db.commit()
         
-        # Update workflow rating average only if rating is provided
+        # Recompute the workflow rating average in the job runner, only if rating is provided
         if review_data.rating is not None:
-            avg_rating = db.query(func.avg(Comment.rating))\
-                .filter(Comment.workflow_id == workflow_id, Comment.rating.isnot(None)).scalar()
-            workflow.rating_avg = avg_rating
-            db.commit()
+            enqueue_rating_recompute(db, workflow_id)
+        db.commit()
         
         return MessageResponse(success=True, message="Review added successfully")
     except HTTPException:
@@ -595,16 +502,13 @@ async def delete_review(
             )
         
         workflow_id = review.workflow_id
+        had_rating = review.rating is not None
         db.delete(review)
-        db.commit()
         
-        # Update workflow rating average
-        workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
-        if workflow:
-            avg_rating = db.query(func.avg(Comment.rating))\
-                .filter(Comment.workflow_id == workflow_id).scalar()
-            workflow.rating_avg = avg_rating
-            db.commit()
+        # Recompute the workflow rating average in the job runner
+        if had_rating:
+            enqueue_rating_recompute(db, workflow_id)
+        db.commit()
         
         return MessageResponse(success=True, message="Review deleted successfully")
     except HTTPException:
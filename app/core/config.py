@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -10,6 +11,72 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # A refresh token that was just rotated away is still accepted for this long
+    # (concurrent tabs, a retried request); after that, using it revokes the session
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
+    # Revoked and expired sessions are deleted this long after they ended
+    SESSION_RETENTION_DAYS: int = 30
+    
+    # JWT signing keys by key id, e.g. JWT_KEYS='{"2024-06": "..."}'. New tokens
+    # are signed with JWT_ACTIVE_KID; when JWT_KEYS is empty SECRET_KEY is used.
+    JWT_KEYS: Dict[str, str] = {}
+    JWT_ACTIVE_KID: str = "default"
+    JWT_AUDIENCE: str = "usitech-api"
+    # Tokens without a kid (signed with SECRET_KEY before JWT_KEYS existed) are
+    # only accepted while this is set, and only if issued before it and expiring
+    # within REFRESH_TOKEN_EXPIRE_DAYS of it. Set it to when kids were rolled out;
+    # once REFRESH_TOKEN_EXPIRE_DAYS have passed, unset it to retire SECRET_KEY.
+    JWT_LEGACY_ISSUED_BEFORE: Optional[datetime] = None
+    JWT_DECODE_CACHE_SIZE: int = 4096
+    
+    # Short-lived shared state (OTPs, revoked tokens): "memory" keeps it per
+    # process, "redis" shares it between workers (needs the redis package)
+    STORE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    TTL_STORE_MAX_ENTRIES: int = 100000  # per in-memory store; revocations are exempt
+    
+    # Token-bucket rate limits on login/OTP/webhook endpoints (app/core/rate_limit.py).
+    # Buckets use STORE_BACKEND. Only trust X-Forwarded-For behind a proxy that sets it.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    
+    # Password hashing: bcrypt cost and the size of its dedicated thread pool.
+    # Changing BCRYPT_ROUNDS rehashes existing passwords as users log in.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    
+    # Authenticated users cached per process (0 disables the cache)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Per-request SQL instrumentation (app/core/query_metrics.py). Requests running
+    # more statements than their budget are logged; QUERY_BUDGETS overrides it per
+    # route, e.g. QUERY_BUDGETS='{"GET /api/workflows/{workflow_id}": 8}'
+    QUERY_METRICS_ENABLED: bool = True
+    QUERY_BUDGET: int = 25
+    QUERY_BUDGETS: Dict[str, int] = {}
+    SERVER_TIMING_HEADER: bool = True
+    
+    # Prometheus metrics at GET /metrics, served only when METRICS_TOKEN is set;
+    # scrapers send "Authorization: Bearer <token>"
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+    
+    # Request profiling (app/core/profiling.py): sampled stacks of requests sending
+    # "X-Profile: 1" with an admin token, or of PROFILING_SAMPLE_RATE of all requests,
+    # are written to PROFILING_DIR as collapsed stacks for flamegraph tools
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_SECONDS: float = 0.005
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_FILES: int = 200
+    
+    # Readiness probe (GET /health/ready): per-check timeout, the share of the DB
+    # pool in use at which the worker reports not ready, and an optional SMTP check
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_POOL_MAX_UTILIZATION: float = 1.0
+    HEALTH_CHECK_SMTP: bool = False
     
     # API
     API_V1_STR: str = "/api/v1"
@@ -27,6 +94,63 @@ class Settings(BaseSettings):
     MAIL_SERVER: str = "smtp.gmail.com"
     MAIL_TLS: bool = True
     MAIL_SSL: bool = False
+    MAIL_FROM_NAME: str = "USITech"
+    EMAIL_DEFAULT_LANGUAGE: str = "en"  # used when the recipient's language has no templates
+    
+    # Outbound email queue: EMAIL_WORKERS tasks, each holding one pooled SMTP connection
+    EMAIL_WORKERS: int = 1
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: int = 30
+    EMAIL_POLL_INTERVAL_SECONDS: float = 5.0
+    EMAIL_LOCK_TIMEOUT_SECONDS: int = 300
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60
+    EMAIL_RETENTION_DAYS: int = 30  # SENT/FAILED emails are deleted after this
+    
+    # Wallet ledger: snapshot a wallet's balance every N ledger entries
+    LEDGER_SNAPSHOT_INTERVAL: int = 100
+    
+    # Background workers (started with the app)
+    BACKGROUND_WORKERS_ENABLED: bool = True
+    
+    # Sepay webhook inbox
+    WEBHOOK_WORKERS: int = 2
+    WEBHOOK_BATCH_SIZE: int = 20
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_RETRY_BASE_SECONDS: int = 10
+    WEBHOOK_POLL_INTERVAL_SECONDS: float = 2.0
+    WEBHOOK_LOCK_TIMEOUT_SECONDS: int = 300
+    # DONE/FAILED rows are deleted after this. A redelivery older than that is
+    # processed again, which is harmless: only PENDING deposits are settled.
+    WEBHOOK_RETENTION_DAYS: int = 30
+    
+    # Outbox dispatcher (WebSocket events written alongside the DB change)
+    OUTBOX_WORKERS: int = 1
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BASE_SECONDS: int = 5
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_LOCK_TIMEOUT_SECONDS: int = 120
+    OUTBOX_RETENTION_DAYS: int = 3  # DONE/FAILED events are deleted after this
+    
+    # Job runner (run_jobs.py): worker processes, retries and cleanup; schedules are in UTC
+    JOB_WORKER_PROCESSES: int = 2
+    JOB_BATCH_SIZE: int = 5
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: int = 30
+    JOB_LOCK_TIMEOUT_SECONDS: int = 900
+    JOB_RETENTION_DAYS: int = 7
+    PURGE_BATCH_SIZE: int = 5000  # rows deleted per commit by the retention jobs
+    
+    # Expiry sweeper: PENDING deposits/purchases older than this are marked EXPIRED
+    DEPOSIT_PENDING_TTL_MINUTES: int = 24 * 60
+    PURCHASE_PENDING_TTL_MINUTES: int = 24 * 60
+    EXPIRY_SWEEP_BATCH_SIZE: int = 500
+    
+    # Sepay matching fallback: per-process cache of the pending transfer codes of
+    # each amount; changes made by other workers are picked up after this long
+    DEPOSIT_MATCHER_CACHE_SECONDS: float = 30
     
     class Config:
         env_file = ".env"
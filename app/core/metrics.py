@@ -0,0 +1,133 @@
+import hmac
+import logging
+import time
+
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.query_metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Metrics are per process: with several uvicorn workers, scrape each of them
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a database connection from the pool (including opening a new one)",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+WEBHOOK_OUTCOMES = Counter(
+    "sepay_webhooks_total",
+    "Processed Sepay webhooks by outcome (credited, unmatched, duplicate, invalid, failed)",
+    ["outcome"],
+)
+DEPOSITS = Counter(
+    "wallet_deposits_total",
+    "Wallet deposits by event (requested, completed, rejected)",
+    ["event"],
+)
+DEPOSIT_AMOUNT = Counter("wallet_deposit_amount_total", "VND credited to wallets by completed deposits")
+PURCHASES = Counter(
+    "purchases_total",
+    "Workflow purchases by payment method and status (QR orders: PENDING when created, ACTIVE when paid)",
+    ["payment_method", "status"],
+)
+PURCHASE_AMOUNT = Counter("purchase_amount_total", "VND of paid workflow purchases", ["payment_method"])
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits in POOL_CHECKOUT_SECONDS"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+class RuntimeCollector:
+    """Gauges read at scrape time: pool usage and open WebSocket connections per channel"""
+
+    def __init__(self, engine, connections):
+        self.engine = engine
+        self.connections = connections
+
+    def collect(self):
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool):
+            gauge = GaugeMetricFamily("db_pool_connections", "Database pool connections by state", labels=["state"])
+            gauge.add_metric(["checked_out"], pool.checkedout())
+            gauge.add_metric(["idle"], pool.checkedin())
+            gauge.add_metric(["overflow"], max(0, pool.overflow()))
+            yield gauge
+            yield GaugeMetricFamily("db_pool_size", "Configured database pool size", value=pool.size())
+        gauge = GaugeMetricFamily("websocket_connections", "Open WebSocket connections by channel", labels=["channel"])
+        for channel, count in sorted(self.connections.connection_counts().items()):
+            gauge.add_metric([channel], count)
+        yield gauge
+
+
+class HTTPMetricsMiddleware:
+    """Pure ASGI middleware recording request count and latency by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            method = scope["method"]
+            route = route_template(scope)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    # Revenue and traffic figures: never served without a token
+    if not settings.METRICS_TOKEN:
+        return Response(status_code=404)
+    supplied = request.headers.get("authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+        return Response(status_code=401)
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+def setup_metrics(app, engine, connections):
+    """Add the HTTP middleware (call last so it is outermost), the gauges and GET /metrics.
+
+    GET /metrics is only added when METRICS_TOKEN is set.
+    """
+    if not settings.METRICS_ENABLED:
+        return
+    app.add_middleware(HTTPMetricsMiddleware)
+    REGISTRY.register(RuntimeCollector(engine, connections))
+    if not settings.METRICS_TOKEN:
+        logger.warning("METRICS_TOKEN is not set; GET /metrics is disabled")
+        return
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,213 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.core.query_metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Leaf frames in these files mean the thread is waiting, not working:
+# idle threadpool workers, the event loop blocked in select()
+_IDLE_FILES = tuple(
+    os.path.join(os.path.dirname(threading.__file__), name)
+    for name in ("threading.py", "queue.py", "selectors.py")
+)
+
+
+class StackSampler:
+    """Samples the stacks of every thread at a fixed interval from a background thread.
+
+    Stacks are kept in collapsed form ("outer;inner;leaf" -> samples), which
+    flamegraph.pl, speedscope and inferno read directly. Samples of idle
+    threads are dropped. All threads of the process are sampled, so requests
+    served concurrently by the same worker show up too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+            self._labels[code] = label
+        return label
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to the project or to site-packages, which is enough to find the code"""
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    try:
+        relative = os.path.relpath(filename)
+    except ValueError:
+        return filename
+    return filename if relative.startswith("..") else relative
+
+
+async def admin_authorized(headers: Headers) -> bool:
+    """True when the request carries a valid access token of a non-deleted admin"""
+    from app.db.database import SessionLocal
+    from app.services.principal_cache import load_principal
+    from app.services.token_service import TokenError, token_service
+
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user_id = token_service.decode(token).get("sub")
+    except TokenError:
+        return False
+    if not user_id:
+        return False
+
+    def is_admin() -> bool:
+        db = SessionLocal()
+        try:
+            user = load_principal(db, user_id)
+            return bool(user and not user.is_deleted and user.role == "ADMIN")
+        finally:
+            db.close()
+
+    return await run_in_threadpool(is_admin)
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware capturing a statistical profile of selected requests.
+
+    A request is profiled when it sends an X-Profile header and `authorize`
+    accepts it (admins by default), or when it is picked at `sample_rate`.
+    Profiles are written to `directory` as collapsed stacks, one file per
+    request, and the response gets an X-Profile-Id header naming the file.
+    Only one request per process is profiled at a time; others run untouched.
+    Requests that are not selected cost a header lookup and a random() call.
+    """
+
+    def __init__(self, app, directory: str, sample_rate: float = 0.0, interval: float = 0.005,
+                 max_files: int = 200, authorize: Callable[[Headers], Awaitable[bool]] = admin_authorized):
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_files = max_files
+        self.authorize = authorize
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not await self._selected(scope):
+            return await self.app(scope, receive, send)
+        if not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (PROFILE_ID_HEADER, profile_id.encode("latin-1"))]}
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            self._busy.release()
+            elapsed = time.perf_counter() - started
+            await run_in_threadpool(self._save, scope, profile_id, sampler, elapsed)
+
+    async def _selected(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        headers = Headers(scope=scope)
+        return PROFILE_HEADER in headers and await self.authorize(headers)
+
+    def _save(self, scope, profile_id: str, sampler: StackSampler, elapsed: float) -> None:
+        route = route_template(scope)
+        path = os.path.join(self.directory, f"{profile_id}.folded")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "w") as fh:
+                fh.write(sampler.collapsed())
+            self._prune()
+        except OSError:
+            logger.exception("Could not write profile %s", path)
+            return
+        logger.info(
+            "Profiled %s %s (%s) in %.1f ms, %d samples: %s",
+            scope["method"], scope["path"], route, elapsed * 1000, sampler.samples, path,
+        )
+
+    def _prune(self) -> None:
+        """Keep the newest `max_files` profiles (names start with their UTC timestamp)"""
+        profiles = sorted(name for name in os.listdir(self.directory) if name.endswith(".folded"))
+        for name in profiles[:max(0, len(profiles) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def profile_path(directory: str, profile_id: str) -> Optional[str]:
+    """The file of a profile id taken from an X-Profile-Id header, if it exists"""
+    path = os.path.join(directory, f"{os.path.basename(profile_id)}.folded")
+    return path if os.path.isfile(path) else None
+
+
+def setup_profiling(app):
+    if not settings.PROFILING_ENABLED:
+        return
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILING_DIR,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL_SECONDS,
+        max_files=settings.PROFILING_MAX_FILES,
+    )
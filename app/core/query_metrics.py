@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class QueryStats:
+    """SQL statements run while serving one request"""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+class QueryCounter:
+    """Every statement run by any thread while count_queries() is active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+# The request being served; the threadpool copies the context, so sync
+# endpoints and dependencies add to the same QueryStats
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_counters: List[QueryCounter] = []
+_counters_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        started = getattr(context, "_query_started", None)
+        if started is not None:
+            stats.seconds += time.perf_counter() - started
+    if _counters:
+        with _counters_lock:
+            for counter in _counters:
+                counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Collect the statements run inside the block, whichever thread runs them"""
+    counter = QueryCounter()
+    with _counters_lock:
+        _counters.append(counter)
+    try:
+        yield counter
+    finally:
+        with _counters_lock:
+            _counters.remove(counter)
+
+
+def route_template(scope) -> str:
+    """The path template of the route that handled the request, e.g. /api/workflows/{workflow_id}.
+
+    Raw paths contain ids, so metrics are labelled with the template instead.
+    """
+    if "route_template" in scope:
+        return scope["route_template"]
+    template = UNMATCHED_ROUTE
+    app = scope.get("app")
+    endpoint = scope.get("endpoint")
+    if app is not None and endpoint is not None:
+        for route in app.router.routes:
+            if getattr(route, "endpoint", None) is endpoint and route.matches(scope)[0] == Match.FULL:
+                template = route.path
+                break
+    scope["route_template"] = template  # Shared with the other metrics middleware
+    return template
+
+
+class QueryMetricsMiddleware:
+    """Pure ASGI middleware counting the SQL statements and DB time of each request.
+
+    Adds a Server-Timing header (db duration and query count), records the
+    per-route histograms and logs requests running more statements than their
+    budget: `budgets` maps "METHOD /route/template" to a limit, other routes
+    get `default_budget`.
+    """
+
+    def __init__(self, app, default_budget: int, budgets: Optional[Dict[str, int]] = None,
+                 server_timing: bool = True):
+        self.app = app
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"server-timing", timing.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats)
+
+    def _record(self, scope, stats: QueryStats) -> None:
+        method = scope["method"]
+        route = route_template(scope)
+        DB_QUERIES.labels(method, route).observe(stats.count)
+        DB_SECONDS.labels(method, route).observe(stats.seconds)
+        budget = self.budgets.get(f"{method} {route}", self.default_budget)
+        if stats.count > budget:
+            logger.warning(
+                "%s %s ran %d queries (budget %d, %.1f ms in the database)",
+                method, scope["path"], stats.count, budget, stats.seconds * 1000,
+            )
+
+
+def setup_query_metrics(app):
+    if not settings.QUERY_METRICS_ENABLED:
+        return
+    app.add_middleware(
+        QueryMetricsMiddleware,
+        default_budget=settings.QUERY_BUDGET,
+        budgets=settings.QUERY_BUDGETS,
+        server_timing=settings.SERVER_TIMING_HEADER,
+    )
@@ -0,0 +1,218 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ttl_store import redis_client
+
+# Rules: (name, method, path, key, capacity, period_seconds).
+# Each (rule, key) pair gets a token bucket holding up to `capacity` requests
+# that refills at capacity/period per second. "ip" buckets are keyed by the
+# client address, "account" buckets by the "email" field of the JSON body.
+DEFAULT_RULES = [
+    ("login", "POST", "/api/auth/login", "ip", 20, 60),
+    ("login", "POST", "/api/auth/login", "account", 5, 60),
+    ("admin-login", "POST", "/api/admin/login", "ip", 10, 60),
+    ("admin-login", "POST", "/api/admin/login", "account", 5, 60),
+    ("resend-otp", "POST", "/api/auth/resend-otp", "ip", 10, 600),
+    ("resend-otp", "POST", "/api/auth/resend-otp", "account", 3, 600),
+    ("verify-otp", "POST", "/api/auth/verify-reset-otp", "ip", 20, 600),
+    ("verify-otp", "POST", "/api/auth/verify-reset-otp", "account", 5, 600),
+    ("set-password", "POST", "/api/auth/set-new-password", "account", 5, 600),
+    ("admin-broadcast", "POST", "/api/admin/notifications/admins/broadcast", "ip", 5, 60),
+    ("sepay-webhook", "POST", "/api/webhook/sepay", "ip", 300, 60),
+]
+
+MAX_BUFFERED_BODY = 64 * 1024
+
+
+class RateLimitRule(NamedTuple):
+    name: str
+    method: str
+    path: str
+    key: str  # "ip" or "account"
+    capacity: int
+    period_seconds: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period_seconds
+
+
+class InMemoryTokenBuckets:
+    """Per-process buckets; the least recently used ones are dropped beyond max_entries"""
+
+    def __init__(self, max_entries: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """Take one token; returns 0 if allowed, else the seconds until one is available"""
+        with self._lock:
+            now = self._clock()
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+# Refill and take atomically in Redis so every worker shares the bucket
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry)
+"""
+
+
+class RedisTokenBuckets:
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        self._prefix = prefix
+        self._take = redis_client(url).register_script(_TAKE_SCRIPT)
+
+    def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        return float(self._take(keys=[self._prefix + key], args=[capacity, refill_per_second]))
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying token-bucket rules to matching requests.
+
+    Only requests that match a rule are touched; for "account" rules the
+    body is buffered (up to MAX_BUFFERED_BODY) to read the email and then
+    replayed to the endpoint.
+    """
+
+    def __init__(self, app, rules: Iterable[RateLimitRule], buckets, trust_forwarded_for: bool = False):
+        self.app = app
+        self.buckets = buckets
+        self.trust_forwarded_for = trust_forwarded_for
+        self._rules = {}
+        for rule in rules:
+            self._rules.setdefault((rule.method, rule.path.rstrip("/")), []).append(rule)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rules = self._rules.get((scope["method"], scope["path"].rstrip("/")))
+        if not rules:
+            return await self.app(scope, receive, send)
+
+        account = None
+        if any(rule.key == "account" for rule in rules):
+            body, receive = await _buffer_body(receive)
+            account = _account_from_body(body)
+
+        client_ip = self._client_ip(scope)
+        for rule in rules:
+            subject = client_ip if rule.key == "ip" else account
+            if not subject:
+                continue
+            retry_after = self.buckets.take(f"{rule.name}:{rule.key}:{subject}", rule.capacity, rule.refill_per_second)
+            if retry_after > 0:
+                return await _too_many_requests(send, retry_after)
+        return await self.app(scope, receive, send)
+
+    def _client_ip(self, scope) -> Optional[str]:
+        if self.trust_forwarded_for:
+            for name, value in scope.get("headers") or ():
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else None
+
+
+async def _buffer_body(receive):
+    chunks: List[bytes] = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            # Client went away; let the app see the disconnect
+            return b"", _replay([message], receive)
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        more_body = message.get("more_body", False)
+        if size > MAX_BUFFERED_BODY:
+            break
+    body = b"".join(chunks)
+    replay = [{"type": "http.request", "body": body, "more_body": more_body}]
+    return (body if not more_body else b""), _replay(replay, receive)
+
+
+def _replay(messages, receive):
+    pending = list(messages)
+
+    async def replay_receive():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replay_receive
+
+
+def _account_from_body(body: bytes) -> Optional[str]:
+    if not body:
+        return None
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+async def _too_many_requests(send, retry_after: float) -> None:
+    body = json.dumps({"detail": "Too many requests, please try again later"}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_buckets():
+    if settings.STORE_BACKEND == "redis":
+        return RedisTokenBuckets(settings.REDIS_URL)
+    return InMemoryTokenBuckets(settings.TTL_STORE_MAX_ENTRIES)
+
+
+def setup_rate_limiting(app):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=[RateLimitRule(*rule) for rule in DEFAULT_RULES],
+        buckets=create_buckets(),
+        trust_forwarded_for=settings.RATE_LIMIT_TRUST_FORWARDED_FOR,
+    )
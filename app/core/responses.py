@@ -0,0 +1,29 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    # orjson handles str/int/float/bool/None, dict/list, UUID and datetime itself
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """The app's default response class: JSON rendered by orjson.
+
+    Endpoints may also return it directly with rows they shaped themselves
+    (plain dicts of JSON-ready values built from database rows). FastAPI
+    passes a returned Response through untouched, so those rows skip both
+    the response_model validation and jsonable_encoder. The response_model
+    on the route then only documents the shape; keep the two in sync.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from app.core.config import settings
 from app.core.cors import setup_cors
+from app.core.rate_limit import setup_rate_limiting
+from app.core.query_metrics import setup_query_metrics
+from app.core.metrics import setup_metrics
+from app.core.profiling import setup_profiling
+from app.core.responses import FastJSONResponse
+from app.db.database import engine
 from app.api.auth_router import router as auth_router
 from app.api.workflows_router import router as workflows_router
 from app.api.categories_router import router as categories_router
@@ -20,17 +26,36 @@ from app.api.wallet_router import router as wallet_router
 from app.api.websocket_router import router as websocket_router
 from app.api.webhook_router import router as webhook_router
 from app.api.deposit_router import router as deposit_router
+from app.api.health_router import router as health_router
+from app.services.webhook_inbox import webhook_worker
+from app.services.websocket_manager import manager
+from app.services.email_queue import email_worker
+from app.services.outbox import outbox_dispatcher
+from app.services.email_templates import email_templates
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
     description="USITech Backend API",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
+# Opt-in request profiling (innermost, so a profile spans the route handling only)
+setup_profiling(app)
+
+# Count SQL statements per request (inside rate limiting, so it only sees requests reaching the routes)
+setup_query_metrics(app)
+
+# Setup rate limiting (added first so it sits inside CORS and 429s get CORS headers)
+setup_rate_limiting(app)
+
 # Setup CORS
 setup_cors(app)
 
+# Request metrics and GET /metrics (outermost, so every response is counted)
+setup_metrics(app, engine, manager)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(workflows_router)
@@ -51,6 +76,28 @@ app.include_router(admin_wallet_router, tags=["Admin - Wallet"])
 app.include_router(websocket_router, tags=["WebSocket"])
 app.include_router(webhook_router, tags=["Webhook"])
 app.include_router(deposit_router, tags=["Wallet - Deposit Init"])
+app.include_router(health_router, tags=["Health"])
+
+
+@app.on_event("startup")
+async def load_email_templates():
+    # Read and compile the email templates once instead of on the first send
+    email_templates.load()
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    if settings.BACKGROUND_WORKERS_ENABLED:
+        webhook_worker.start()
+        email_worker.start()
+        outbox_dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await webhook_worker.stop()
+    await email_worker.stop()
+    await outbox_dispatcher.stop()
 
 
 @app.get("/")
@@ -64,4 +111,5 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    # Static, kept for existing monitors; load balancers should use /health/ready
     return {"status": "healthy"}
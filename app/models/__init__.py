@@ -11,11 +11,21 @@ from .favorite import Favorite
 from .comment import Comment
 from .notification import Notification
 from .contact import ContactMessage
+from .webhook_inbox import WebhookInbox
+from .ledger import LedgerEntry, LedgerSnapshot
+from .user_session import UserSession
+from .outbound_email import OutboundEmail
+from .outbox_event import OutboxEvent
+from .job import Job
 from .enums import (
     WorkflowStatus,
     TransactionType,
     TransactionStatus,
-    NotificationType
+    NotificationType,
+    InboxStatus,
+    EmailStatus,
+    OutboxStatus,
+    JobStatus
 )
 
 __all__ = [
@@ -32,8 +42,19 @@ __all__ = [
     "Comment",
     "Notification",
     "ContactMessage",
+    "WebhookInbox",
+    "LedgerEntry",
+    "LedgerSnapshot",
+    "UserSession",
+    "OutboundEmail",
+    "OutboxEvent",
+    "Job",
     "WorkflowStatus",
     "TransactionType",
     "TransactionStatus", 
     "NotificationType",
+    "InboxStatus",
+    "EmailStatus",
+    "OutboxStatus",
+    "JobStatus",
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Text, Integer
+from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Text, Integer, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -22,3 +22,8 @@ class Comment(Base):
     user = relationship("User")
     parent_comment = relationship("Comment", remote_side=[id])
     replies = relationship("Comment", back_populates="parent_comment")
+
+    __table_args__ = (
+        # Reviews of a workflow, review/rating counts
+        Index('idx_comments_workflow_id', 'workflow_id'),
+    )
@@ -12,6 +12,7 @@ class PurchaseStatus(str, Enum):
     ACTIVE = "ACTIVE"
     PENDING = "PENDING"
     REJECT = "REJECT"
+    EXPIRED = "EXPIRED"     # hết hạn thanh toán (expiry sweeper)
 
 class PaymentMethod(str, Enum):
     QR = "QR"
@@ -30,3 +31,28 @@ class TransactionStatus(str, Enum):
     PENDING = "PENDING"
     SUCCESS = "SUCCESS"
     FAILED = "FAILED"
+    EXPIRED = "EXPIRED"     # nạp tiền không được chuyển khoản trong thời hạn
+
+class InboxStatus(str, Enum):
+    PENDING = "PENDING"
+    PROCESSING = "PROCESSING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class EmailStatus(str, Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+class OutboxStatus(str, Enum):
+    PENDING = "PENDING"
+    DISPATCHING = "DISPATCHING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class JobStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, UUID, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, DateTime, UUID, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -20,4 +20,6 @@ class Favorite(Base):
     # Unique constraint to prevent duplicates
     __table_args__ = (
         UniqueConstraint('user_id', 'workflow_id', name='uq_user_workflow_favorite'),
+        # Favorite counts per workflow (the unique constraint only serves user_id lookups)
+        Index('idx_favorites_workflow_id', 'workflow_id'),
     )
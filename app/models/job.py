@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, UUID, Text, Integer, JSON, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+
+
+class Job(Base):
+    """Deferred or scheduled unit of work run by the job runner (run_jobs.py)"""
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    name = Column(String(100), nullable=False)  # Registered job name
+    payload = Column(JSON, nullable=False)  # Keyword arguments for the job function
+    dedupe_key = Column(String(200), nullable=True, unique=True)  # e.g. schedule name + slot
+
+    status = Column(String(20), default="PENDING", nullable=False)  # JobStatus enum
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # When a worker claimed the row
+    locked_by = Column(String(100), nullable=True)  # host:pid of that worker
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_jobs_status_run_at', 'status', 'run_at'),
+    )
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, String, DateTime, UUID, Numeric, BigInteger, Index, event
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class LedgerEntry(Base):
+    """One leg of a double-entry journal. Rows are append-only."""
+    __tablename__ = "ledger_entries"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)  # Global posting order
+    journal_id = Column(UUID(as_uuid=True), nullable=False)  # Legs of one posting share it; amounts sum to 0
+    account = Column(String(80), nullable=False)  # "wallet:<wallet_id>" or "system:<name>"
+    amount = Column(Numeric(14, 2), nullable=False)  # Signed change of the account balance
+    entry_type = Column(String(20), nullable=False)  # TransactionType enum
+    wallet_transaction_id = Column(UUID(as_uuid=True), nullable=True)  # Link to wallet_transactions
+    # clock_timestamp() (not now()) so entries of one account are ordered like their ids
+    created_at = Column(DateTime(timezone=True), server_default=func.clock_timestamp(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_ledger_entries_account_id', 'account', 'id'),
+        Index('idx_ledger_entries_journal', 'journal_id'),
+    )
+
+
+class LedgerSnapshot(Base):
+    """Balance of an account as of entry `last_entry_id`. Rows are append-only."""
+    __tablename__ = "ledger_snapshots"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    account = Column(String(80), nullable=False)
+    last_entry_id = Column(BigInteger, nullable=False)  # Last ledger entry included in balance
+    balance = Column(Numeric(14, 2), nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False)  # created_at of last_entry_id
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('idx_ledger_snapshots_account_entry', 'account', 'last_entry_id'),
+        Index('idx_ledger_snapshots_account_as_of', 'account', 'as_of'),
+    )
+
+
+def _reject_mutation(mapper, connection, target):
+    raise ValueError(f"{target.__tablename__} is append-only")
+
+
+for _model in (LedgerEntry, LedgerSnapshot):
+    event.listen(_model, "before_update", _reject_mutation)
+    event.listen(_model, "before_delete", _reject_mutation)
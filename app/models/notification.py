@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, UUID, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, UUID, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -19,3 +19,8 @@ class Notification(Base):
 
     # Relationships
     user = relationship("User", back_populates="notifications")
+
+    __table_args__ = (
+        # A user's notifications newest first, optionally only the unread ones
+        Index('idx_notifications_user_unread_created', 'user_id', 'is_unread', 'created_at'),
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, UUID, Text, Integer, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+
+
+class OutboundEmail(Base):
+    """Mail waiting to be sent (or already sent) by the email queue worker"""
+    __tablename__ = "outbound_emails"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    recipient = Column(String(150), nullable=False)
+    subject = Column(String(255), nullable=False)
+    html_body = Column(Text, nullable=False)
+    text_body = Column(Text, nullable=True)  # Plain-text alternative
+
+    status = Column(String(20), default="PENDING", nullable=False)  # EmailStatus enum
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # When a worker claimed the row
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_outbound_emails_status_next_attempt', 'status', 'next_attempt_at'),
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, UUID, Text, Integer, JSON, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+
+
+class OutboxEvent(Base):
+    """Side effect recorded in the same transaction as the change that caused it"""
+    __tablename__ = "outbox_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    event_type = Column(String(50), nullable=False)  # Dispatcher handler, e.g. "websocket"
+    recipient = Column(String(150), nullable=False)  # e.g. user id for WebSocket messages
+    payload = Column(JSON, nullable=False)
+
+    status = Column(String(20), default="PENDING", nullable=False)  # OutboxStatus enum
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # When a dispatcher claimed the row
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_outbox_events_status_next_attempt', 'status', 'next_attempt_at'),
+    )
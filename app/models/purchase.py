@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Numeric
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Numeric, Index
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from app.models.enums import PurchaseStatus, PaymentMethod
@@ -28,3 +28,11 @@ class Purchase(Base):
     user = relationship("User")
     workflow = relationship("Workflow")
     invoices = relationship("Invoice", back_populates="purchase")
+
+    __table_args__ = (
+        # Expiry sweeper scans only the pending purchases, oldest first
+        Index('idx_purchases_pending_created', 'created_at', postgresql_where=text("status = 'PENDING'")),
+        # "Has this user bought X", a user's purchases, sales per workflow
+        Index('idx_purchases_user_status', 'user_id', 'status'),
+        Index('idx_purchases_workflow_status', 'workflow_id', 'status'),
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+
+
+class UserSession(Base):
+    """A logged-in device. Holds the hash of its current refresh token, which rotates on every refresh."""
+    __tablename__ = "user_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)  # "sid" claim of the tokens
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    refresh_token_hash = Column(String(64), nullable=False, unique=True)  # sha256 hex of the refresh token
+    # The token the last rotation replaced, still accepted for a few seconds
+    # so a client retrying a refresh does not look like token reuse
+    previous_token_hash = Column(String(64), nullable=True)
+    user_agent = Column(String(255), nullable=True)
+    ip_address = Column(String(45), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now())
+    rotated_at = Column(DateTime(timezone=True), nullable=True)  # When previous_token_hash was replaced
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('idx_user_sessions_user_id', 'user_id'),
+    )
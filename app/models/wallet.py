@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Numeric, Text, Index
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, DateTime, UUID, ForeignKey, Numeric, Text, Index, Integer
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from app.models.enums import TransactionType, TransactionStatus
@@ -15,6 +15,8 @@ class Wallet(Base):
     balance = Column(Numeric(14, 2), default=0.0, nullable=False)  # Số dư token hiện tại
     total_deposited = Column(Numeric(14, 2), default=0.0, nullable=False)  # Tổng đã nạp
     total_spent = Column(Numeric(14, 2), default=0.0, nullable=False)  # Tổng đã tiêu
+    # Ledger entries posted since the last snapshot (maintained by wallet_ledger)
+    ledger_entries_since_snapshot = Column(Integer, default=0, server_default="0", nullable=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -51,4 +53,9 @@ class WalletTransaction(Base):
     # Indexes
     __table_args__ = (
         Index('idx_wallet_transactions_wallet_created', 'wallet_id', 'created_at'),
+        # Sepay webhook looks transfer codes up case-insensitively
+        Index('uq_wallet_transactions_transfer_code', func.upper(transfer_code), unique=True),
+        # Expiry sweeper scans only the pending deposits, oldest first
+        Index('idx_wallet_transactions_pending_deposits', 'created_at',
+              postgresql_where=text("status = 'PENDING' AND transaction_type = 'DEPOSIT'")),
     )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, UUID, Text, Integer, JSON, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+
+
+class WebhookInbox(Base):
+    __tablename__ = "webhook_inbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    provider = Column(String(30), nullable=False)  # e.g. "sepay"
+    provider_tx_id = Column(String(100), nullable=False)  # Idempotency key from the provider
+    payload = Column(JSON, nullable=False)  # Raw webhook body
+
+    status = Column(String(20), default="PENDING", nullable=False)  # InboxStatus enum
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # When a worker claimed the row
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('provider', 'provider_tx_id', name='uq_webhook_inbox_provider_tx'),
+        Index('idx_webhook_inbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, UUID, Text, Numeric, Integer, BigInteger, JSON, ARRAY
+from sqlalchemy import Column, String, Boolean, DateTime, UUID, Text, Numeric, Integer, BigInteger, JSON, ARRAY, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -32,3 +32,8 @@ class Workflow(Base):
     favorites = relationship("Favorite", cascade="all, delete-orphan")
     # Comments / reviews
     comments = relationship("Comment", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Featured workflows: active ones by downloads, then rating
+        Index('idx_workflows_status_popularity', status, downloads_count.desc(), rating_avg.desc()),
+    )
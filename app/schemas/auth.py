@@ -107,6 +107,17 @@ class TokenResponse(BaseModel):
         }
 
 
+class SessionResponse(BaseModel):
+    """Active session (logged-in device) schema"""
+    id: str
+    user_agent: Optional[str] = None
+    ip_address: Optional[str] = None
+    created_at: Optional[datetime] = None
+    last_used_at: Optional[datetime] = None
+    expires_at: datetime
+    current: bool = False
+
+
 # Import from other schema files to avoid duplication
 from .user import UserResponse
 from .admin import MessageResponse
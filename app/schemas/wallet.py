@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -24,6 +24,15 @@ class WalletTransactionResponse(BaseModel):
     note: Optional[str]
     created_at: datetime
 
+class WalletTransactionTypeSummary(BaseModel):
+    count: int
+    total_amount: float
+
+class WalletTransactionPageResponse(BaseModel):
+    items: List[WalletTransactionResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next (older) page
+    summary: Optional[Dict[str, WalletTransactionTypeSummary]] = None  # Per transaction_type, first page only
+
 class DepositRequest(BaseModel):
     bank_name: str = Field(..., min_length=1, description="Bank name is required")
     bank_account: str = Field(..., min_length=1, description="Bank account is required")
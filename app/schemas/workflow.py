@@ -24,6 +24,32 @@ class WorkflowResponse(BaseModel):
     is_like: Optional[bool] = None
     is_buy: Optional[bool] = None
 
+class WorkflowListingResponse(BaseModel):
+    """A row of a workflow listing (/, /feature, /my-workflow, /search).
+
+    Rows only carry the WorkflowResponse fields asked for with `?fields=`,
+    plus id. Without it they have every field except flow, description and
+    features.
+    """
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    status: Optional[str] = None
+    features: Optional[List[str]] = None
+    downloads_count: Optional[int] = None
+    wishlist_count: Optional[int] = None
+    time_to_setup: Optional[int] = None
+    video_demo: Optional[str] = None
+    flow: Optional[Dict[str, Any]] = None
+    rating_avg: Optional[float] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    categories: Optional[List[str]] = None
+    image_urls: Optional[List[str]] = None
+    is_like: Optional[bool] = None
+    is_buy: Optional[bool] = None
+
 class WorkflowDetailResponse(BaseModel):
     id: str
     title: str
@@ -0,0 +1,69 @@
+import abc
+import asyncio
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PollingWorker(abc.ABC):
+    """Pool of asyncio tasks that repeatedly call run_once().
+
+    Subclasses implement run_once(), returning how many items it handled;
+    when it handles nothing the task sleeps for poll_interval seconds or
+    until wake() is called.
+    """
+
+    name = "worker"
+
+    def __init__(self, concurrency: int = 1, poll_interval: float = 2.0):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    @abc.abstractmethod
+    async def run_once(self) -> int:
+        """Handle one batch of work and return how many items it contained"""
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._loop(i), name=f"{self.name}-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info("Started %s with %d task(s)", self.name, self.concurrency)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped %s", self.name)
+
+    def wake(self) -> None:
+        """Signal idle tasks that new work is available"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _loop(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                handled = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("%s-%d iteration failed", self.name, index)
+                handled = 0
+            if handled:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
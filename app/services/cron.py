@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import FrozenSet, List, Tuple
+
+# (name, min, max) of the five cron fields
+FIELDS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),  # 0 and 7 are both Sunday
+)
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+}
+
+# Give up looking for a match after this many days (e.g. "0 0 30 2 *" never fires)
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in {part!r}")
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start_text, end_text = base.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(base)
+            end = high if step_text else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"Value out of range in {part!r} (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday), minute resolution.
+
+    Supports *, lists, ranges, steps and the @hourly/@daily/... aliases.
+    Weekdays are 0-6 from Sunday (7 is also Sunday). As in cron, when both
+    day and weekday are restricted a time matches if either one does.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        try:
+            parsed = [_parse_field(text, low, high) for text, (_, low, high) in zip(fields, FIELDS)]
+        except ValueError as exc:
+            raise ValueError(f"Invalid cron expression {expression!r}: {exc}") from None
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(value % 7 for value in weekdays)
+        self._sorted_minutes: List[int] = sorted(self.minutes)
+        self._sorted_hours: List[int] = sorted(self.hours)
+        self._day_restricted = not fields[2].startswith("*")
+        self._weekday_restricted = not fields[4].startswith("*")
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def matches(self, moment: datetime) -> bool:
+        return moment.minute in self.minutes and moment.hour in self.hours and self._day_matches(moment)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment` (keeps its tzinfo)"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for offset in range(MAX_SEARCH_DAYS):
+            if offset:
+                day = day + timedelta(days=1)
+            if not self._day_matches(day):
+                continue
+            same_day = offset == 0
+            for hour in self._sorted_hours:
+                if same_day and hour < start.hour:
+                    continue
+                for minute in self._sorted_minutes:
+                    if same_day and hour == start.hour and minute < start.minute:
+                        continue
+                    return day.replace(hour=hour, minute=minute)
+        raise ValueError(f"{self.expression!r} has no run time in the next {MAX_SEARCH_DAYS} days")
@@ -0,0 +1,232 @@
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.wallet import WalletTransaction
+from app.models.enums import TransactionType, TransactionStatus
+
+# Bank transfer descriptions are free text ("MBVCB.123.NAP ABCD1234.CT tu ...").
+# Transfer codes are alphanumeric, so every alphanumeric run is a candidate.
+_TOKEN_RE = re.compile(r"[A-Z0-9]+")
+MAX_CODE_LENGTH = 50  # WalletTransaction.transfer_code is String(50)
+MAX_TOKENS = 64
+_PENDING_KEY = "pending_codes_invalidated"
+
+
+def normalize_transfer_code(code: str) -> str:
+    """Transfer codes are matched case-insensitively (see uq_wallet_transactions_transfer_code)"""
+    return code.strip().upper()
+
+
+def extract_transfer_codes(content: str) -> List[str]:
+    """Split bank content into unique, upper-cased candidate transfer codes (in order of appearance)"""
+    seen: Dict[str, None] = {}
+    for token in _TOKEN_RE.findall(content.upper()):
+        if len(token) <= MAX_CODE_LENGTH and token not in seen:
+            seen[token] = None
+            if len(seen) >= MAX_TOKENS:
+                break
+    return list(seen)
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds any of the patterns in a text in O(len(text))"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[str]] = [None]  # pattern ending exactly at this state
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            state = nxt
+        self._out[state] = pattern
+
+    def _build(self) -> None:
+        # Breadth-first so every fail target is computed before it is needed
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+
+    def find_all(self, text: str) -> List[str]:
+        """Return every distinct pattern occurring in text"""
+        found: Dict[str, None] = {}
+        state = 0
+        for ch in text:
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            probe = state
+            while probe:
+                if self._out[probe] is not None:
+                    found[self._out[probe]] = None
+                probe = self._fail[probe]
+        return list(found)
+
+    def longest_match(self, text: str) -> Optional[str]:
+        matches = self.find_all(text)
+        return max(matches, key=len) if matches else None
+
+
+class DepositMatch(NamedTuple):
+    id: UUID
+    transfer_code: str
+
+
+class PendingCode(NamedTuple):
+    id: UUID
+    created_at: datetime
+
+
+class PendingCodeCache:
+    """Per-process Aho-Corasick automata over the codes of recent PENDING deposits, one per amount.
+
+    Built on the first fallback lookup for an amount and reused until a
+    deposit of that amount is created, settled or expired in this process,
+    or `ttl_seconds` pass (which bounds how long other workers' changes go
+    unseen). A stale code is harmless: settling is a conditional UPDATE on
+    PENDING, so an already settled or expired deposit is never credited.
+    Codes that pass the pending TTL while cached are skipped by
+    find_pending_deposit, as the database lookups skip them.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Decimal, Tuple[float, Dict[str, PendingCode], AhoCorasick]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a build that raced with a change is not cached
+        self.generation = 0
+
+    def matcher(self, db: Session, amount: Decimal) -> Tuple[Dict[str, PendingCode], AhoCorasick]:
+        with self._lock:
+            entry = self._entries.get(amount)
+            generation = self.generation
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1], entry[2]
+
+        pending = _pending_deposits(db, amount).with_entities(
+            WalletTransaction.id, WalletTransaction.transfer_code, WalletTransaction.created_at
+        ).filter(WalletTransaction.transfer_code.isnot(None)).all()
+        codes = {normalize_transfer_code(code): PendingCode(tx_id, created_at) for tx_id, code, created_at in pending}
+        automaton = AhoCorasick(codes)
+        with self._lock:
+            if generation == self.generation:
+                self._entries[amount] = (time.monotonic() + self.ttl_seconds, codes, automaton)
+        return codes, automaton
+
+    def invalidate(self, amount: Optional[Decimal] = None) -> None:
+        """Drop the automaton of `amount`, or all of them"""
+        with self._lock:
+            self.generation += 1
+            if amount is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Decimal(str(amount)), None)
+
+
+pending_codes = PendingCodeCache(ttl_seconds=settings.DEPOSIT_MATCHER_CACHE_SECONDS)
+
+
+def _pending_cutoff() -> datetime:
+    # Older deposits are expired by the sweeper; they can no longer be paid
+    return datetime.now(timezone.utc) - timedelta(minutes=settings.DEPOSIT_PENDING_TTL_MINUTES)
+
+
+def _pending_deposits(db: Session, amount: Decimal):
+    return db.query(WalletTransaction).filter(
+        WalletTransaction.transaction_type == TransactionType.DEPOSIT,
+        WalletTransaction.status == TransactionStatus.PENDING,
+        WalletTransaction.amount == amount,
+        WalletTransaction.created_at >= _pending_cutoff(),
+    )
+
+
+def find_pending_deposit(db: Session, content: str, amount: float) -> Optional[DepositMatch]:
+    """Find the PENDING deposit whose transfer code appears in the bank content.
+
+    Fast path: tokenize the content and look the tokens up through the unique
+    index on upper(transfer_code). Fallback for noisy content where the code is
+    glued to other characters: run the cached Aho-Corasick automaton over the
+    codes of the recent pending deposits with the same amount.
+    """
+    amount = Decimal(str(amount))
+    tokens = extract_transfer_codes(content)
+    if tokens:
+        matched = _pending_deposits(db, amount).with_entities(
+            WalletTransaction.id, WalletTransaction.transfer_code
+        ).filter(func.upper(WalletTransaction.transfer_code).in_(tokens)).first()
+        if matched:
+            return DepositMatch(matched.id, matched.transfer_code)
+
+    codes, automaton = pending_codes.matcher(db, amount)
+    cutoff = _pending_cutoff()
+    # The automaton may be older than the pending TTL of some of its codes
+    matches = [code for code in automaton.find_all(content.upper()) if codes[code].created_at >= cutoff]
+    if not matches:
+        return None
+    code = max(matches, key=len)
+    return DepositMatch(codes[code].id, code)
+
+
+def forget_pending_code(db: Session, amount) -> None:
+    """Invalidate the cached automaton for `amount` now and again after `db` commits.
+
+    Call it after changing deposits with Core UPDATEs; ORM inserts and
+    updates of deposits are picked up by the listeners below.
+    """
+    pending_codes.invalidate(amount)
+    db.info.setdefault(_PENDING_KEY, set()).add(Decimal(str(amount)))
+
+
+# Invalidate at flush time, and again after commit so a lookup that rebuilt
+# the automaton in between (without the uncommitted change) is not kept.
+
+@event.listens_for(WalletTransaction, "after_insert")
+@event.listens_for(WalletTransaction, "after_update")
+def _forget_deposit(mapper, connection, target: WalletTransaction) -> None:
+    if target.transaction_type != TransactionType.DEPOSIT or target.amount is None:
+        return
+    session = object_session(target)
+    if session is not None:
+        forget_pending_code(session, target.amount)
+    else:
+        pending_codes.invalidate(target.amount)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for amount in session.info.pop(_PENDING_KEY, ()):
+        pending_codes.invalidate(amount)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
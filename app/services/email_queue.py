@@ -0,0 +1,300 @@
+import logging
+import queue
+import smtplib
+import ssl
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.enums import EmailStatus
+from app.models.outbound_email import OutboundEmail
+from app.services.background import PollingWorker
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(
+    db: Session, recipient: str, subject: str, html_body: str, text_body: Optional[str] = None
+) -> OutboundEmail:
+    """Queue a message for the email worker (caller commits, then calls email_worker.wake())"""
+    email = OutboundEmail(
+        recipient=recipient,
+        subject=subject,
+        html_body=html_body,
+        text_body=text_body,
+        status=EmailStatus.PENDING,
+        attempts=0,
+    )
+    db.add(email)
+    db.flush()
+    return email
+
+
+class SMTPConnectionPool:
+    """Keeps up to `size` authenticated SMTP connections open between batches.
+
+    A connection idle for longer than idle_timeout is checked with NOOP
+    before reuse. Connections that fail with a connection-level error are
+    closed instead of being returned to the pool.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_ssl: bool = False,
+        starttls: bool = True,
+        size: int = 2,
+        idle_timeout: float = 60,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(max(1, size)):
+            self._slots.put(None)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        return smtp
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                smtp, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - idle_since < self.idle_timeout:
+                return smtp
+            try:
+                if smtp.noop()[0] == 250:
+                    return smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            _close(smtp)
+
+    @contextmanager
+    def connection(self):
+        self._slots.get()
+        smtp = None
+        try:
+            smtp = self._checkout()
+            yield smtp
+        except Exception:
+            # The connection may be mid-transaction; never hand it out again
+            if smtp is not None:
+                _close(smtp)
+                smtp = None
+            raise
+        finally:
+            if smtp is not None:
+                self._idle.put((smtp, time.monotonic()))
+            self._slots.put(None)
+
+    def close(self) -> None:
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close(smtp)
+
+
+def _close(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+def build_message(email: OutboundEmail, sender: str, sender_name: Optional[str] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = email.subject
+    message["From"] = formataddr((sender_name, sender)) if sender_name else sender
+    message["To"] = email.recipient
+    message["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or None)
+    message.set_content(email.text_body or "")
+    message.add_alternative(email.html_body, subtype="html")
+    return message
+
+
+def _is_permanent(exc: smtplib.SMTPException) -> bool:
+    """A 5xx reply (every recipient refused with one, for RCPT) won't succeed on a retry"""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def _fail(email: OutboundEmail, error: str) -> None:
+    email.status = EmailStatus.FAILED
+    email.last_error = error[:2000]
+    email.locked_at = None
+
+
+def _retry_later(email: OutboundEmail, error: str, now: datetime) -> None:
+    email.last_error = error[:2000]
+    email.locked_at = None
+    if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        email.status = EmailStatus.FAILED
+        logger.error("Giving up on email %s to %s after %d attempts", email.id, email.recipient, email.attempts)
+    else:
+        email.status = EmailStatus.PENDING
+        email.next_attempt_at = now + timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * (2 ** (email.attempts - 1)))
+
+
+def deliver(emails: Iterable[OutboundEmail], pool: SMTPConnectionPool) -> int:
+    """Send the emails over one pooled connection and update their status; returns how many were sent.
+
+    A message that cannot be built, or that the server rejects with a 5xx
+    reply, is marked FAILED; one rejected with a 4xx reply is retried later
+    on its own. If the connection breaks, or sending fails in any other way,
+    every message not yet sent is retried later.
+    """
+    pending: List[OutboundEmail] = list(emails)
+    sent = 0
+    now = datetime.now(timezone.utc)
+    try:
+        with pool.connection() as smtp:
+            while pending:
+                email = pending[0]
+                try:
+                    message = build_message(email, settings.MAIL_FROM, settings.MAIL_FROM_NAME)
+                except Exception as exc:
+                    # Building is deterministic: a retry would fail the same way
+                    logger.exception("Could not build email %s to %s", email.id, email.recipient)
+                    _fail(email, f"{type(exc).__name__}: {exc}")
+                    pending.pop(0)
+                    continue
+                try:
+                    smtp.send_message(message)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as exc:
+                    if _is_permanent(exc):
+                        logger.error("SMTP server refused email %s to %s: %s", email.id, email.recipient, exc)
+                        _fail(email, str(exc))
+                    else:
+                        logger.warning("SMTP server deferred email %s to %s: %s", email.id, email.recipient, exc)
+                        _retry_later(email, str(exc), now)
+                else:
+                    email.status = EmailStatus.SENT
+                    email.sent_at = datetime.now(timezone.utc)
+                    email.locked_at = None
+                    email.last_error = None
+                    sent += 1
+                pending.pop(0)
+    except (smtplib.SMTPException, OSError) as exc:
+        logger.warning("SMTP connection failed, %d email(s) will be retried: %s", len(pending), exc)
+        for email in pending:
+            _retry_later(email, str(exc), now)
+    except Exception as exc:
+        # Anything else must not leave the rows in SENDING until the lock times out
+        logger.exception("Sending failed, %d email(s) will be retried", len(pending))
+        for email in pending:
+            _retry_later(email, f"{type(exc).__name__}: {exc}", now)
+    return sent
+
+
+def claim_batch(limit: int) -> List[UUID]:
+    """Lock up to `limit` due emails for this worker (stale SENDING rows are claimed again)"""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.EMAIL_LOCK_TIMEOUT_SECONDS)
+    db = SessionLocal()
+    try:
+        due = (
+            select(OutboundEmail.id)
+            .where(or_(
+                (OutboundEmail.status == EmailStatus.PENDING) & (OutboundEmail.next_attempt_at <= now),
+                (OutboundEmail.status == EmailStatus.SENDING) & (OutboundEmail.locked_at < stale),
+            ))
+            .order_by(OutboundEmail.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(OutboundEmail)
+            .where(OutboundEmail.id.in_(due.scalar_subquery()))
+            .values(status=EmailStatus.SENDING, locked_at=now, attempts=OutboundEmail.attempts + 1)
+            .returning(OutboundEmail.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = [row.id for row in db.execute(stmt)]
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def send_batch(ids: List[UUID], pool: SMTPConnectionPool) -> int:
+    db = SessionLocal()
+    try:
+        emails = db.query(OutboundEmail).filter(
+            OutboundEmail.id.in_(ids), OutboundEmail.status == EmailStatus.SENDING
+        ).all()
+        sent = deliver(emails, pool)
+        db.commit()
+        return sent
+    finally:
+        db.close()
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.MAIL_SERVER,
+    port=settings.MAIL_PORT,
+    username=settings.MAIL_USERNAME,
+    password=settings.MAIL_PASSWORD,
+    use_ssl=settings.MAIL_SSL,
+    starttls=settings.MAIL_TLS,
+    size=settings.EMAIL_WORKERS,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+)
+
+
+class EmailQueueWorker(PollingWorker):
+    """Sends queued emails in batches over pooled SMTP connections"""
+
+    name = "email-queue"
+
+    def __init__(self, pool: SMTPConnectionPool):
+        super().__init__(
+            concurrency=settings.EMAIL_WORKERS,
+            poll_interval=settings.EMAIL_POLL_INTERVAL_SECONDS,
+        )
+        self.pool = pool
+
+    async def run_once(self) -> int:
+        ids = await run_in_threadpool(claim_batch, settings.EMAIL_BATCH_SIZE)
+        if ids:
+            await run_in_threadpool(send_batch, ids, self.pool)
+        return len(ids)
+
+    async def stop(self) -> None:
+        await super().stop()
+        self.pool.close()
+
+
+email_worker = EmailQueueWorker(smtp_pool)
@@ -0,0 +1,135 @@
+import json
+import logging
+from html import escape
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+class EmailTemplate:
+    """Subject, HTML and plain-text parts of one email in one language"""
+
+    def __init__(self, subject: Template, html: Template, text: Template):
+        self.subject = subject
+        self.html = html
+        self.text = text
+
+    def bind(self, **static) -> "EmailTemplate":
+        """Pre-render the static placeholders; the result only substitutes per-message values"""
+        html_static = {key: escape(str(value)) for key, value in static.items()}
+        return EmailTemplate(
+            Template(self.subject.safe_substitute(static)),
+            Template(self.html.safe_substitute(html_static)),
+            Template(self.text.safe_substitute(static)),
+        )
+
+    def render(self, **values) -> RenderedEmail:
+        """Render with per-message values; they are HTML-escaped in the HTML part"""
+        return RenderedEmail(
+            self.subject.substitute(values),
+            self.html.substitute({key: escape(str(value)) for key, value in values.items()}),
+            self.text.substitute(values),
+        )
+
+
+class EmailTemplateRegistry:
+    """Email templates loaded from <directory>/<language>/.
+
+    Each language folder holds <name>.html and <name>.txt plus a
+    strings.json with the subject, the localized static strings of each
+    template and optional named variants. Files are read and compiled
+    once by load(); templates bound to their static strings are cached
+    per (name, language, variant), so sending renders only the dynamic
+    values.
+    """
+
+    def __init__(self, directory: Path, default_language: str = "en", static: Optional[Dict[str, str]] = None):
+        self.directory = Path(directory)
+        self.default_language = default_language
+        self.static = dict(static or {})
+        self._bound: Dict[Tuple[str, str, Optional[str]], EmailTemplate] = {}
+        self._languages: Tuple[str, ...] = ()
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        if not self._languages:
+            self.load()
+        return self._languages
+
+    def load(self) -> None:
+        bound = {}
+        for folder in sorted(p for p in self.directory.iterdir() if p.is_dir()):
+            strings = json.loads((folder / "strings.json").read_text(encoding="utf-8"))
+            for html_file in folder.glob("*.html"):
+                name = html_file.stem
+                entry = dict(strings.get(name, {}))
+                variants = entry.pop("variants", None) or {None: {}}
+                template = EmailTemplate(
+                    Template(entry.pop("subject", "")),
+                    Template(html_file.read_text(encoding="utf-8")),
+                    Template((folder / f"{name}.txt").read_text(encoding="utf-8")),
+                )
+                for variant, values in variants.items():
+                    bound[(name, folder.name, variant)] = template.bind(**{**self.static, **entry, **values})
+        if self.default_language not in {language for _, language, _ in bound}:
+            raise ValueError(f"No email templates for default language {self.default_language!r}")
+        self._bound = bound
+        self._languages = tuple(sorted({language for _, language, _ in bound}))
+        logger.info("Loaded %d email templates for languages %s", len(bound), ", ".join(self._languages))
+
+    def get(self, name: str, language: Optional[str] = None, variant: Optional[str] = None) -> EmailTemplate:
+        """Template for `language`, falling back to the default language"""
+        if not self._bound:
+            self.load()
+        for lang in (language, self.default_language):
+            template = self._bound.get((name, lang, variant))
+            if template is not None:
+                return template
+        raise KeyError(f"No email template {name!r} (variant {variant!r})")
+
+    def render(
+        self, name: str, language: Optional[str] = None, variant: Optional[str] = None, /, **values
+    ) -> RenderedEmail:
+        # Positional-only, so templates can use $name/$language placeholders
+        return self.get(name, language, variant).render(**values)
+
+    def negotiate(self, accept_language: Optional[str], preferred: Iterable[str] = ()) -> str:
+        """Pick a supported language from explicit preferences, then an Accept-Language header"""
+        candidates = list(preferred)
+        if accept_language:
+            weighted = []
+            for index, part in enumerate(accept_language.split(",")):
+                tag, _, params = part.strip().partition(";")
+                quality = 1.0
+                if params.strip().startswith("q="):
+                    try:
+                        quality = float(params.strip()[2:])
+                    except ValueError:
+                        quality = 0.0
+                if tag and quality > 0:
+                    weighted.append((-quality, index, tag))
+            candidates.extend(tag for _, _, tag in sorted(weighted))
+        for candidate in candidates:
+            language = (candidate or "").strip().lower().split("-")[0]
+            if language in self.languages:
+                return language
+        return self.default_language
+
+
+email_templates = EmailTemplateRegistry(
+    TEMPLATE_DIR,
+    default_language=settings.EMAIL_DEFAULT_LANGUAGE,
+    static={"brand": settings.MAIL_FROM_NAME},
+)
@@ -0,0 +1,291 @@
+import importlib
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.enums import JobStatus
+from app.models.job import Job
+from app.services.cron import CronSchedule
+
+logger = logging.getLogger(__name__)
+
+# Modules that register jobs and schedules; imported by every worker process
+JOB_MODULES = ("app.services.scheduled_jobs",)
+
+LOG_FORMAT = "%(asctime)s %(processName)s %(levelname)s %(name)s: %(message)s"
+
+
+class JobSpec(NamedTuple):
+    func: Callable[..., Any]  # func(db, **payload); the runner commits afterwards (see run_job)
+    max_attempts: int
+    retry_base_seconds: int
+
+
+class Schedule(NamedTuple):
+    name: str
+    cron: CronSchedule
+    job_name: str
+    payload: Dict[str, Any]
+
+
+_jobs: Dict[str, JobSpec] = {}
+_schedules: Dict[str, Schedule] = {}
+
+
+def job(name: str, max_attempts: Optional[int] = None, retry_base_seconds: Optional[int] = None):
+    """Decorator registering func(db, **payload) as the job `name`"""
+    def decorator(func):
+        _jobs[name] = JobSpec(
+            func,
+            max_attempts or settings.JOB_MAX_ATTEMPTS,
+            retry_base_seconds or settings.JOB_RETRY_BASE_SECONDS,
+        )
+        return func
+    return decorator
+
+
+def schedule(name: str, cron: str, job_name: str, payload: Optional[Dict[str, Any]] = None) -> None:
+    """Enqueue `job_name` at every time matching the cron expression (UTC)"""
+    _schedules[name] = Schedule(name, CronSchedule(cron), job_name, payload or {})
+
+
+def registered_jobs() -> Dict[str, JobSpec]:
+    return dict(_jobs)
+
+
+def registered_schedules() -> Dict[str, Schedule]:
+    return dict(_schedules)
+
+
+def load_jobs() -> None:
+    for module in JOB_MODULES:
+        importlib.import_module(module)
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[datetime] = None,
+    dedupe_key: Optional[str] = None,
+) -> bool:
+    """Add a job in the caller's transaction (caller commits).
+
+    Returns False if a job with the same dedupe_key already exists.
+    """
+    if name not in _jobs:
+        raise ValueError(f"Unknown job {name!r}")
+    values = dict(name=name, payload=payload or {}, dedupe_key=dedupe_key, status=JobStatus.PENDING, attempts=0)
+    if run_at is not None:
+        values["run_at"] = run_at
+    stmt = pg_insert(Job).values(**values).on_conflict_do_nothing(index_elements=["dedupe_key"]).returning(Job.id)
+    return db.execute(stmt).first() is not None
+
+
+class ClaimedJob(NamedTuple):
+    id: Any
+    name: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+def claim_batch(limit: int, worker_id: str) -> List[ClaimedJob]:
+    """Lock up to `limit` due jobs for this worker.
+
+    Jobs stuck in RUNNING longer than JOB_LOCK_TIMEOUT_SECONDS (worker died
+    mid-job) are claimed again.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    db = SessionLocal()
+    try:
+        due = (
+            select(Job.id)
+            .where(or_(
+                (Job.status == JobStatus.PENDING) & (Job.run_at <= now),
+                (Job.status == JobStatus.RUNNING) & (Job.locked_at < stale),
+            ))
+            .order_by(Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(due.scalar_subquery()))
+            .values(status=JobStatus.RUNNING, locked_at=now, locked_by=worker_id, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.name, Job.payload, Job.attempts)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = [ClaimedJob(row.id, row.name, row.payload, row.attempts) for row in db.execute(stmt)]
+        db.commit()
+        return jobs
+    finally:
+        db.close()
+
+
+def run_job(claimed: ClaimedJob) -> bool:
+    """Run one claimed job; its writes and the DONE mark commit together.
+
+    A job working through many rows may commit batches itself (the expiry
+    sweepers do): those stay committed if a later batch fails, so such a job
+    must be safe to run again from where it stopped.
+    """
+    spec = _jobs.get(claimed.name)
+    db = SessionLocal()
+    try:
+        try:
+            if spec is None:
+                raise LookupError(f"Unknown job {claimed.name!r}")
+            spec.func(db, **claimed.payload)
+            db.execute(
+                update(Job)
+                .where(Job.id == claimed.id)
+                .values(status=JobStatus.DONE, finished_at=datetime.now(timezone.utc), locked_at=None, last_error=None)
+            )
+            db.commit()
+            return True
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Job %s (%s) failed", claimed.id, claimed.name)
+            _schedule_retry(db, claimed, spec, str(exc))
+            return False
+    finally:
+        db.close()
+
+
+def _schedule_retry(db: Session, claimed: ClaimedJob, spec: Optional[JobSpec], error: str) -> None:
+    now = datetime.now(timezone.utc)
+    values: Dict[str, Any] = {"last_error": error[:2000], "locked_at": None}
+    if spec is None or claimed.attempts >= spec.max_attempts:
+        values.update(status=JobStatus.FAILED, finished_at=now)
+        logger.error("Giving up on job %s (%s) after %d attempts", claimed.id, claimed.name, claimed.attempts)
+    else:
+        delay = spec.retry_base_seconds * (2 ** (claimed.attempts - 1))
+        values.update(status=JobStatus.PENDING, run_at=now + timedelta(seconds=delay))
+    db.execute(update(Job).where(Job.id == claimed.id).values(**values))
+    db.commit()
+
+
+def run_due_jobs(worker_id: str, limit: Optional[int] = None) -> int:
+    """Claim and run one batch; returns how many jobs were claimed"""
+    claimed = claim_batch(limit or settings.JOB_BATCH_SIZE, worker_id)
+    for item in claimed:
+        run_job(item)
+    return len(claimed)
+
+
+class Scheduler:
+    """Enqueues scheduled jobs when their cron time comes.
+
+    Each run is enqueued with dedupe key "<schedule>@<time>", so several
+    schedulers (one per run_jobs.py instance) enqueue it only once.
+    """
+
+    def __init__(self, schedules: Dict[str, Schedule], now: Optional[datetime] = None):
+        self.schedules = schedules
+        now = now or datetime.now(timezone.utc)
+        self._next_run = {name: item.cron.next_after(now) for name, item in schedules.items()}
+
+    def next_wakeup(self) -> Optional[datetime]:
+        return min(self._next_run.values(), default=None)
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Enqueue every schedule that is due; returns how many jobs were added"""
+        now = now or datetime.now(timezone.utc)
+        due = [(name, slot) for name, slot in self._next_run.items() if slot <= now]
+        if not due:
+            return 0
+        added = 0
+        db = SessionLocal()
+        try:
+            for name, slot in due:
+                item = self.schedules[name]
+                if enqueue(db, item.job_name, item.payload, run_at=slot, dedupe_key=f"{name}@{slot.isoformat()}"):
+                    added += 1
+                # Skip slots missed while the scheduler was down
+                self._next_run[name] = item.cron.next_after(max(slot, now - timedelta(minutes=1)))
+            db.commit()
+        finally:
+            db.close()
+        return added
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_main(stop, poll_interval: float) -> None:
+    # The parent coordinates shutdown; don't die halfway through a job on Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)  # Spawned processes start unconfigured
+    load_jobs()
+    me = worker_id()
+    logger.info("Job worker %s started", me)
+    while not stop.is_set():
+        try:
+            handled = run_due_jobs(me)
+        except Exception:
+            logger.exception("Job worker %s iteration failed", me)
+            handled = 0
+        if not handled:
+            stop.wait(poll_interval)
+    logger.info("Job worker %s stopped", me)
+
+
+def run_forever(processes: Optional[int] = None, with_scheduler: bool = True) -> None:
+    """Run worker processes (and the scheduler in this process) until SIGINT/SIGTERM"""
+    load_jobs()
+    processes = processes or settings.JOB_WORKER_PROCESSES
+    poll_interval = settings.JOB_POLL_INTERVAL_SECONDS
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    stopping = []
+
+    def request_stop(signum, frame):
+        # Only flag it here: setting the Event could deadlock against the loop's own wait
+        logger.info("Stopping job runner")
+        stopping.append(signum)
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    def spawn(index: int):
+        process = context.Process(target=_worker_main, args=(stop, poll_interval), name=f"job-worker-{index}")
+        process.start()
+        return process
+
+    workers = [spawn(i) for i in range(processes)]
+    scheduler = Scheduler(registered_schedules()) if with_scheduler else None
+    try:
+        while not stopping:
+            if scheduler is not None:
+                try:
+                    scheduler.tick()
+                except Exception:
+                    logger.exception("Scheduler tick failed")
+            for index, process in enumerate(workers):
+                if not process.is_alive() and not stopping:
+                    logger.warning("Job worker %s exited with %s; restarting", process.name, process.exitcode)
+                    workers[index] = spawn(index)
+            wait = poll_interval
+            if scheduler is not None and scheduler.next_wakeup() is not None:
+                until_next = (scheduler.next_wakeup() - datetime.now(timezone.utc)).total_seconds()
+                wait = max(0.1, min(wait, until_next))
+            time.sleep(wait)
+    finally:
+        stop.set()
+        for process in workers:
+            process.join(timeout=settings.JOB_LOCK_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.terminate()
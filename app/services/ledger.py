@@ -0,0 +1,105 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.ledger import LedgerEntry, LedgerSnapshot
+from app.models.wallet import Wallet
+
+# Counter accounts for wallet movements
+BANK_ACCOUNT = "system:bank"  # Money received through deposits
+SALES_ACCOUNT = "system:sales"  # Money spent on workflows
+OPENING_ACCOUNT = "system:opening"  # Balances that existed before the ledger
+
+
+def wallet_account(wallet_id: UUID) -> str:
+    return f"wallet:{wallet_id}"
+
+
+def post_journal(
+    db: Session,
+    legs: Iterable[Tuple[str, Decimal]],
+    entry_type: str,
+    wallet_transaction_id: Optional[UUID] = None,
+) -> UUID:
+    """Append one balanced journal (the leg amounts must sum to zero)"""
+    legs = [(account, Decimal(str(amount))) for account, amount in legs]
+    if sum(amount for _, amount in legs) != 0:
+        raise ValueError("Journal legs must sum to zero")
+    journal_id = uuid.uuid4()
+    db.add_all([
+        LedgerEntry(
+            journal_id=journal_id,
+            account=account,
+            amount=amount,
+            entry_type=entry_type,
+            wallet_transaction_id=wallet_transaction_id,
+        )
+        for account, amount in legs
+    ])
+    db.flush()
+    return journal_id
+
+
+def snapshot(db: Session, account: str) -> Optional[LedgerSnapshot]:
+    """Snapshot the account's balance as of its latest entry; None if nothing was posted since the last one.
+
+    Only call this for wallet accounts: postings to a wallet are serialized by
+    the row lock taken by the balance UPDATE, so no uncommitted entry with a
+    lower id can be missed. System accounts receive concurrent postings.
+    wallet_ledger decides when, from Wallet.ledger_entries_since_snapshot, so
+    postings do not have to aggregate the account to find out.
+    """
+    last = _latest_snapshot(db, account)
+    after_id = last.last_entry_id if last else 0
+    total, last_id = db.query(
+        func.coalesce(func.sum(LedgerEntry.amount), 0), func.max(LedgerEntry.id)
+    ).filter(LedgerEntry.account == account, LedgerEntry.id > after_id).one()
+    if last_id is None:
+        return None
+    as_of = db.query(LedgerEntry.created_at).filter(LedgerEntry.id == last_id).scalar()
+    snapshot = LedgerSnapshot(
+        account=account,
+        last_entry_id=last_id,
+        balance=(last.balance if last else Decimal("0")) + total,
+        as_of=as_of,
+    )
+    db.add(snapshot)
+    db.flush()
+    return snapshot
+
+
+def _latest_snapshot(db: Session, account: str, at: Optional[datetime] = None) -> Optional[LedgerSnapshot]:
+    query = db.query(LedgerSnapshot).filter(LedgerSnapshot.account == account)
+    if at is not None:
+        query = query.filter(LedgerSnapshot.as_of <= at)
+    return query.order_by(LedgerSnapshot.last_entry_id.desc()).first()
+
+
+def balance_at(db: Session, account: str, at: Optional[datetime] = None) -> Decimal:
+    """Balance of an account at `at` (or now): nearest snapshot plus the entries after it"""
+    snapshot = _latest_snapshot(db, account, at)
+    query = db.query(func.coalesce(func.sum(LedgerEntry.amount), 0)).filter(LedgerEntry.account == account)
+    if snapshot:
+        query = query.filter(LedgerEntry.id > snapshot.last_entry_id)
+    if at is not None:
+        query = query.filter(LedgerEntry.created_at <= at)
+    return (snapshot.balance if snapshot else Decimal("0")) + query.scalar()
+
+
+def audit_wallet(db: Session, wallet: Wallet, at: Optional[datetime] = None) -> Dict:
+    """Compare the ledger balance with the mutable Wallet.balance column"""
+    ledger_balance = balance_at(db, wallet_account(wallet.id), at)
+    result = {
+        "wallet_id": str(wallet.id),
+        "as_of": at.isoformat() if at else None,
+        "ledger_balance": float(ledger_balance),
+    }
+    if at is None:
+        result["wallet_balance"] = float(wallet.balance)
+        result["consistent"] = ledger_balance == wallet.balance
+    return result
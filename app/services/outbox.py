@@ -0,0 +1,182 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Tuple
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.enums import OutboxStatus
+from app.models.outbox_event import OutboxEvent
+from app.services.background import PollingWorker
+from app.services.websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET = "websocket"
+
+Handler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+_handlers: Dict[str, Handler] = {}
+
+
+def register_handler(event_type: str):
+    """Decorator registering the coroutine that delivers one event type: handler(recipient, payload)"""
+    def decorator(func: Handler) -> Handler:
+        _handlers[event_type] = func
+        return func
+    return decorator
+
+
+@register_handler(WEBSOCKET)
+async def _send_websocket(recipient: str, payload: Dict[str, Any]) -> None:
+    """Push to the recipient's connections in this process.
+
+    A recipient with no connection here (offline, or connected to another
+    worker process) is the common case, not an error: the event is dropped,
+    and clients reload their state when they connect. Raises only when a
+    connection failed mid-send, so the event is retried; the retry may
+    repeat the message on connections that got it.
+    """
+    result = await manager.send_personal_message(payload, recipient)
+    if result.failed:
+        raise ConnectionError(f"Sent to {result.sent} of {result.sent + result.failed} connection(s)")
+    if not result.sent:
+        logger.debug("Dropped outbox message for %s: no open WebSocket connection", recipient)
+
+
+def add_event(db: Session, event_type: str, recipient: str, payload: Dict[str, Any]) -> OutboxEvent:
+    """Record an event in the caller's transaction (caller commits, then calls outbox_dispatcher.wake())"""
+    if event_type not in _handlers:
+        raise ValueError(f"No outbox handler for {event_type!r}")
+    event = OutboxEvent(
+        event_type=event_type,
+        recipient=recipient,
+        payload=payload,
+        status=OutboxStatus.PENDING,
+        attempts=0,
+    )
+    db.add(event)
+    return event
+
+
+def add_websocket_message(db: Session, user_id: Any, message: Dict[str, Any]) -> OutboxEvent:
+    return add_event(db, WEBSOCKET, str(user_id), message)
+
+
+class ClaimedEvent(NamedTuple):
+    id: UUID
+    event_type: str
+    recipient: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+def claim_batch(limit: int) -> List[ClaimedEvent]:
+    """Lock up to `limit` due events, oldest first, and return them in one round trip.
+
+    Events stuck in DISPATCHING longer than OUTBOX_LOCK_TIMEOUT_SECONDS
+    (dispatcher crashed mid-batch) are claimed again.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.OUTBOX_LOCK_TIMEOUT_SECONDS)
+    db = SessionLocal()
+    try:
+        due = (
+            select(OutboxEvent.id)
+            .where(or_(
+                (OutboxEvent.status == OutboxStatus.PENDING) & (OutboxEvent.next_attempt_at <= now),
+                (OutboxEvent.status == OutboxStatus.DISPATCHING) & (OutboxEvent.locked_at < stale),
+            ))
+            .order_by(OutboxEvent.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(due.scalar_subquery()))
+            .values(status=OutboxStatus.DISPATCHING, locked_at=now, attempts=OutboxEvent.attempts + 1)
+            .returning(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.recipient, OutboxEvent.payload,
+                       OutboxEvent.attempts, OutboxEvent.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        rows = sorted(db.execute(stmt), key=lambda row: row.created_at)
+        db.commit()
+        return [ClaimedEvent(row.id, row.event_type, row.recipient, row.payload, row.attempts) for row in rows]
+    finally:
+        db.close()
+
+
+def finish_batch(done: List[UUID], failed: List[Tuple[ClaimedEvent, str]]) -> None:
+    """Mark delivered events DONE in one statement and schedule retries for the rest"""
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        if done:
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(done))
+                .values(status=OutboxStatus.DONE, dispatched_at=now, locked_at=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            )
+        for event, error in failed:
+            values = {"last_error": error[:2000], "locked_at": None}
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                values["status"] = OutboxStatus.FAILED
+                logger.error("Giving up on outbox event %s after %d attempts", event.id, event.attempts)
+            else:
+                values["status"] = OutboxStatus.PENDING
+                values["next_attempt_at"] = now + timedelta(
+                    seconds=settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** (event.attempts - 1))
+                )
+            db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == event.id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def dispatch(events: List[ClaimedEvent]) -> Tuple[List[UUID], List[Tuple[ClaimedEvent, str]]]:
+    """Deliver events in order; returns (delivered ids, (event, error) failures)"""
+    done: List[UUID] = []
+    failed: List[Tuple[ClaimedEvent, str]] = []
+    for event in events:
+        handler = _handlers.get(event.event_type)
+        try:
+            if handler is None:
+                raise LookupError(f"No outbox handler for {event.event_type!r}")
+            await handler(event.recipient, event.payload)
+        except Exception as exc:
+            logger.warning("Outbox event %s (%s) failed: %s", event.id, event.event_type, exc)
+            failed.append((event, str(exc)))
+        else:
+            done.append(event.id)
+    return done, failed
+
+
+class OutboxDispatcher(PollingWorker):
+    """Delivers outbox events in batches, at least once"""
+
+    name = "outbox"
+
+    def __init__(self):
+        super().__init__(
+            concurrency=settings.OUTBOX_WORKERS,
+            poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        )
+
+    async def run_once(self) -> int:
+        events = await run_in_threadpool(claim_batch, settings.OUTBOX_BATCH_SIZE)
+        if events:
+            done, failed = await dispatch(events)
+            await run_in_threadpool(finish_batch, done, failed)
+        return len(events)
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,68 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import bcrypt
+
+from app.core.config import settings
+
+# bcrypt is deliberately slow (~250 ms at cost 12) and would block the event
+# loop if called from an async handler. It releases the GIL, so it runs in its
+# own small pool: a burst of logins queues here instead of occupying the
+# threads that sync endpoints and run_in_threadpool share.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hasher",
+)
+
+_COST_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+def hash_password_sync(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def verify_password_sync(password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # Malformed hash stored for the user
+        return False
+
+
+def hash_cost(hashed_password: str) -> Optional[int]:
+    match = _COST_RE.match(hashed_password or "")
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a different cost than BCRYPT_ROUNDS"""
+    return hash_cost(hashed_password) != settings.BCRYPT_ROUNDS
+
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(hash_password_sync, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run(verify_password_sync, password, hashed_password)
+
+
+async def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the cost changed.
+
+    The caller stores the new hash (if any) so existing users move to the
+    current BCRYPT_ROUNDS as they log in.
+    """
+    if not await verify_password(password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, await hash_password(password)
+    return True, None
@@ -0,0 +1,145 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.enums import NotificationType, PurchaseStatus, TransactionStatus, TransactionType
+from app.models.notification import Notification
+from app.models.purchase import Purchase
+from app.models.wallet import Wallet, WalletTransaction
+from app.services.deposit_matcher import forget_pending_code
+from app.services.outbox import add_websocket_message
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiredDeposit(NamedTuple):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    amount: float
+    transfer_code: str
+
+
+class ExpiredPurchase(NamedTuple):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    workflow_id: uuid.UUID
+    amount: float
+
+
+def expire_deposits(db: Session, ttl_minutes: int, limit: int) -> List[ExpiredDeposit]:
+    """Mark up to `limit` PENDING deposits older than the TTL as EXPIRED (caller commits).
+
+    The candidates come from the partial index on pending deposits and are
+    locked with SKIP LOCKED, so a deposit being settled by the webhook or an
+    admin right now is left alone; the outer status check keeps a deposit
+    settled in the meantime from being expired.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=ttl_minutes)
+    stale = (
+        select(WalletTransaction.id)
+        .where(
+            WalletTransaction.status == TransactionStatus.PENDING,
+            WalletTransaction.transaction_type == TransactionType.DEPOSIT,
+            WalletTransaction.created_at < cutoff,
+        )
+        .order_by(WalletTransaction.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(WalletTransaction)
+        .where(
+            WalletTransaction.id.in_(stale.scalar_subquery()),
+            WalletTransaction.status == TransactionStatus.PENDING,
+        )
+        .values(
+            status=TransactionStatus.EXPIRED,
+            note=func.concat(func.coalesce(WalletTransaction.note, ""), " - Expired: not paid in time"),
+        )
+        .returning(WalletTransaction.id, WalletTransaction.wallet_id, WalletTransaction.amount,
+                   WalletTransaction.transfer_code)
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return []
+    for amount in {row.amount for row in rows}:
+        forget_pending_code(db, amount)
+    owners = dict(db.query(Wallet.id, Wallet.user_id).filter(Wallet.id.in_({row.wallet_id for row in rows})).all())
+    return [ExpiredDeposit(row.id, owners[row.wallet_id], float(row.amount), row.transfer_code) for row in rows]
+
+
+def expire_purchases(db: Session, ttl_minutes: int, limit: int) -> List[ExpiredPurchase]:
+    """Mark up to `limit` PENDING purchases older than the TTL as EXPIRED (caller commits)"""
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=ttl_minutes)
+    stale = (
+        select(Purchase.id)
+        .where(Purchase.status == PurchaseStatus.PENDING, Purchase.created_at < cutoff)
+        .order_by(Purchase.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(Purchase)
+        .where(Purchase.id.in_(stale.scalar_subquery()), Purchase.status == PurchaseStatus.PENDING)
+        .values(status=PurchaseStatus.EXPIRED)
+        .returning(Purchase.id, Purchase.user_id, Purchase.workflow_id, Purchase.amount)
+        .execution_options(synchronize_session=False)
+    )
+    return [ExpiredPurchase(row.id, row.user_id, row.workflow_id, float(row.amount)) for row in db.execute(stmt)]
+
+
+def notify_expired_deposits(db: Session, expired: List[ExpiredDeposit]) -> None:
+    """Notification + WebSocket event per expired deposit, in the sweeper's transaction"""
+    for deposit in expired:
+        notification = Notification(
+            id=uuid.uuid4(),
+            user_id=deposit.user_id,
+            title="Deposit request expired",
+            message=f"Your deposit request of {deposit.amount:,.0f} VNĐ (code {deposit.transfer_code}) "
+                    f"expired because no transfer was received",
+            type=NotificationType.WARNING,
+            is_unread=True,
+        )
+        db.add(notification)
+        add_websocket_message(db, deposit.user_id, {
+            "type": "wallet_status_update",
+            "event": "deposit_expired",
+            "transaction": {
+                "id": str(deposit.id),
+                "status": TransactionStatus.EXPIRED,
+                "amount": deposit.amount,
+                "transfer_code": deposit.transfer_code,
+            },
+            "notification": {"id": str(notification.id), "title": notification.title, "message": notification.message},
+            "message": "Deposit request has expired",
+        })
+
+
+def notify_expired_purchases(db: Session, expired: List[ExpiredPurchase]) -> None:
+    for purchase in expired:
+        notification = Notification(
+            id=uuid.uuid4(),
+            user_id=purchase.user_id,
+            title="Order expired",
+            message=f"Your order of {purchase.amount:,.0f} VNĐ expired because payment was not received",
+            type=NotificationType.WARNING,
+            is_unread=True,
+        )
+        db.add(notification)
+        add_websocket_message(db, purchase.user_id, {
+            "type": "order_status_update",
+            "event": "order_expired",
+            "order": {
+                "id": str(purchase.id),
+                "workflow_id": str(purchase.workflow_id),
+                "status": PurchaseStatus.EXPIRED,
+                "amount": purchase.amount,
+            },
+            "notification": {"id": str(notification.id), "title": notification.title, "message": notification.message},
+            "message": "Order has expired",
+        })
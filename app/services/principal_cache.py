@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.user import User
+
+_PENDING_KEY = "principal_cache_invalidated"
+_ALL = "*"  # Pending marker: a bulk statement changed users we cannot name
+
+
+class PrincipalCache:
+    """Per-process TTL cache of authenticated users, keyed by user id.
+
+    Holds detached User instances that are never handed out directly:
+    load_principal() merges a copy into the caller's session. Entries are
+    dropped whenever a User row is updated or deleted through the ORM (see the
+    listeners below), and cleared by bulk UPDATE/DELETE statements on users;
+    other processes notice the change within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load that raced with an update
+        # does not put the stale row back (see put()).
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, user_id: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user: User, generation: int) -> None:
+        """Cache `user` unless something was invalidated since `generation` was read"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            key = str(user.id)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
+
+
+def load_principal(db: Session, user_id: str) -> Optional[User]:
+    """Return the user attached to `db`, from the cache when possible.
+
+    Callers still check is_deleted themselves, as they did with the query.
+    """
+    if not principal_cache.enabled:
+        return db.query(User).filter(User.id == user_id).first()
+
+    user = principal_cache.get(str(user_id))
+    if user is None:
+        generation = principal_cache.generation
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        db.expunge(user)
+        principal_cache.put(user, generation)
+    # load=False copies the cached state into the session without a SELECT
+    return db.merge(user, load=False)
+
+
+# Invalidation: ban/unban, role changes and profile updates all go through
+# the ORM. Drop the entry at flush time, and again after commit so a request
+# that re-read the old row in between cannot keep it cached.
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    principal_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+# query(User).update(...) and session.execute(update(User)) skip the mapper
+# events above, and may match any number of rows: clear the whole cache.
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is User:
+        principal_cache.clear()
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, ())
+    if _ALL in pending:
+        principal_cache.clear()
+        return
+    for user_id in pending:
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
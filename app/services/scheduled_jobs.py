@@ -0,0 +1,165 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.comment import Comment
+from app.models.enums import EmailStatus, InboxStatus, JobStatus, OutboxStatus
+from app.models.job import Job
+from app.models.outbound_email import OutboundEmail
+from app.models.outbox_event import OutboxEvent
+from app.models.user_session import UserSession
+from app.models.webhook_inbox import WebhookInbox
+from app.models.workflow import Workflow
+from app.services.job_runner import enqueue, job, schedule
+from app.services import pending_expiry
+
+logger = logging.getLogger(__name__)
+
+# Jobs and schedules run by run_jobs.py (see job_runner.py); schedules are in UTC
+RECOMPUTE_WORKFLOW_RATING = "recompute_workflow_rating"
+
+
+def _rating_avg(workflow_id):
+    return (
+        select(func.avg(Comment.rating))
+        .where(Comment.workflow_id == workflow_id, Comment.rating.isnot(None))
+        .scalar_subquery()
+    )
+
+
+@job(RECOMPUTE_WORKFLOW_RATING)
+def recompute_workflow_rating(db: Session, workflow_id: str) -> None:
+    db.execute(update(Workflow).where(Workflow.id == workflow_id).values(rating_avg=_rating_avg(workflow_id)))
+
+
+def enqueue_rating_recompute(db: Session, workflow_id: Any) -> None:
+    """Recompute a workflow's rating_avg off the request path (caller commits)"""
+    enqueue(db, RECOMPUTE_WORKFLOW_RATING, {"workflow_id": str(workflow_id)})
+
+
+@job("reconcile_workflow_ratings", max_attempts=2)
+def reconcile_workflow_ratings(db: Session) -> None:
+    """Fix any rating_avg that drifted from the reviews (e.g. a lost recompute job)"""
+    average = _rating_avg(Workflow.id)
+    result = db.execute(
+        update(Workflow)
+        .where(Workflow.rating_avg.is_distinct_from(func.round(average, 2)))
+        .values(rating_avg=average)
+        .execution_options(synchronize_session=False)
+    )
+    logger.info("Reconciled rating_avg of %d workflow(s)", result.rowcount)
+
+
+@job("purge_finished_jobs", max_attempts=2)
+def purge_finished_jobs(db: Session) -> None:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.JOB_RETENTION_DAYS)
+    result = db.execute(
+        delete(Job)
+        .where(Job.status.in_([JobStatus.DONE, JobStatus.FAILED]), Job.finished_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    logger.info("Purged %d finished job(s)", result.rowcount)
+
+
+def _retention_cutoff(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def _purge(db: Session, model, *conditions) -> int:
+    """Delete the rows matching `conditions`, PURGE_BATCH_SIZE per commit.
+
+    Small batches keep each DELETE short on a table that has grown large;
+    a failure keeps the batches already deleted.
+    """
+    total = 0
+    while True:
+        batch = select(model.id).where(*conditions).limit(settings.PURGE_BATCH_SIZE).scalar_subquery()
+        deleted = db.execute(
+            delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        total += deleted
+        if deleted < settings.PURGE_BATCH_SIZE:
+            return total
+
+
+@job("purge_outbox_events", max_attempts=2)
+def purge_outbox_events(db: Session) -> None:
+    cutoff = _retention_cutoff(settings.OUTBOX_RETENTION_DAYS)
+    total = _purge(db, OutboxEvent,
+                   OutboxEvent.status.in_([OutboxStatus.DONE, OutboxStatus.FAILED]), OutboxEvent.created_at < cutoff)
+    logger.info("Purged %d outbox event(s)", total)
+
+
+@job("purge_webhook_inbox", max_attempts=2)
+def purge_webhook_inbox(db: Session) -> None:
+    cutoff = _retention_cutoff(settings.WEBHOOK_RETENTION_DAYS)
+    total = _purge(db, WebhookInbox,
+                   WebhookInbox.status.in_([InboxStatus.DONE, InboxStatus.FAILED]), WebhookInbox.created_at < cutoff)
+    logger.info("Purged %d webhook inbox row(s)", total)
+
+
+@job("purge_outbound_emails", max_attempts=2)
+def purge_outbound_emails(db: Session) -> None:
+    cutoff = _retention_cutoff(settings.EMAIL_RETENTION_DAYS)
+    total = _purge(db, OutboundEmail,
+                   OutboundEmail.status.in_([EmailStatus.SENT, EmailStatus.FAILED]), OutboundEmail.created_at < cutoff)
+    logger.info("Purged %d outbound email(s)", total)
+
+
+@job("purge_ended_sessions", max_attempts=2)
+def purge_ended_sessions(db: Session) -> None:
+    """Delete sessions revoked or expired more than SESSION_RETENTION_DAYS ago"""
+    cutoff = _retention_cutoff(settings.SESSION_RETENTION_DAYS)
+    total = _purge(db, UserSession, or_(UserSession.revoked_at < cutoff, UserSession.expires_at < cutoff))
+    logger.info("Purged %d ended session(s)", total)
+
+
+@job("expire_pending_deposits", max_attempts=2)
+def expire_pending_deposits(db: Session) -> None:
+    """Expire stale PENDING deposits batch by batch.
+
+    Each batch commits itself, with its notifications, instead of leaving one
+    commit to the runner: a large backlog does not hold its row locks for the
+    whole sweep, and a failure keeps the batches already done. A retry only
+    sees the deposits still PENDING, so nothing is expired or notified twice.
+    """
+    total = 0
+    while True:
+        expired = pending_expiry.expire_deposits(db, settings.DEPOSIT_PENDING_TTL_MINUTES, settings.EXPIRY_SWEEP_BATCH_SIZE)
+        pending_expiry.notify_expired_deposits(db, expired)
+        db.commit()
+        total += len(expired)
+        if len(expired) < settings.EXPIRY_SWEEP_BATCH_SIZE:
+            break
+    if total:
+        logger.info("Expired %d pending deposit(s)", total)
+
+
+@job("expire_pending_purchases", max_attempts=2)
+def expire_pending_purchases(db: Session) -> None:
+    """Expire stale PENDING purchases; commits per batch like expire_pending_deposits"""
+    total = 0
+    while True:
+        expired = pending_expiry.expire_purchases(db, settings.PURCHASE_PENDING_TTL_MINUTES, settings.EXPIRY_SWEEP_BATCH_SIZE)
+        pending_expiry.notify_expired_purchases(db, expired)
+        db.commit()
+        total += len(expired)
+        if len(expired) < settings.EXPIRY_SWEEP_BATCH_SIZE:
+            break
+    if total:
+        logger.info("Expired %d pending purchase(s)", total)
+
+
+schedule("expire-pending-deposits", "*/5 * * * *", "expire_pending_deposits")
+schedule("expire-pending-purchases", "*/5 * * * *", "expire_pending_purchases")
+schedule("reconcile-workflow-ratings", "30 3 * * *", "reconcile_workflow_ratings")
+schedule("purge-finished-jobs", "0 4 * * *", "purge_finished_jobs")
+schedule("purge-outbox-events", "10 4 * * *", "purge_outbox_events")
+schedule("purge-webhook-inbox", "20 4 * * *", "purge_webhook_inbox")
+schedule("purge-outbound-emails", "30 4 * * *", "purge_outbound_emails")
+schedule("purge-ended-sessions", "40 4 * * *", "purge_ended_sessions")
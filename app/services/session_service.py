@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user_session import UserSession
+from app.services.token_service import REFRESH, token_service
+
+logger = logging.getLogger(__name__)
+
+_REVOKED_KEY = "revoked_session_ids"
+
+
+class SessionError(Exception):
+    """Raised when a refresh token does not belong to an active session"""
+
+
+class IssuedTokens(NamedTuple):
+    user_id: UUID
+    session_id: UUID
+    access_token: str
+    refresh_token: str
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _session_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def _issue(
+    user_id, session_id, issued_at: Optional[datetime] = None, replaces: Optional[str] = None
+) -> IssuedTokens:
+    """A token pair for the session.
+
+    The refresh token issued by a rotation is derived from the rotation time
+    and the hash of the token it `replaces`, so a retry of that rotation gets
+    the very same refresh token back.
+    """
+    claims = {"sid": str(session_id)}
+    return IssuedTokens(
+        user_id=user_id,
+        session_id=session_id,
+        access_token=token_service.create_access_token(str(user_id), claims=claims),
+        refresh_token=token_service.create_refresh_token(
+            str(user_id), claims=claims,
+            issued_at=int(issued_at.timestamp()) if issued_at else None,
+            jti=replaces[:32] if replaces else None,
+        ),
+    )
+
+
+def create_session(
+    db: Session, user_id: UUID, user_agent: Optional[str] = None, ip_address: Optional[str] = None
+) -> IssuedTokens:
+    """Start a session for a login; returns its first token pair (caller commits)"""
+    tokens = _issue(user_id, uuid.uuid4())
+    db.add(UserSession(
+        id=tokens.session_id,
+        user_id=user_id,
+        refresh_token_hash=hash_token(tokens.refresh_token),
+        user_agent=(user_agent or "")[:255] or None,
+        ip_address=ip_address,
+        expires_at=_session_expiry(),
+    ))
+    db.flush()
+    return tokens
+
+
+def rotate(db: Session, refresh_token: str) -> IssuedTokens:
+    """Exchange a refresh token for a new pair (caller commits).
+
+    The session row is found through the unique index on refresh_token_hash
+    and moved to the new hash in the same UPDATE, so two requests presenting
+    the same token cannot both succeed. The token a rotation replaced is still
+    accepted for REFRESH_TOKEN_REUSE_GRACE_SECONDS (concurrent tabs, a retry
+    after a lost response) and gets the same new refresh token again, so
+    whichever response the client keeps last, its refresh token is valid.
+    Any other validly signed token for the session has been used before: it
+    was stolen or replayed, so the whole session is revoked.
+    Raises TokenError for a bad token and SessionError for an unusable session;
+    commit after a SessionError too, so a revocation is kept.
+    """
+    payload = token_service.decode(refresh_token, REFRESH)
+    session_id = payload.get("sid")
+    if session_id is None:
+        raise SessionError("Refresh token is not bound to a session")
+
+    presented = hash_token(refresh_token)
+    now = datetime.now(timezone.utc)
+    tokens = _issue(UUID(payload["sub"]), UUID(session_id), issued_at=now, replaces=presented)
+    active = (UserSession.revoked_at.is_(None), UserSession.expires_at > now)
+    rotated = db.execute(
+        update(UserSession)
+        .where(UserSession.refresh_token_hash == presented, *active)
+        .values(
+            refresh_token_hash=hash_token(tokens.refresh_token),
+            previous_token_hash=presented,
+            rotated_at=now,
+            last_used_at=now,
+            expires_at=_session_expiry(),
+        )
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if rotated is not None:
+        return tokens
+
+    # A retry within the grace window: hand out the refresh token of that
+    # rotation again, leaving the session's hashes as they are
+    grace = now - timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+    retried = db.execute(
+        update(UserSession)
+        .where(
+            UserSession.id == UUID(session_id),
+            UserSession.previous_token_hash == presented,
+            UserSession.rotated_at > grace,
+            *active,
+        )
+        .values(last_used_at=now)
+        .returning(UserSession.rotated_at, UserSession.refresh_token_hash)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if retried is not None:
+        tokens = _issue(UUID(payload["sub"]), UUID(session_id), issued_at=retried.rotated_at, replaces=presented)
+        # Only differs if the signing key changed since the rotation
+        if hash_token(tokens.refresh_token) == retried.refresh_token_hash:
+            return tokens
+        raise SessionError("Session was refreshed with another signing key")
+
+    if revoke_session(db, session_id):
+        logger.warning("Refresh token reuse detected; revoked session %s", session_id)
+    raise SessionError("Session is no longer active")
+
+
+def revoke_session(db: Session, session_id, user_id: Optional[UUID] = None) -> bool:
+    """Revoke one session (only if it belongs to user_id, when given); caller commits"""
+    stmt = update(UserSession).where(UserSession.id == session_id, UserSession.revoked_at.is_(None))
+    if user_id is not None:
+        stmt = stmt.where(UserSession.user_id == user_id)
+    revoked = db.execute(
+        stmt.values(revoked_at=datetime.now(timezone.utc))
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    _revoke_access_tokens(db, revoked)
+    return bool(revoked)
+
+
+def revoke_all_sessions(db: Session, user_id: UUID) -> int:
+    """Revoke every active session of the user ("log out all devices"); caller commits"""
+    revoked = db.execute(
+        update(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    _revoke_access_tokens(db, revoked)
+    return len(revoked)
+
+
+def list_sessions(db: Session, user_id: UUID) -> List[UserSession]:
+    return (
+        db.query(UserSession)
+        .filter(
+            UserSession.user_id == user_id,
+            UserSession.revoked_at.is_(None),
+            UserSession.expires_at > datetime.now(timezone.utc),
+        )
+        .order_by(UserSession.last_used_at.desc())
+        .all()
+    )
+
+
+# Access tokens carry the sid of their session. Once a revocation commits, the
+# sid goes to the token service's revocation store for one access token
+# lifetime, so tokens already handed out stop working too. Not before the
+# commit: a rolled back revocation must not log the session out.
+
+def _revoke_access_tokens(db: Session, session_ids: Iterable[UUID]) -> None:
+    db.info.setdefault(_REVOKED_KEY, set()).update(str(session_id) for session_id in session_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_revocations(session: Session) -> None:
+    for session_id in session.info.pop(_REVOKED_KEY, ()):
+        token_service.revoke_session(session_id, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_revocations(session: Session, previous_transaction) -> None:
+    session.info.pop(_REVOKED_KEY, None)
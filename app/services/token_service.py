@@ -0,0 +1,220 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+from app.core.config import settings
+from app.services.ttl_store import TTLStore, create_store
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, badly signed, or of the wrong type/audience"""
+
+
+class ExpiredTokenError(TokenError):
+    """Raised when a token's exp is in the past"""
+
+
+class RevokedTokenError(TokenError):
+    """Raised when a token's jti or session has been revoked (logout)"""
+
+
+class TokenService:
+    """The single place JWTs are signed and verified.
+
+    Keys are prepared once at startup and looked up by the `kid` header, so
+    keys can be rotated: add the new key to JWT_KEYS, switch JWT_ACTIVE_KID,
+    and drop the old key once its tokens have expired. Tokens without a kid
+    (issued before rotation existed) are verified with `legacy_key` only if
+    they were issued before `legacy_issued_before` and expire within the
+    refresh token lifetime of it, so a leaked legacy key cannot mint new
+    long-lived tokens; without a cutoff no legacy token is accepted.
+
+    A client sends the same access token on every request, so the claims of
+    recently verified tokens are kept in a small LRU; a hit skips the header
+    parse and HMAC and only re-checks expiry, audience and type.
+
+    Revoked jtis are kept in a TTLStore until the token would have expired
+    anyway, and so are revoked session ids (the `sid` claim), so logging a
+    session out also rejects the access tokens it already handed out. Every
+    decode checks both with a key lookup each.
+    """
+
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        active_kid: str,
+        algorithm: str,
+        audience: str,
+        legacy_key: Optional[str] = None,
+        legacy_issued_before: Optional[datetime] = None,
+        cache_size: int = 0,
+        revocations: Optional[TTLStore] = None,
+    ):
+        if active_kid not in keys:
+            raise ValueError(f"Active JWT key id {active_kid!r} is not configured")
+        self._algorithm = get_default_algorithms()[algorithm]
+        self._algorithm_name = algorithm
+        self._keys = {kid: self._algorithm.prepare_key(secret) for kid, secret in keys.items()}
+        self._legacy_key = None
+        if legacy_key and legacy_issued_before is not None:
+            self._legacy_key = self._algorithm.prepare_key(legacy_key)
+            self._legacy_issued_before = legacy_issued_before.timestamp()
+        self._active_kid = active_kid
+        self._audience = audience
+        self._headers = {"kid": active_kid}
+        self._jws = jwt.PyJWS(algorithms=[algorithm])
+        self._jwt = jwt.PyJWT()
+        self._cache_size = cache_size
+        self._verified: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._revocations = revocations
+
+    def _issue(
+        self, subject: str, token_type: str, lifetime: timedelta, claims: Optional[Dict[str, Any]],
+        issued_at: Optional[int] = None, jti: Optional[str] = None,
+    ) -> str:
+        now = int(time.time()) if issued_at is None else issued_at
+        payload = dict(claims or {})
+        payload.update({
+            "sub": subject,
+            "type": token_type,
+            "aud": self._audience,
+            "iat": now,
+            "exp": now + int(lifetime.total_seconds()),
+            "jti": jti or uuid.uuid4().hex,
+        })
+        return self._jwt.encode(
+            payload, self._keys[self._active_kid], algorithm=self._algorithm_name, headers=self._headers
+        )
+
+    def create_access_token(
+        self, subject: str, expires_delta: Optional[timedelta] = None, claims: Optional[Dict[str, Any]] = None
+    ) -> str:
+        lifetime = expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        return self._issue(subject, ACCESS, lifetime, claims)
+
+    def create_refresh_token(
+        self, subject: str, expires_delta: Optional[timedelta] = None, claims: Optional[Dict[str, Any]] = None,
+        issued_at: Optional[int] = None, jti: Optional[str] = None,
+    ) -> str:
+        """Given the same issued_at and jti (and signing key) the same token is returned again"""
+        lifetime = expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        return self._issue(subject, REFRESH, lifetime, claims, issued_at, jti)
+
+    def decode(self, token: str, expected_type: str = ACCESS) -> Dict[str, Any]:
+        """Verify signature, expiry, audience and type; return the claims"""
+        payload = self._cached(token)
+        if payload is None:
+            payload = self._verify(token)
+            self._remember(token, payload)
+        elif payload["exp"] <= time.time():
+            raise ExpiredTokenError("Token has expired")
+
+        # Also checked by _verify, but not on a cache hit; legacy tokens may have no aud
+        audience = payload.get("aud")
+        if audience is not None:
+            audiences = [audience] if isinstance(audience, str) else audience
+            if self._audience not in audiences:
+                raise TokenError("Invalid token audience")
+        if payload.get("type", ACCESS) != expected_type:
+            raise TokenError("Invalid token type")
+        if self.is_revoked(payload):
+            raise RevokedTokenError("Token has been revoked")
+        return dict(payload)
+
+    def revoke(self, payload: Dict[str, Any]) -> None:
+        """Reject the token with these claims until it expires.
+
+        Tokens issued before jti was added cannot be revoked individually;
+        they expire on their own.
+        """
+        jti = payload.get("jti")
+        ttl = payload.get("exp", 0) - time.time()
+        if self._revocations is not None and jti and ttl > 0:
+            self._revocations.set(jti, {"sub": payload.get("sub")}, ttl)
+
+    def revoke_session(self, session_id: str, ttl_seconds: float) -> None:
+        """Reject every token carrying this sid for the next `ttl_seconds`"""
+        if self._revocations is not None and ttl_seconds > 0:
+            self._revocations.set(f"sid:{session_id}", {}, ttl_seconds)
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        if self._revocations is None:
+            return False
+        jti = payload.get("jti")
+        if jti and self._revocations.exists(jti):
+            return True
+        sid = payload.get("sid")
+        return bool(sid and self._revocations.exists(f"sid:{sid}"))
+
+    def _verify(self, token: str) -> Dict[str, Any]:
+        try:
+            header = self._jws.get_unverified_header(token)
+            kid = header.get("kid")
+            if kid is None:
+                return self._verify_legacy(token)
+            key = self._keys.get(kid)
+            if key is None:
+                raise TokenError("Unknown signing key")
+            return self._jwt.decode(
+                token, key, algorithms=[self._algorithm_name], audience=self._audience,
+                options={"require": ["exp", "aud"]}
+            )
+        except jwt.ExpiredSignatureError as exc:
+            raise ExpiredTokenError("Token has expired") from exc
+        except jwt.InvalidAudienceError as exc:
+            raise TokenError("Invalid token audience") from exc
+        except jwt.PyJWTError as exc:
+            raise TokenError("Invalid token") from exc
+
+    def _verify_legacy(self, token: str) -> Dict[str, Any]:
+        """A token from before kids (and aud) were added, signed with the legacy key"""
+        if self._legacy_key is None:
+            raise TokenError("Unknown signing key")
+        payload = self._jwt.decode(
+            token, self._legacy_key, algorithms=[self._algorithm_name],
+            options={"verify_aud": False, "require": ["exp", "iat"]}
+        )
+        latest_exp = self._legacy_issued_before + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()
+        if payload["iat"] >= self._legacy_issued_before or payload["exp"] > latest_exp:
+            raise TokenError("Legacy token issued after the cutoff")
+        return payload
+
+    def _cached(self, token: str) -> Optional[Dict[str, Any]]:
+        if not self._cache_size:
+            return None
+        with self._lock:
+            payload = self._verified.get(token)
+            if payload is not None:
+                self._verified.move_to_end(token)
+            return payload
+
+    def _remember(self, token: str, payload: Dict[str, Any]) -> None:
+        if not self._cache_size:
+            return
+        with self._lock:
+            self._verified[token] = payload
+            while len(self._verified) > self._cache_size:
+                self._verified.popitem(last=False)
+
+
+token_service = TokenService(
+    keys=settings.JWT_KEYS or {settings.JWT_ACTIVE_KID: settings.SECRET_KEY},
+    active_kid=settings.JWT_ACTIVE_KID,
+    algorithm=settings.ALGORITHM,
+    audience=settings.JWT_AUDIENCE,
+    legacy_key=settings.SECRET_KEY,
+    legacy_issued_before=settings.JWT_LEGACY_ISSUED_BEFORE,
+    cache_size=settings.JWT_DECODE_CACHE_SIZE,
+    # Evicting a live revocation would silently un-revoke its token
+    revocations=create_store("revoked-jti", evict=False),
+)
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import redis
+except ImportError:  # Only needed with STORE_BACKEND=redis
+    redis = None
+
+
+class TTLStore(ABC):
+    """Key -> JSON-serializable dict with a per-key time to live"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the value, or None if it is missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def replace(self, key: str, value: Dict[str, Any]) -> bool:
+        """Overwrite an existing key keeping its expiry; returns False if it is missing"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def exists(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+class InMemoryTTLStore(TTLStore):
+    """Process-local store.
+
+    Expired keys are dropped when read and swept from the oldest end on every
+    write. At most max_entries keys are kept; beyond that the oldest writes are
+    evicted first. With max_entries=None live keys are never evicted, for
+    stores where dropping one early is unsafe (revocations).
+    """
+
+    def __init__(self, max_entries: Optional[int] = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _live(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._live(key)
+            return dict(entry[1]) if entry else None
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._entries.pop(key, None)
+            self._entries[key] = (now + ttl_seconds, dict(value))
+            while self._entries:
+                oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+                if expires_at > now and (self.max_entries is None or len(self._entries) <= self.max_entries):
+                    break
+                del self._entries[oldest_key]
+
+    def replace(self, key: str, value: Dict[str, Any]) -> bool:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return False
+            self._entries[key] = (entry[0], dict(value))
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+@lru_cache(maxsize=None)
+def redis_client(url: str):
+    if redis is None:
+        raise RuntimeError("STORE_BACKEND=redis requires the 'redis' package")
+    return redis.Redis.from_url(url)
+
+
+class RedisTTLStore(TTLStore):
+    """Store shared by every worker; Redis expires the keys itself"""
+
+    def __init__(self, url: str, namespace: str):
+        self._redis = redis_client(url)
+        self._prefix = f"{namespace}:"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._redis.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        self._redis.set(self._prefix + key, json.dumps(value), px=max(1, int(ttl_seconds * 1000)))
+
+    def replace(self, key: str, value: Dict[str, Any]) -> bool:
+        return bool(self._redis.set(self._prefix + key, json.dumps(value), xx=True, keepttl=True))
+
+    def delete(self, key: str) -> None:
+        self._redis.delete(self._prefix + key)
+
+    def exists(self, key: str) -> bool:
+        return bool(self._redis.exists(self._prefix + key))
+
+
+def create_store(namespace: str, evict: bool = True) -> TTLStore:
+    """Store for `namespace` on the configured backend (STORE_BACKEND).
+
+    With evict=False the in-memory store ignores TTL_STORE_MAX_ENTRIES and
+    keeps every key until it expires.
+    """
+    if settings.STORE_BACKEND == "redis":
+        return RedisTTLStore(settings.REDIS_URL, namespace)
+    if settings.STORE_BACKEND == "memory":
+        return InMemoryTTLStore(settings.TTL_STORE_MAX_ENTRIES if evict else None)
+    raise ValueError(f"Unknown STORE_BACKEND {settings.STORE_BACKEND!r}")
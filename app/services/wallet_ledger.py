@@ -0,0 +1,123 @@
+from decimal import Decimal
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.enums import TransactionStatus, TransactionType
+from app.models.wallet import Wallet, WalletTransaction
+from app.services import ledger
+from app.services.deposit_matcher import forget_pending_code
+
+
+class InsufficientBalanceError(Exception):
+    """Raised when a debit would take the wallet balance below zero"""
+
+
+class SettledDeposit(NamedTuple):
+    transaction_id: UUID
+    wallet_id: UUID
+    amount: Decimal
+    balance: Decimal
+
+
+# All balance changes are single UPDATE ... RETURNING statements evaluated by
+# Postgres, so concurrent requests cannot read a stale balance and overwrite
+# each other. Every change is also appended to the double-entry ledger; the
+# UPDATE runs first so its row lock serializes the wallet's ledger entries.
+# It also counts the entries since the wallet's last ledger snapshot, and a
+# snapshot is taken when that reaches LEDGER_SNAPSHOT_INTERVAL.
+# Nothing is committed here; the caller owns the transaction.
+# Loaded Wallet instances are not refreshed - use the returned balance.
+
+def debit(db: Session, wallet_id: UUID, amount, wallet_transaction_id: Optional[UUID] = None) -> Decimal:
+    """Take `amount` from the wallet; returns the new balance"""
+    amount = Decimal(str(amount))
+    stmt = (
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.balance >= amount)
+        .values(
+            balance=Wallet.balance - amount,
+            total_spent=Wallet.total_spent + amount,
+            ledger_entries_since_snapshot=Wallet.ledger_entries_since_snapshot + 1,
+        )
+        .returning(Wallet.balance, Wallet.ledger_entries_since_snapshot)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        raise InsufficientBalanceError(f"Wallet {wallet_id} has insufficient balance for {amount}")
+    account = ledger.wallet_account(wallet_id)
+    ledger.post_journal(
+        db, [(account, -amount), (ledger.SALES_ACCOUNT, amount)], TransactionType.PURCHASE, wallet_transaction_id
+    )
+    _maybe_snapshot(db, wallet_id, row.ledger_entries_since_snapshot)
+    return row.balance
+
+
+def credit(db: Session, wallet_id: UUID, amount, wallet_transaction_id: Optional[UUID] = None) -> Decimal:
+    """Deposit `amount` into the wallet; returns the new balance"""
+    amount = Decimal(str(amount))
+    stmt = (
+        update(Wallet)
+        .where(Wallet.id == wallet_id)
+        .values(
+            balance=Wallet.balance + amount,
+            total_deposited=Wallet.total_deposited + amount,
+            ledger_entries_since_snapshot=Wallet.ledger_entries_since_snapshot + 1,
+        )
+        .returning(Wallet.balance, Wallet.ledger_entries_since_snapshot)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        raise LookupError(f"Wallet {wallet_id} not found")
+    account = ledger.wallet_account(wallet_id)
+    ledger.post_journal(
+        db, [(account, amount), (ledger.BANK_ACCOUNT, -amount)], TransactionType.DEPOSIT, wallet_transaction_id
+    )
+    _maybe_snapshot(db, wallet_id, row.ledger_entries_since_snapshot)
+    return row.balance
+
+
+def _maybe_snapshot(db: Session, wallet_id: UUID, entries_since_snapshot: int) -> None:
+    if entries_since_snapshot < settings.LEDGER_SNAPSHOT_INTERVAL:
+        return
+    ledger.snapshot(db, ledger.wallet_account(wallet_id))
+    db.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id)
+        .values(ledger_entries_since_snapshot=0)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def settle_pending_deposit(db: Session, transaction_id: UUID, note_suffix: str) -> Optional[SettledDeposit]:
+    """Move a PENDING deposit to SUCCESS and credit its wallet.
+
+    The status transition is a conditional UPDATE, so of several concurrent
+    callers (duplicate webhooks, admin activation racing the webhook) exactly
+    one wins; the others get None and must not credit anything.
+    """
+    stmt = (
+        update(WalletTransaction)
+        .where(
+            WalletTransaction.id == transaction_id,
+            WalletTransaction.transaction_type == TransactionType.DEPOSIT,
+            WalletTransaction.status == TransactionStatus.PENDING,
+        )
+        .values(
+            status=TransactionStatus.SUCCESS,
+            note=func.concat(func.coalesce(WalletTransaction.note, ""), note_suffix),
+        )
+        .returning(WalletTransaction.wallet_id, WalletTransaction.amount)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+    forget_pending_code(db, row.amount)
+    balance = credit(db, row.wallet_id, row.amount, transaction_id)
+    return SettledDeposit(transaction_id, row.wallet_id, row.amount, balance)
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import DEPOSIT_AMOUNT, DEPOSITS, WEBHOOK_OUTCOMES
+from app.db.database import SessionLocal
+from app.models.enums import InboxStatus
+from app.models.user import User
+from app.models.wallet import Wallet
+from app.models.webhook_inbox import WebhookInbox
+from app.services.background import PollingWorker
+from app.services.deposit_matcher import find_pending_deposit
+from app.services.outbox import add_websocket_message, outbox_dispatcher
+from app.services.wallet_ledger import settle_pending_deposit
+
+logger = logging.getLogger(__name__)
+
+SEPAY = "sepay"
+
+
+class SepayOutcome(NamedTuple):
+    outcome: str  # credited, unmatched, duplicate or invalid
+    amount: float = 0.0
+
+    @property
+    def credited(self) -> bool:
+        return self.outcome == "credited"
+
+
+def sepay_transaction_id(payload: Dict[str, Any], raw_body: bytes) -> str:
+    """Idempotency key: Sepay's transaction id, or a digest of the body if it is missing"""
+    for key in ("id", "referenceCode"):
+        value = payload.get(key)
+        if value not in (None, ""):
+            return f"{key}:{value}"
+    return "sha256:" + hashlib.sha256(raw_body).hexdigest()
+
+
+def store_webhook(db: Session, provider: str, provider_tx_id: str, payload: Dict[str, Any]) -> bool:
+    """Persist a webhook payload; returns False if it was already received"""
+    stmt = (
+        pg_insert(WebhookInbox)
+        .values(provider=provider, provider_tx_id=provider_tx_id, payload=payload, status=InboxStatus.PENDING)
+        .on_conflict_do_nothing(constraint="uq_webhook_inbox_provider_tx")
+        .returning(WebhookInbox.id)
+    )
+    inserted = db.execute(stmt).first()
+    db.commit()
+    return inserted is not None
+
+
+def _parse_amount(payload: Dict[str, Any]) -> Optional[float]:
+    amount_raw = payload.get("transferAmount")
+    if amount_raw is None:
+        amount_raw = payload.get("amount") or payload.get("total") or payload.get("money")
+    try:
+        return float(amount_raw) if amount_raw is not None else None
+    except Exception:
+        return None
+
+
+def apply_sepay_payload(db: Session, payload: Dict[str, Any]) -> SepayOutcome:
+    """Match a Sepay payload to a pending deposit and credit the wallet (caller commits).
+
+    The WebSocket updates go to the outbox in the same transaction.
+    """
+    content: str = str(payload.get("content") or "")
+    amount = _parse_amount(payload)
+
+    if not content or amount is None:
+        logger.warning("[SEPAY] Missing content/amount; ignoring")
+        return SepayOutcome("invalid")
+
+    logger.info("💳 [SEPAY] content: %s", content)
+    matched = find_pending_deposit(db, content, amount)
+    if not matched:
+        logger.warning("[SEPAY] Unmatched transaction | content=%s amount=%.2f", content, amount or 0)
+        return SepayOutcome("unmatched", amount)
+
+    # Idempotency: only the caller that moves the deposit out of PENDING credits the wallet
+    settled = settle_pending_deposit(db, matched.id, " - Verified via Sepay webhook")
+    if not settled:
+        logger.info("[SEPAY] Duplicate webhook ignored for transfer=%s", matched.transfer_code)
+        return SepayOutcome("duplicate", amount)
+
+    wallet_user_id = db.query(Wallet.user_id).filter(Wallet.id == settled.wallet_id).scalar()
+    add_websocket_message(db, wallet_user_id, {
+        "type": "wallet_update",
+        "event": "deposit_success",
+        "amount": float(settled.amount),
+        "balance": float(settled.balance)
+    })
+
+    admins = db.query(User.id).filter(User.role == "ADMIN").all()
+    for (admin_id,) in admins:
+        add_websocket_message(db, admin_id, {
+            "type": "wallet_update",
+            "event": "deposit_verified",
+            "user_email": None,
+            "amount": float(settled.amount)
+        })
+    return SepayOutcome("credited", float(settled.amount))
+
+
+def claim_batch(limit: int) -> List[UUID]:
+    """Lock up to `limit` due inbox rows for this worker.
+
+    Rows stuck in PROCESSING longer than WEBHOOK_LOCK_TIMEOUT_SECONDS (worker
+    crashed mid-batch) are claimed again.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.WEBHOOK_LOCK_TIMEOUT_SECONDS)
+    db = SessionLocal()
+    try:
+        due = (
+            select(WebhookInbox.id)
+            .where(or_(
+                (WebhookInbox.status == InboxStatus.PENDING) & (WebhookInbox.next_attempt_at <= now),
+                (WebhookInbox.status == InboxStatus.PROCESSING) & (WebhookInbox.locked_at < stale),
+            ))
+            .order_by(WebhookInbox.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(WebhookInbox)
+            .where(WebhookInbox.id.in_(due.scalar_subquery()))
+            .values(status=InboxStatus.PROCESSING, locked_at=now, attempts=WebhookInbox.attempts + 1)
+            .returning(WebhookInbox.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = [row.id for row in db.execute(stmt)]
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def process_entry(entry_id: UUID) -> bool:
+    """Apply one claimed inbox row; the wallet credit, its outbox events and DONE mark commit together"""
+    db = SessionLocal()
+    try:
+        entry = db.query(WebhookInbox).filter(WebhookInbox.id == entry_id).first()
+        if entry is None or entry.status != InboxStatus.PROCESSING:
+            return False
+        try:
+            result = apply_sepay_payload(db, entry.payload)
+            entry.status = InboxStatus.DONE
+            entry.processed_at = datetime.now(timezone.utc)
+            entry.last_error = None
+            db.commit()
+            WEBHOOK_OUTCOMES.labels(result.outcome).inc()
+            if result.credited:
+                DEPOSITS.labels("completed").inc()
+                DEPOSIT_AMOUNT.inc(result.amount)
+            return result.credited
+        except Exception as exc:
+            db.rollback()
+            logger.exception("[SEPAY] Failed to process inbox entry %s", entry_id)
+            _schedule_retry(db, entry_id, str(exc))
+            return False
+    finally:
+        db.close()
+
+
+def _schedule_retry(db: Session, entry_id: UUID, error: str) -> None:
+    entry = db.query(WebhookInbox).filter(WebhookInbox.id == entry_id).first()
+    if entry is None:
+        return
+    entry.last_error = error[:2000]
+    entry.locked_at = None
+    if entry.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+        entry.status = InboxStatus.FAILED
+        WEBHOOK_OUTCOMES.labels("failed").inc()
+        logger.error("[SEPAY] Giving up on inbox entry %s after %d attempts", entry_id, entry.attempts)
+    else:
+        delay = settings.WEBHOOK_RETRY_BASE_SECONDS * (2 ** (entry.attempts - 1))
+        entry.status = InboxStatus.PENDING
+        entry.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    db.commit()
+
+
+class WebhookInboxWorker(PollingWorker):
+    """Drains the webhook inbox in batches"""
+
+    name = "webhook-inbox"
+
+    def __init__(self):
+        super().__init__(
+            concurrency=settings.WEBHOOK_WORKERS,
+            poll_interval=settings.WEBHOOK_POLL_INTERVAL_SECONDS,
+        )
+
+    async def run_once(self) -> int:
+        ids = await run_in_threadpool(claim_batch, settings.WEBHOOK_BATCH_SIZE)
+        credited = False
+        for entry_id in ids:
+            credited = await run_in_threadpool(process_entry, entry_id) or credited
+        if credited:
+            outbox_dispatcher.wake()
+        return len(ids)
+
+
+webhook_worker = WebhookInboxWorker()
@@ -1,27 +1,39 @@
-from typing import Dict, Set
+from collections import Counter
+from typing import Dict, NamedTuple, Set
 from fastapi import WebSocket
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class SendResult(NamedTuple):
+    sent: int  # Connections the message was written to
+    failed: int  # Connections that raised (they are dropped)
+
+
 class ConnectionManager:
     """Manages WebSocket connections for users"""
     
     def __init__(self):
         # user_id -> set of websocket connections
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # websocket -> channel it was opened on (wallet, notifications, ...), for metrics
+        self.channels: Dict[WebSocket, str] = {}
         
-    async def connect(self, websocket: WebSocket, user_id: str, already_accepted: bool = False):
+    async def connect(self, websocket: WebSocket, user_id: str, already_accepted: bool = False,
+                      channel: str = "default"):
         """Connect a user's websocket"""
         if not already_accepted:
             await websocket.accept()
         if user_id not in self.active_connections:
             self.active_connections[user_id] = set()
         self.active_connections[user_id].add(websocket)
+        self.channels[websocket] = channel
         logger.info(f"User {user_id} connected to WebSocket. Total connections: {len(self.active_connections[user_id])}")
         
     def disconnect(self, websocket: WebSocket, user_id: str):
         """Disconnect a user's websocket"""
+        self.channels.pop(websocket, None)
         if user_id in self.active_connections:
             self.active_connections[user_id].discard(websocket)
             logger.info(f"User {user_id} disconnected from WebSocket. Remaining connections: {len(self.active_connections[user_id])}")
@@ -29,8 +41,8 @@ class ConnectionManager:
                 del self.active_connections[user_id]
                 logger.info(f"User {user_id} has no active connections")
     
-    async def send_personal_message(self, message: dict, user_id: str):
-        """Send message to specific user"""
+    async def send_personal_message(self, message: dict, user_id: str) -> SendResult:
+        """Send message to specific user; returns how many of their connections got it"""
         if user_id in self.active_connections:
             disconnected = set()
             sent_count = 0
@@ -45,12 +57,15 @@ class ConnectionManager:
             # Remove disconnected connections
             for conn in disconnected:
                 self.active_connections[user_id].discard(conn)
+                self.channels.pop(conn, None)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
             
             logger.info(f"Sent wallet status update to user {user_id}: {sent_count} connection(s)")
+            return SendResult(sent_count, len(disconnected))
         else:
             logger.warning(f"User {user_id} has no active WebSocket connections. Message not sent.")
+            return SendResult(0, 0)
     
     async def broadcast_to_all_users(self, message: dict):
         """Broadcast message to all connected users"""
@@ -69,6 +84,7 @@ class ConnectionManager:
             # Remove disconnected connections
             for conn in disconnected:
                 connections.discard(conn)
+                self.channels.pop(conn, None)
             if not connections:
                 disconnected_users.append(user_id)
         
@@ -78,6 +94,10 @@ class ConnectionManager:
         
         logger.info(f"Broadcast message sent to {total_sent} connection(s)")
 
+    def connection_counts(self) -> Dict[str, int]:
+        """Open connections per channel"""
+        return dict(Counter(self.channels.values()))
+
 # Global instance
 manager = ConnectionManager()
 
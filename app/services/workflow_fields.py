@@ -0,0 +1,103 @@
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy.orm import joinedload, load_only
+
+from app.models.workflow import Workflow
+from app.models.workflow_category import WorkflowCategory
+from app.schemas.workflow import WorkflowResponse
+
+# Sparse fieldsets for workflow listings: `?fields=title,price,image_urls`.
+# Each WorkflowResponse field maps to the columns or relationships it needs,
+# so the query only loads what the response will contain.
+WORKFLOW_FIELDS: Tuple[str, ...] = tuple(WorkflowResponse.model_fields)
+
+# flow (the whole workflow definition) and the long texts are only needed on
+# detail pages; listings leave them out unless asked for with fields=
+LISTING_FIELDS: Tuple[str, ...] = tuple(
+    name for name in WORKFLOW_FIELDS if name not in ("flow", "description", "features")
+)
+
+_COLUMNS = {
+    "title": Workflow.title,
+    "description": Workflow.description,
+    "price": Workflow.price,
+    "status": Workflow.status,
+    "features": Workflow.features,
+    "downloads_count": Workflow.downloads_count,
+    "time_to_setup": Workflow.time_to_setup,
+    "video_demo": Workflow.video_demo,
+    "flow": Workflow.flow,
+    "rating_avg": Workflow.rating_avg,
+    "created_at": Workflow.created_at,
+    "updated_at": Workflow.updated_at,
+}
+
+_VALUES = {
+    "id": lambda workflow: str(workflow.id),
+    "title": lambda workflow: workflow.title,
+    "description": lambda workflow: workflow.description,
+    "price": lambda workflow: float(workflow.price),
+    "status": lambda workflow: workflow.status,
+    "features": lambda workflow: workflow.features or [],
+    "downloads_count": lambda workflow: workflow.downloads_count or 0,
+    "wishlist_count": lambda workflow: len(workflow.favorites),
+    "time_to_setup": lambda workflow: workflow.time_to_setup,
+    "video_demo": lambda workflow: workflow.video_demo,
+    "flow": lambda workflow: workflow.flow,
+    "rating_avg": lambda workflow: float(workflow.rating_avg) if workflow.rating_avg else None,
+    "created_at": lambda workflow: workflow.created_at.isoformat() if workflow.created_at else None,
+    "updated_at": lambda workflow: workflow.updated_at.isoformat() if workflow.updated_at else None,
+    "categories": lambda workflow: [wc.category.name for wc in workflow.categories],
+    # Image URLs from assets (filter by kind="image")
+    "image_urls": lambda workflow: [asset.asset_url for asset in workflow.assets if asset.kind == "image"],
+}
+
+
+def parse_fields(fields: Optional[str], default: Tuple[str, ...] = LISTING_FIELDS) -> Tuple[str, ...]:
+    """The requested field names in WorkflowResponse order, always including id.
+
+    Raises ValueError naming any field WorkflowResponse does not have.
+    """
+    if fields is None:
+        return default
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(WORKFLOW_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(name for name in WORKFLOW_FIELDS if name == "id" or name in requested)
+
+
+def workflow_load_options(fields: Iterable[str], through=None) -> list:
+    """Loader options fetching only what `fields` needs.
+
+    `through` is the relationship leading to the workflow when the query is
+    on another entity, e.g. Purchase.workflow.
+    """
+    fields = set(fields)
+
+    def related(relationship):
+        return joinedload(through).joinedload(relationship) if through is not None else joinedload(relationship)
+
+    columns = [Workflow.id, *(column for name, column in _COLUMNS.items() if name in fields)]
+    options = [joinedload(through).load_only(*columns) if through is not None else load_only(*columns)]
+    if "categories" in fields:
+        options.append(related(Workflow.categories).joinedload(WorkflowCategory.category))
+    if "image_urls" in fields:
+        options.append(related(Workflow.assets))
+    if "wishlist_count" in fields:
+        options.append(related(Workflow.favorites))
+    return options
+
+
+def workflow_row(workflow: Workflow, fields: Iterable[str] = WORKFLOW_FIELDS,
+                 is_like: Optional[bool] = None, is_buy: Optional[bool] = None) -> dict:
+    """The requested WorkflowResponse fields as a plain dict of JSON-ready values, for FastJSONResponse"""
+    row = {}
+    for name in fields:
+        if name == "is_like":
+            row[name] = is_like
+        elif name == "is_buy":
+            row[name] = is_buy
+        else:
+            row[name] = _VALUES[name](workflow)
+    return row
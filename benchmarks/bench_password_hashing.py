@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Login throughput under concurrency: bcrypt inline in the handler vs. the
+password_hasher thread pool.
+
+Runs in-process against a minimal ASGI app (no database): N concurrent
+"logins" verify a password while a heartbeat task measures how late the
+event loop wakes it up, i.e. how long every other request would stall.
+
+    python benchmarks/bench_password_hashing.py --requests 64 --concurrency 16
+
+With --url it instead fires concurrent logins at a running server:
+
+    python benchmarks/bench_password_hashing.py --url http://localhost:8000 \
+        --email user@example.com --password secret
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.config import settings
+from app.services import password_hasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def build_app(hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/inline/login")
+    async def inline_login():
+        if not bcrypt.checkpw(PASSWORD.encode("utf-8"), hashed.encode("utf-8")):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/pooled/login")
+    async def pooled_login():
+        if not await password_hasher.verify_password(PASSWORD, hashed):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    return app
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def fire(client: httpx.AsyncClient, path: str, total: int, concurrency: int, json_body=None):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json=json_body)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - started, latencies
+
+
+async def heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+def report(label: str, elapsed: float, latencies: list, lags: list = None):
+    print(f"{label}")
+    print(f"  throughput  {len(latencies) / elapsed:8.1f} logins/s ({len(latencies)} in {elapsed:.2f}s)")
+    print(f"  login p50   {statistics.median(latencies) * 1000:8.1f} ms   p95 {percentile(latencies, 95) * 1000:8.1f} ms")
+    if lags:
+        print(f"  loop lag    {statistics.median(lags) * 1000:8.1f} ms   max {max(lags) * 1000:8.1f} ms")
+
+
+async def run_in_process(total: int, concurrency: int):
+    hashed = password_hasher.hash_password_sync(PASSWORD)
+    app = build_app(hashed)
+    print(f"bcrypt cost {settings.BCRYPT_ROUNDS}, {settings.PASSWORD_HASH_WORKERS} hasher threads, "
+          f"{total} logins, concurrency {concurrency}\n")
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for mode in ("inline", "pooled"):
+            stop = asyncio.Event()
+            lags: list = []
+            monitor = asyncio.create_task(heartbeat(stop, lags))
+            elapsed, latencies = await fire(client, f"/{mode}/login", total, concurrency)
+            stop.set()
+            await monitor
+            report(mode, elapsed, latencies, lags)
+
+
+async def run_against_server(url: str, email: str, password: str, total: int, concurrency: int):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        elapsed, latencies = await fire(
+            client, "/api/auth/login", total, concurrency, {"email": email, "password": password}
+        )
+    report(url, elapsed, latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    if args.url:
+        if not (args.email and args.password):
+            parser.error("--url requires --email and --password")
+        asyncio.run(run_against_server(args.url, args.email, args.password, args.requests, args.concurrency))
+    else:
+        asyncio.run(run_in_process(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for rendering large listing responses.
+
+Times what happens after the query, for GET /api/workflows/ and
+GET /api/admin/purchases/ sized listings built from in-memory rows:
+
+- "pydantic + response_model": WorkflowResponse objects per row, then
+  FastAPI's response_model validation and serialization, rendered with the
+  stdlib JSONResponse (the path before FastJSONResponse)
+- "pydantic + response_model, orjson": the same with the app's default
+  response class, which is what handlers returning models still get
+- "pre-shaped rows, orjson": dicts from workflow_row returned as a
+  FastJSONResponse, skipping validation
+- "pre-shaped card rows, orjson": the same with the default listing
+  fieldset (no flow, description or features)
+- admin purchases: jsonable_encoder + JSONResponse vs FastJSONResponse
+
+    python benchmarks/bench_serialization.py --rows 2000 --number 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import FastJSONResponse
+from app.models import Category, Favorite, Workflow, WorkflowAsset, WorkflowCategory
+from app.schemas.workflow import WorkflowResponse
+from app.services.workflow_fields import LISTING_FIELDS, workflow_row
+
+WORDS = "email sales invoice crm lead slack report sync sheet notion calendar ticket webhook".split()
+
+
+def make_workflows(rng: random.Random, count: int) -> List[Workflow]:
+    """Transient Workflow objects shaped like the joinedload'ed rows of the listing"""
+    categories = [Category(id=uuid.uuid4(), name=name) for name in ("Marketing", "Sales", "AI", "Data")]
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    workflows = []
+    for i in range(count):
+        nodes = [{"id": str(n), "name": f"{rng.choice(WORDS)} step {n}", "type": "n8n-nodes-base.set",
+                  "position": [n * 200, rng.randrange(600)], "parameters": {"value": rng.choice(WORDS) * 4}}
+                 for n in range(rng.randint(5, 40))]
+        workflow = Workflow(
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            title=" ".join(rng.choice(WORDS).capitalize() for _ in range(4)),
+            description=" ".join(rng.choice(WORDS) for _ in range(80)),
+            price=Decimal(rng.choice((49000, 99000, 199000))),
+            status="active",
+            features=[f"{rng.choice(WORDS)} integration" for _ in range(4)],
+            downloads_count=rng.randrange(5000),
+            time_to_setup=rng.randint(5, 120),
+            flow={"nodes": nodes, "connections": {}},
+            rating_avg=Decimal("4.25"),
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i),
+        )
+        workflow.categories = [WorkflowCategory(category=category) for category in rng.sample(categories, 2)]
+        workflow.assets = [WorkflowAsset(kind="image", asset_url=f"https://cdn.example.com/{i}/{n}.png")
+                           for n in range(3)]
+        workflow.favorites = [Favorite() for _ in range(rng.randrange(20))]
+        workflows.append(workflow)
+    return workflows
+
+
+def make_purchases(rng: random.Random, count: int) -> dict:
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return {"purchases": [{
+        "id": str(uuid.uuid4()),
+        "user": {"id": str(uuid.uuid4()), "name": f"User {i}", "email": f"user-{i}@example.com"},
+        "workflow": {"id": str(uuid.uuid4()), "title": " ".join(rng.choice(WORDS) for _ in range(4)),
+                     "price": 99000.0},
+        "amount": 99000.0,
+        "status": "ACTIVE",
+        "payment_method": "WALLET",
+        "paid_at": (created + timedelta(minutes=i)).isoformat(),
+    } for i in range(count)]}
+
+
+def bench(label: str, func, number: int):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"{label:<44} {seconds * 1000:9.2f} ms/response  {len(func()):>12,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workflows = make_workflows(rng, args.rows)
+    purchases = make_purchases(rng, args.rows)
+    field = create_response_field(name="Response_get_workflows", type_=List[WorkflowResponse])
+    loop = asyncio.new_event_loop()
+
+    def as_models():
+        return [WorkflowResponse(**workflow_row(workflow)) for workflow in workflows]
+
+    def through_response_model(response_class):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=as_models()))
+        return response_class(content).body
+
+    print(f"{args.rows} rows per response, best of 3 x {args.number}\n")
+    print("GET /api/workflows/")
+    bench("pydantic + response_model, json", lambda: through_response_model(JSONResponse), args.number)
+    bench("pydantic + response_model, orjson", lambda: through_response_model(FastJSONResponse), args.number)
+    bench("pre-shaped rows, orjson",
+          lambda: FastJSONResponse([workflow_row(workflow) for workflow in workflows]).body, args.number)
+    bench("pre-shaped card rows, orjson",
+          lambda: FastJSONResponse([workflow_row(workflow, LISTING_FIELDS) for workflow in workflows]).body,
+          args.number)
+    print("\nGET /api/admin/purchases/")
+    bench("jsonable_encoder, json", lambda: JSONResponse(jsonable_encoder(purchases)).body, args.number)
+    bench("pre-shaped rows, orjson", lambda: FastJSONResponse(purchases).body, args.number)
+
+
+if __name__ == "__main__":
+    main()
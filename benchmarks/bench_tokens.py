@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for JWT signing and verification.
+
+Compares token_service (keys prepared once, kid lookup, type/audience checks,
+verified-token cache) with bare jwt.encode/jwt.decode calls that pass the
+secret as a string. "cold" rows decode with the cache disabled.
+
+    python benchmarks/bench_tokens.py --number 20000
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+
+from app.core.config import settings
+from app.services.token_service import REFRESH, TokenError, TokenService, token_service
+
+SUBJECT = "2f1c6f0e-4a4b-4c57-9a51-1b0f8a1f6a2e"
+
+
+def bench(label: str, func, number: int):
+    seconds = min(timeit.repeat(func, number=number, repeat=3))
+    print(f"{label:<34} {seconds / number * 1e6:8.2f} µs/op  {number / seconds:10.0f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    raw_claims = {"sub": SUBJECT, "type": "access", "iat": now - 60, "exp": now + 3600}
+    raw_token = jwt.encode(raw_claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    access_token = token_service.create_access_token(SUBJECT)
+    refresh_token = token_service.create_refresh_token(SUBJECT)
+
+    cold = TokenService(
+        keys=settings.JWT_KEYS or {settings.JWT_ACTIVE_KID: settings.SECRET_KEY},
+        active_kid=settings.JWT_ACTIVE_KID,
+        algorithm=settings.ALGORITHM,
+        audience=settings.JWT_AUDIENCE,
+        legacy_key=settings.SECRET_KEY,
+        legacy_issued_before=datetime.now(timezone.utc),
+    )
+
+    def reject_refresh():
+        try:
+            token_service.decode(refresh_token)
+        except TokenError:
+            pass
+
+    print(f"{settings.ALGORITHM}, {args.number} ops per run (best of 3)\n")
+    bench("jwt.encode (baseline)", lambda: jwt.encode(raw_claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM), args.number)
+    bench("token_service.create_access_token", lambda: token_service.create_access_token(SUBJECT), args.number)
+    bench("jwt.decode (baseline)", lambda: jwt.decode(raw_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]), args.number)
+    bench("token_service.decode access cold", lambda: cold.decode(access_token), args.number)
+    bench("token_service.decode legacy cold", lambda: cold.decode(raw_token), args.number)
+    bench("token_service.decode access", lambda: token_service.decode(access_token), args.number)
+    bench("token_service.decode refresh", lambda: token_service.decode(refresh_token, REFRESH), args.number)
+    bench("token_service reject wrong type", reject_refresh, args.number)
+
+
+if __name__ == "__main__":
+    main()
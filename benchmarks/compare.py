@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compare two loadtest.py reports, e.g. the base branch against a change.
+
+    python benchmarks/compare.py bench-results/abc123.json bench-results/def456.json --threshold 10
+
+Prints p50/p95/p99 per operation with the relative change and marks
+operations whose p95 got more than --threshold percent slower (or that
+started failing). Exits with status 1 if any did, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Optional
+
+
+def change(base: float, new: float) -> Optional[float]:
+    return None if not base else (new - base) / base * 100
+
+
+def fmt_change(value: Optional[float]) -> str:
+    return "    n/a" if value is None else f"{value:+6.1f}%"
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> int:
+    regressions = 0
+    print(f"base {base['meta'].get('commit')} -> new {new['meta'].get('commit')}  "
+          f"(concurrency {new['meta'].get('concurrency')}, {new['meta'].get('duration')}s)")
+    for scenario, result in new["scenarios"].items():
+        base_ops = base["scenarios"].get(scenario, {}).get("operations", {})
+        print(f"\n{scenario}")
+        print(f"  {'operation':<44} {'p50 ms':>16}  {'p95 ms':>16}  {'p99 ms':>16}  {'rps':>15}")
+        for operation, stats in result["operations"].items():
+            before = base_ops.get(operation)
+            if before is None:
+                print(f"  {operation:<44} (new)")
+                continue
+            cells = []
+            for key in ("p50", "p95", "p99"):
+                cells.append(f"{stats[key]:>8.1f} {fmt_change(change(before[key], stats[key]))}")
+            rps = f"{stats['rps']:>7.1f} {fmt_change(change(before['rps'], stats['rps']))}"
+            p95_change = change(before["p95"], stats["p95"])
+            new_errors = stats["errors"] > 0 and not before["errors"]
+            flag = ""
+            if (p95_change is not None and p95_change > threshold) or new_errors:
+                regressions += 1
+                flag = "  <-- regression" + (" (errors)" if new_errors else "")
+            print(f"  {operation:<44} {'  '.join(cells)}  {rps}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 slowdown in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as fh:
+        base = json.load(fh)
+    with open(args.new) as fh:
+        new = json.load(fh)
+    regressions = compare(base, new, args.threshold)
+    print(f"\n{regressions} regression(s) over {args.threshold:g}% p95")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Scripted load scenarios against a running server, reported as p50/p95/p99.
+
+Fill a database with generate_data.py, start the API on it with rate limits
+off (each virtual user hammers the same endpoints from one IP), then:
+
+    RATE_LIMIT_ENABLED=false uvicorn app.main:app --workers 4
+    python benchmarks/loadtest.py --url http://localhost:8000 \
+        --dataset benchmarks/dataset.json --concurrency 32 --duration 30 \
+        --output bench-results/$(git rev-parse --short HEAD).json
+
+Scenarios (--scenario, repeatable; all by default):
+
+    anonymous_browse  catalog, featured, categories, workflow detail and reviews
+    logged_in_browse  the same with a token, plus wishlist, notifications, wallet
+    search            GET /api/workflows/search with dataset terms
+    purchase          wallet purchases of distinct workflows
+    deposit_webhook   deposit init + Sepay webhook, then polls until credited
+    websocket_fanout  --concurrency notification sockets, admin broadcasts; measures delivery
+
+Each scenario runs for --duration seconds with --concurrency virtual users.
+Compare two reports with compare.py.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import websockets
+
+SCENARIOS = ("anonymous_browse", "logged_in_browse", "search", "purchase", "deposit_webhook", "websocket_fanout")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Latency samples (ms) and error counts per operation"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, started: float, ok: bool = True) -> None:
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[name] += 1
+
+    def error(self, name: str) -> None:
+        self.errors[name] += 1
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str,
+                      expect: int = 200, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.add(name, started, ok=False)
+            return None
+        self.add(name, started, ok=response.status_code == expect)
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for name in sorted(set(self.samples) | set(self.errors)):
+            values = sorted(self.samples.get(name, []))
+            report[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "mean": round(sum(values) / len(values), 2) if values else 0.0,
+                "p50": round(percentile(values, 50), 2),
+                "p95": round(percentile(values, 95), 2),
+                "p99": round(percentile(values, 99), 2),
+                "max": round(values[-1], 2) if values else 0.0,
+            }
+        return report
+
+
+class Context:
+    def __init__(self, args, dataset: Dict[str, Any]):
+        self.url = args.url.rstrip("/")
+        self.concurrency = args.concurrency
+        self.duration = args.duration
+        self.dataset = dataset
+        self.seed = dataset.get("seed", 0)
+        self.tokens: Dict[str, str] = {}
+
+    def client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.concurrency * 2, max_keepalive_connections=self.concurrency * 2)
+        return httpx.AsyncClient(base_url=self.url, timeout=30, limits=limits)
+
+    def workflow(self, rng: random.Random) -> str:
+        return rng.choice(self.dataset["workflows"])
+
+    async def login(self, client: httpx.AsyncClient, email: str) -> str:
+        if email not in self.tokens:
+            response = await client.post("/api/auth/login", json={"email": email, "password": self.dataset["password"]})
+            response.raise_for_status()
+            self.tokens[email] = response.json()["access_token"]
+        return self.tokens[email]
+
+    async def user_headers(self, client: httpx.AsyncClient, index: int) -> Dict[str, str]:
+        users = self.dataset["users"]
+        return {"Authorization": f"Bearer {await self.login(client, users[index % len(users)])}"}
+
+
+async def browse_step(ctx: Context, client, rec: Recorder, rng: random.Random, headers=None) -> None:
+    roll = rng.random()
+    workflow_id = ctx.workflow(rng)
+    if roll < 0.05:
+        await rec.request(client, "GET /api/workflows/", "GET", "/api/workflows/", headers=headers)
+    elif roll < 0.25:
+        await rec.request(client, "GET /api/workflows/feature", "GET", "/api/workflows/feature", headers=headers)
+    elif roll < 0.35:
+        await rec.request(client, "GET /api/categories/", "GET", "/api/categories/", headers=headers)
+    elif roll < 0.8:
+        await rec.request(client, "GET /api/workflows/{id}", "GET", f"/api/workflows/{workflow_id}", headers=headers)
+    else:
+        await rec.request(client, "GET /api/workflows/{id}/reviews", "GET", f"/api/workflows/{workflow_id}/reviews",
+                          headers=headers)
+
+
+async def anonymous_browse(ctx: Context, client, rec: Recorder, index: int, rng: random.Random, deadline: float):
+    while time.perf_counter() < deadline:
+        await browse_step(ctx, client, rec, rng)
+
+
+async def logged_in_browse(ctx: Context, client, rec: Recorder, index: int, rng: random.Random, deadline: float):
+    headers = await ctx.user_headers(client, index)
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < 0.1:
+            await rec.request(client, "GET /api/wishlist/", "GET", "/api/wishlist/", headers=headers)
+        elif roll < 0.2:
+            await rec.request(client, "GET /api/notifications/", "GET", "/api/notifications/", headers=headers)
+        elif roll < 0.3:
+            await rec.request(client, "GET /api/wallet/", "GET", "/api/wallet/", headers=headers)
+        else:
+            await browse_step(ctx, client, rec, rng, headers)
+
+
+async def search(ctx: Context, client, rec: Recorder, index: int, rng: random.Random, deadline: float):
+    terms = ctx.dataset["search_terms"]
+    while time.perf_counter() < deadline:
+        await rec.request(client, "GET /api/workflows/search", "GET", "/api/workflows/search",
+                          params={"q": rng.choice(terms)})
+
+
+async def purchase(ctx: Context, client, rec: Recorder, index: int, rng: random.Random, deadline: float):
+    headers = await ctx.user_headers(client, index)
+    # Each virtual user buys from its own slice so no purchase is a duplicate
+    workflows = ctx.dataset["workflows"][index::ctx.concurrency]
+    for workflow_id in workflows:
+        if time.perf_counter() >= deadline:
+            return
+        await rec.request(client, "POST /api/wallet/orders/{id}", "POST", f"/api/wallet/orders/{workflow_id}",
+                          headers=headers)
+
+
+async def deposit_webhook(ctx: Context, client, rec: Recorder, index: int, rng: random.Random, deadline: float):
+    headers = await ctx.user_headers(client, index)
+    while time.perf_counter() < deadline:
+        amount = rng.randrange(10, 500) * 1000
+        started = time.perf_counter()
+        response = await rec.request(client, "POST /api/wallet/deposit/init", "POST", "/api/wallet/deposit/init",
+                                     headers=headers, json={"amount": amount, "bank_name": "MB"})
+        if response is None or response.status_code != 200:
+            continue
+        code = response.json()["transfer_code"]
+        before = await client.get("/api/wallet/", headers=headers)
+        balance = before.json()["balance"]
+        payload = {"id": str(uuid.uuid4()), "content": f"MBVCB.{rng.randrange(10 ** 9)}.NAP {code}.CT",
+                   "transferAmount": amount, "transferType": "in"}
+        await rec.request(client, "POST /api/webhook/sepay", "POST", "/api/webhook/sepay", json=payload)
+        # End to end: until the inbox worker has credited the wallet
+        for _ in range(200):
+            wallet = await client.get("/api/wallet/", headers=headers)
+            if wallet.status_code == 200 and wallet.json()["balance"] > balance:
+                rec.add("deposit credited (end to end)", started)
+                break
+            await asyncio.sleep(0.05)
+        else:
+            rec.error("deposit credited (end to end)")
+
+
+async def websocket_fanout(ctx: Context, client, rec: Recorder, deadline: float) -> None:
+    ws_url = ctx.url.replace("http", "ws", 1)
+    admin = {"Authorization": f"Bearer {await ctx.login(client, ctx.dataset['admin'])}"}
+    sent_at: Dict[str, float] = {}
+    sockets = []
+    for index in range(ctx.concurrency):
+        token = (await ctx.user_headers(client, index))["Authorization"].split()[1]
+        started = time.perf_counter()
+        try:
+            sockets.append(await websockets.connect(f"{ws_url}/ws/notifications/{token}"))
+            await sockets[-1].recv()  # "connected"
+            rec.add("ws connect", started)
+        except Exception:
+            rec.error("ws connect")
+
+    async def listen(socket):
+        try:
+            async for raw in socket:
+                received = time.perf_counter()
+                message = json.loads(raw)
+                started = sent_at.get(message.get("title", ""))
+                if started is not None:
+                    rec.samples["ws delivery (broadcast to client)"].append((received - started) * 1000)
+        except websockets.ConnectionClosed:
+            pass
+
+    listeners = [asyncio.create_task(listen(socket)) for socket in sockets]
+    while time.perf_counter() < deadline:
+        title = f"bench {uuid.uuid4()}"
+        sent_at[title] = time.perf_counter()
+        await rec.request(client, "POST /api/admin/notifications/broadcast", "POST",
+                          "/api/admin/notifications/broadcast", headers=admin,
+                          json={"title": title, "message": "load test", "type": "SUCCESS"})
+        await asyncio.sleep(1)
+    await asyncio.sleep(1)  # let the last deliveries arrive
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*listeners, return_exceptions=True)
+
+
+VirtualUser = Callable[[Context, httpx.AsyncClient, Recorder, int, random.Random, float], Awaitable[None]]
+VIRTUAL_USERS: Dict[str, VirtualUser] = {
+    "anonymous_browse": anonymous_browse,
+    "logged_in_browse": logged_in_browse,
+    "search": search,
+    "purchase": purchase,
+    "deposit_webhook": deposit_webhook,
+}
+
+
+async def run_scenario(ctx: Context, name: str) -> Dict[str, Any]:
+    rec = Recorder()
+    async with ctx.client() as client:
+        # Log in before the clock starts; logins are not what these scenarios measure
+        if name in ("logged_in_browse", "purchase", "deposit_webhook", "websocket_fanout"):
+            for index in range(ctx.concurrency):
+                await ctx.user_headers(client, index)
+        started = time.perf_counter()
+        deadline = started + ctx.duration
+        if name == "websocket_fanout":
+            await websocket_fanout(ctx, client, rec, deadline)
+        else:
+            # One RNG per virtual user, derived from the dataset seed: same request mix every run
+            await asyncio.gather(*(
+                VIRTUAL_USERS[name](ctx, client, rec, index, random.Random(f"{ctx.seed}:{name}:{index}"), deadline)
+                for index in range(ctx.concurrency)
+            ))
+        elapsed = time.perf_counter() - started
+    return {"elapsed_seconds": round(elapsed, 2), "operations": rec.summary(elapsed)}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(name: str, result: Dict[str, Any]) -> None:
+    print(f"\n{name} ({result['elapsed_seconds']}s)")
+    print(f"  {'operation':<44} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for operation, stats in result["operations"].items():
+        print(f"  {operation:<44} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+              f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f}")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    with open(args.dataset) as fh:
+        dataset = json.load(fh)
+    ctx = Context(args, dataset)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "dataset_seed": dataset.get("seed"),
+            "dataset_counts": dataset.get("counts"),
+            "python": platform.python_version(),
+        },
+        "scenarios": {},
+    }
+    for name in args.scenario or SCENARIOS:
+        result = await run_scenario(ctx, name)
+        report["scenarios"][name] = result
+        print_report(name, result)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--dataset", default=os.path.join(os.path.dirname(__file__), "dataset.json"))
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nreport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script để chạy background job runner (hàng đợi jobs trong Postgres + lịch cron)
+
+    python run_jobs.py                      # worker processes + scheduler
+    python run_jobs.py --processes 4 --no-scheduler
+    python run_jobs.py --once               # run due jobs once and exit
+    python run_jobs.py enqueue recompute_workflow_rating --payload '{"workflow_id": "..."}'
+    python run_jobs.py list
+"""
+import argparse
+import json
+import logging
+
+from app.db.database import SessionLocal
+from app.services import job_runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="USITech background job runner")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default JOB_WORKER_PROCESSES)")
+    parser.add_argument("--no-scheduler", action="store_true", help="Don't enqueue cron schedules from this instance")
+    parser.add_argument("--once", action="store_true", help="Run one batch of due jobs in this process and exit")
+    subparsers = parser.add_subparsers(dest="command")
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add a job to the queue")
+    enqueue_parser.add_argument("name")
+    enqueue_parser.add_argument("--payload", default="{}", help="JSON object of job arguments")
+    subparsers.add_parser("list", help="Show registered jobs and schedules")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=job_runner.LOG_FORMAT)
+    job_runner.load_jobs()
+
+    if args.command == "list":
+        for name, spec in sorted(job_runner.registered_jobs().items()):
+            print(f"job       {name} (max attempts {spec.max_attempts})")
+        for name, item in sorted(job_runner.registered_schedules().items()):
+            print(f"schedule  {name}: {item.cron.expression} -> {item.job_name}")
+    elif args.command == "enqueue":
+        db = SessionLocal()
+        try:
+            job_runner.enqueue(db, args.name, json.loads(args.payload))
+            db.commit()
+        finally:
+            db.close()
+        print(f"Enqueued {args.name}")
+    elif args.once:
+        print(f"Ran {job_runner.run_due_jobs(job_runner.worker_id())} job(s)")
+    else:
+        job_runner.run_forever(args.processes, with_scheduler=not args.no_scheduler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.query_metrics import count_queries
+from app.db.database import Base
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TEST_SCHEMA = "app_tests"
+
+
+@pytest.fixture
+def query_budget():
+    """Fail the test if the block runs more than `max_queries` SQL statements.
+
+        with query_budget(3):
+            client.get(f"/api/workflows/{workflow_id}")
+    """
+    @contextmanager
+    def check(max_queries: int):
+        with count_queries() as counter:
+            yield counter
+        assert counter.count <= max_queries, (
+            f"{counter.count} queries ran, budget is {max_queries}:\n" + "\n".join(counter.statements)
+        )
+
+    return check
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    """All tables in a throwaway schema of TEST_DATABASE_URL; tests using it skip without one"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={TEST_SCHEMA}"})
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {TEST_SCHEMA}"))
+    Base.metadata.create_all(engine)
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {TEST_SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_sessionmaker(pg_engine):
+    """A sessionmaker on the test schema; every table is emptied after the test.
+
+    Code that opens its own sessions needs SessionLocal patched to this.
+    """
+    yield sessionmaker(bind=pg_engine, autocommit=False, autoflush=False)
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with pg_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def pg_db(pg_sessionmaker):
+    db = pg_sessionmaker()
+    yield db
+    db.close()
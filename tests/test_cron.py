@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.cron import CronSchedule
+
+
+def at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    ("*/15 * * * *", at(2026, 1, 1, 10, 7, 30), at(2026, 1, 1, 10, 15)),
+    ("*/15 * * * *", at(2026, 1, 1, 10, 45), at(2026, 1, 1, 11, 0)),
+    ("30 3 * * *", at(2026, 1, 1, 3, 30), at(2026, 1, 2, 3, 30)),
+    ("0 9-17/4 * * 1-5", at(2026, 1, 2, 18, 0), at(2026, 1, 5, 9, 0)),  # Friday evening -> Monday
+    ("0 0 1 * *", at(2026, 1, 31, 12, 0), at(2026, 2, 1, 0, 0)),
+    ("0 0 29 2 *", at(2026, 3, 1), at(2028, 2, 29)),
+    ("0 0 * * 7", at(2026, 1, 1), at(2026, 1, 4)),  # 7 is Sunday
+    ("0 12 13 * 5", at(2026, 1, 1), at(2026, 1, 2, 12, 0)),  # day OR weekday when both are set
+    ("@hourly", at(2026, 1, 1, 23, 59, 59), at(2026, 1, 2, 0, 0)),
+])
+def test_next_after(expression, moment, expected):
+    assert CronSchedule(expression).next_after(moment) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "0 0 0 * *", "a * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_impossible_date_has_no_run_time():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 30 2 *").next_after(at(2026, 1, 1))
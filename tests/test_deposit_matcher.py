@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.core.query_metrics import count_queries
+from app.models.enums import TransactionStatus, TransactionType
+from app.models.user import User
+from app.models.wallet import Wallet, WalletTransaction
+from app.services.deposit_matcher import (
+    AhoCorasick, DepositMatch, extract_transfer_codes, find_pending_deposit, pending_codes,
+)
+
+
+def test_extract_transfer_codes():
+    content = "MBVCB.1234.nap abcd1234.CT tu 0903536212 abcd1234"
+    assert extract_transfer_codes(content) == ["MBVCB", "1234", "NAP", "ABCD1234", "CT", "TU", "0903536212"]
+
+
+def test_aho_corasick_finds_glued_codes():
+    matcher = AhoCorasick(["ABCD1234", "CD12", "XYZ999"])
+    text = "NAPTIENABCD1234CHUYENKHOAN"
+    assert set(matcher.find_all(text)) == {"ABCD1234", "CD12"}
+    assert matcher.longest_match(text) == "ABCD1234"
+    assert matcher.longest_match("NOTHING HERE") is None
+
+
+def test_aho_corasick_follows_fail_links():
+    matcher = AhoCorasick(["HE", "SHE", "HIS", "HERS"])
+    assert set(matcher.find_all("USHERS")) == {"HE", "SHE", "HERS"}
+
+
+@pytest.fixture
+def db(pg_db):
+    pending_codes.invalidate()
+    yield pg_db
+
+
+def add_deposit(db, code, amount=50000, age=timedelta(0)):
+    user = User(id=uuid.uuid4(), email=f"{code.lower()}@example.com", role="USER", is_deleted=False)
+    wallet = Wallet(id=uuid.uuid4(), user_id=user.id, balance=0, total_deposited=0, total_spent=0)
+    db.add_all([user, wallet])
+    db.flush()
+    tx = WalletTransaction(
+        id=uuid.uuid4(), wallet_id=wallet.id, transaction_type=TransactionType.DEPOSIT, amount=amount,
+        status=TransactionStatus.PENDING, transfer_code=code, created_at=datetime.now(timezone.utc) - age,
+    )
+    db.add(tx)
+    db.commit()
+    return tx
+
+
+def test_fallback_matches_glued_codes_from_the_cached_automaton(db):
+    tx = add_deposit(db, "abcd1234")
+    add_deposit(db, "OLD99999", age=timedelta(minutes=settings.DEPOSIT_PENDING_TTL_MINUTES + 1))
+
+    assert find_pending_deposit(db, "NAPABCD1234CK", 50000) == DepositMatch(tx.id, "ABCD1234")
+    # Past the pending TTL: left to the sweeper, not matched
+    assert find_pending_deposit(db, "NAPOLD99999CK", 50000) is None
+
+    # The automaton is reused without touching the database again
+    with count_queries() as counter:
+        assert find_pending_deposit(db, "NAPABCD1234CK", 50000).id == tx.id
+    assert len(counter.statements) == 1  # only the indexed fast-path lookup
+
+
+def test_creating_and_settling_a_deposit_invalidates_the_automaton(db):
+    assert find_pending_deposit(db, "NAPWXYZ7777CK", 50000) is None
+    tx = add_deposit(db, "WXYZ7777")
+    assert find_pending_deposit(db, "NAPWXYZ7777CK", 50000).id == tx.id
+
+    tx.status = TransactionStatus.SUCCESS
+    db.commit()
+    assert find_pending_deposit(db, "NAPWXYZ7777CK", 50000) is None
+
+
+def test_codes_expiring_while_cached_are_not_matched(db, monkeypatch):
+    tx = add_deposit(db, "LATE5555", age=timedelta(minutes=10))
+    assert find_pending_deposit(db, "NAPLATE5555CK", 50000).id == tx.id
+
+    # The deposit passes the pending TTL while its automaton is still cached
+    monkeypatch.setattr(settings, "DEPOSIT_PENDING_TTL_MINUTES", 5)
+    assert find_pending_deposit(db, "NAPLATE5555CK", 50000) is None
+    assert find_pending_deposit(db, "NAP LATE5555 CK", 50000) is None
@@ -0,0 +1,163 @@
+import socket
+import threading
+
+from app.models.enums import EmailStatus
+from app.models.outbound_email import OutboundEmail
+from app.services.email_queue import SMTPConnectionPool, deliver
+
+
+class SMTPSink:
+    """Minimal SMTP server recording connections and received messages"""
+
+    def __init__(self, reject=(), defer=()):
+        self.reject = set(reject)
+        self.defer = set(defer)
+        self.connections = 0
+        self.messages = []
+        self._server = socket.socket()
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        reader = conn.makefile("rb")
+        conn.sendall(b"220 sink\r\n")
+        rcpt = None
+        for raw in reader:
+            command = raw.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                conn.sendall(b"250 sink\r\n")
+            elif verb == "RCPT":
+                rcpt = command.split("<", 1)[1].rstrip(">")
+                if rcpt in self.reject:
+                    conn.sendall(b"550 no such user\r\n")
+                elif rcpt in self.defer:
+                    conn.sendall(b"451 try again later\r\n")
+                else:
+                    conn.sendall(b"250 ok\r\n")
+            elif verb == "DATA":
+                conn.sendall(b"354 go ahead\r\n")
+                lines = []
+                for line in reader:
+                    if line == b".\r\n":
+                        break
+                    lines.append(line)
+                self.messages.append((rcpt, b"".join(lines)))
+                conn.sendall(b"250 queued\r\n")
+            elif verb == "QUIT":
+                conn.sendall(b"221 bye\r\n")
+                break
+            else:  # MAIL, RSET, NOOP
+                conn.sendall(b"250 ok\r\n")
+        conn.close()
+
+    def close(self):
+        self._server.close()
+
+
+def make_email(recipient):
+    return OutboundEmail(
+        recipient=recipient, subject="Hi", html_body="<p>Hi</p>", text_body="Hi",
+        status=EmailStatus.SENDING, attempts=1,
+    )
+
+
+def test_deliver_reuses_pooled_connection():
+    sink = SMTPSink(reject={"bad@example.com"})
+    pool = SMTPConnectionPool("127.0.0.1", sink.port, starttls=False, size=1)
+    try:
+        first = [make_email(f"user{i}@example.com") for i in range(3)]
+        rejected = make_email("bad@example.com")
+        assert deliver(first + [rejected], pool) == 3
+        assert deliver([make_email("user3@example.com")], pool) == 1
+    finally:
+        pool.close()
+        sink.close()
+
+    assert sink.connections == 1
+    assert len(sink.messages) == 4
+    assert all(email.status == EmailStatus.SENT for email in first)
+    assert rejected.status == EmailStatus.FAILED
+    assert rejected.last_error and rejected.next_attempt_at is None
+
+
+def test_only_deferred_emails_are_retried():
+    sink = SMTPSink(reject={"bad@example.com"}, defer={"busy@example.com"})
+    pool = SMTPConnectionPool("127.0.0.1", sink.port, starttls=False, size=1)
+    rejected, deferred, ok = make_email("bad@example.com"), make_email("busy@example.com"), make_email("c@example.com")
+    try:
+        assert deliver([rejected, deferred, ok], pool) == 1
+    finally:
+        pool.close()
+        sink.close()
+
+    assert rejected.status == EmailStatus.FAILED
+    assert deferred.status == EmailStatus.PENDING and deferred.next_attempt_at is not None
+    assert "451" in deferred.last_error
+    assert ok.status == EmailStatus.SENT
+
+
+def test_connection_failure_retries_every_email():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    server.close()  # nothing listens here
+
+    pool = SMTPConnectionPool("127.0.0.1", port, starttls=False, size=1, timeout=2)
+    emails = [make_email("a@example.com"), make_email("b@example.com")]
+    emails[1].attempts = 100
+    assert deliver(emails, pool) == 0
+    assert emails[0].status == EmailStatus.PENDING
+    assert emails[0].last_error
+    assert emails[1].status == EmailStatus.FAILED
+
+
+def test_unbuildable_email_fails_alone():
+    sink = SMTPSink()
+    pool = SMTPConnectionPool("127.0.0.1", sink.port, starttls=False, size=1)
+    broken = make_email("a@example.com")
+    broken.subject = "Hi\r\nBcc: everyone@example.com"
+    ok = make_email("b@example.com")
+    try:
+        assert deliver([broken, ok], pool) == 1
+    finally:
+        pool.close()
+        sink.close()
+
+    assert broken.status == EmailStatus.FAILED
+    assert broken.last_error.startswith("ValueError")
+    assert ok.status == EmailStatus.SENT
+    assert [rcpt for rcpt, _ in sink.messages] == ["b@example.com"]
+
+
+class BrokenSMTP:
+    closed = False
+
+    def send_message(self, message):
+        raise RuntimeError("unexpected")
+
+    def quit(self):
+        self.closed = True
+
+
+def test_unexpected_send_error_retries_every_email():
+    pool = SMTPConnectionPool("127.0.0.1", 0, size=1)
+    smtp = BrokenSMTP()
+    pool._checkout = lambda: smtp
+    emails = [make_email("a@example.com"), make_email("b@example.com")]
+    assert deliver(emails, pool) == 0
+    assert all(email.status == EmailStatus.PENDING for email in emails)
+    assert all(email.last_error == "RuntimeError: unexpected" for email in emails)
+    # The connection that raised is closed, not put back in the pool
+    assert smtp.closed and pool._idle.empty()
@@ -0,0 +1,36 @@
+from app.services.email_templates import TEMPLATE_DIR, EmailTemplateRegistry
+
+
+def make_registry():
+    registry = EmailTemplateRegistry(TEMPLATE_DIR, default_language="en", static={"brand": "USITech"})
+    registry.load()
+    return registry
+
+
+def test_every_template_renders_in_every_language():
+    registry = make_registry()
+    assert set(registry.languages) >= {"en", "vi"}
+    for language in registry.languages:
+        for variant in ("email_verification", "password_reset"):
+            otp = registry.render("otp", language, variant, otp="123456", expire_minutes=10)
+            assert "123456" in otp.html and "123456" in otp.text
+            assert "$" not in otp.subject + otp.html + otp.text
+        welcome = registry.render("welcome", language, name="An")
+        assert "USITech" in welcome.subject
+        assert "<" not in welcome.text
+
+
+def test_values_are_escaped_in_html_only():
+    rendered = make_registry().render("welcome", "en", name="<b>Eve</b>")
+    assert "&lt;b&gt;Eve&lt;/b&gt;" in rendered.html
+    assert "Hello <b>Eve</b>!" in rendered.text
+
+
+def test_language_fallback_and_negotiation():
+    registry = make_registry()
+    assert registry.render("welcome", "fr", name="A") == registry.render("welcome", "en", name="A")
+    assert "Xin chào" in registry.render("welcome", "vi", name="A").text
+    assert registry.negotiate("fr-FR,vi;q=0.8,en;q=0.5") == "vi"
+    assert registry.negotiate("en-US;q=0.3, vi-VN") == "vi"
+    assert registry.negotiate(None) == "en"
+    assert registry.negotiate("en", preferred=["vi"]) == "vi"
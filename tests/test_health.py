@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.api import health_router
+from app.core.config import settings
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def healthy(monkeypatch):
+    monkeypatch.setattr(health_router, "check_database", lambda: {})
+    monkeypatch.setattr(health_router, "check_migrations", lambda: {"head": ["abc"]})
+    monkeypatch.setattr(health_router, "check_pool", lambda: {"in_use": 0, "capacity": 15})
+
+
+def test_liveness():
+    assert client.get("/health/live").json() == {"status": "alive"}
+
+
+def test_ready(healthy):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert set(body["checks"]) == {"database", "migrations", "pool"}
+    assert all(check["status"] == "ok" and "latency_ms" in check for check in body["checks"].values())
+
+
+def test_failing_check_makes_worker_not_ready(healthy, monkeypatch):
+    def database_down():
+        raise ConnectionError("connection refused\nmore detail")
+
+    monkeypatch.setattr(health_router, "check_database", database_down)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"]["error"] == "connection refused"
+
+
+def test_slow_check_times_out(healthy, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(health_router, "check_pool", lambda: time.sleep(0.5) or {})
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["pool"]["error"].startswith("timed out")
+
+
+def test_saturated_pool_fails(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0)
+    monkeypatch.setattr(health_router, "engine", engine)
+    assert health_router.check_pool() == {"in_use": 0, "capacity": 1}
+    with engine.connect():
+        with pytest.raises(health_router.CheckFailed, match="1 of 1 connections in use"):
+            health_router.check_pool()
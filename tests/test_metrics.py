@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry
+from sqlalchemy import create_engine, text
+
+from app.api import admin_purchases_router
+from app.core.config import settings
+from app.core.metrics import HTTPMetricsMiddleware, RuntimeCollector, TimedQueuePool, metrics_endpoint
+from app.db.database import get_db
+from app.models.purchase import Purchase
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.services.websocket_manager import ConnectionManager
+
+COUNTED = [("/items/{item_id}", "200"), ("/items/{item_id}", "422"), ("<unmatched>", "404")]
+
+
+def requests(route, status):
+    return REGISTRY.get_sample_value("http_requests_total", {"method": "GET", "route": route, "status": status}) or 0
+
+
+def test_http_metrics_are_labelled_by_route_template(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(HTTPMetricsMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"])
+    client = TestClient(app)
+    before = {status: requests(route, status) for route, status in COUNTED}
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/x")
+    client.get("/missing")
+    assert {status: requests(route, status) - before[status] for route, status in COUNTED} == {
+        "200": 2, "422": 1, "404": 1,
+    }
+    body = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"}' in body
+    assert 'route="/items/1"' not in body
+
+
+def test_metrics_require_the_token(monkeypatch):
+    app = FastAPI()
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"])
+    client = TestClient(app)
+    # No token configured: nothing is served, whatever the client sends
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).status_code == 200
+
+
+def test_runtime_gauges(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=3)
+    connections = ConnectionManager()
+    registry = CollectorRegistry()
+    registry.register(RuntimeCollector(engine, connections))
+    wallet_a, wallet_b, notifications = object(), object(), object()
+    asyncio.run(connections.connect(wallet_a, "u1", already_accepted=True, channel="wallet"))
+    asyncio.run(connections.connect(wallet_b, "u2", already_accepted=True, channel="wallet"))
+    asyncio.run(connections.connect(notifications, "u1", already_accepted=True, channel="notifications"))
+    connections.disconnect(wallet_b, "u2")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert registry.get_sample_value("db_pool_connections", {"state": "checked_out"}) == 1
+    assert registry.get_sample_value("db_pool_connections", {"state": "idle"}) == 1
+    assert registry.get_sample_value("db_pool_size") == 3
+    assert registry.get_sample_value("websocket_connections", {"channel": "wallet"}) == 1
+    assert registry.get_sample_value("websocket_connections", {"channel": "notifications"}) == 1
+
+
+def test_activating_a_qr_order_counts_the_purchase(pg_sessionmaker):
+    db = pg_sessionmaker()
+    user = User(id=uuid.uuid4(), email="buyer@example.com", role="USER", is_deleted=False)
+    workflow = Workflow(id=uuid.uuid4(), title="Sync", description="Sync sheets", price=99000)
+    db.add_all([user, workflow])
+    db.flush()
+    purchase = Purchase(id=uuid.uuid4(), user_id=user.id, workflow_id=workflow.id, amount=99000,
+                        status="PENDING", payment_method="QR")
+    db.add(purchase)
+    db.commit()
+    purchase_id = purchase.id
+    db.close()
+
+    app = FastAPI()
+    app.include_router(admin_purchases_router.router)
+
+    def override_get_db():
+        session = pg_sessionmaker()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[admin_purchases_router.get_current_admin] = lambda: None
+    client = TestClient(app)
+
+    def purchases():
+        return REGISTRY.get_sample_value("purchases_total", {"payment_method": "QR", "status": "ACTIVE"}) or 0
+
+    def amount():
+        return REGISTRY.get_sample_value("purchase_amount_total", {"payment_method": "QR"}) or 0
+
+    before = purchases(), amount()
+    for _ in range(2):  # setting ACTIVE again is not a second sale
+        response = client.patch(f"/api/admin/purchases/{purchase_id}/status", json={"status": "ACTIVE"})
+        assert response.status_code == 200
+    assert (purchases() - before[0], amount() - before[1]) == (1, 99000)
@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+
+from app.services import outbox
+from app.services.outbox import ClaimedEvent, dispatch, register_handler
+
+
+def test_dispatch_delivers_in_order_and_isolates_failures():
+    delivered = []
+
+    @register_handler("test-sink")
+    async def sink(recipient, payload):
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+        delivered.append((recipient, payload["n"]))
+
+    events = [
+        ClaimedEvent(uuid.uuid4(), "test-sink", "u1", {"n": 1}, 1),
+        ClaimedEvent(uuid.uuid4(), "test-sink", "u1", {"n": 2, "fail": True}, 1),
+        ClaimedEvent(uuid.uuid4(), "test-sink", "u2", {"n": 3}, 1),
+        ClaimedEvent(uuid.uuid4(), "unknown", "u2", {"n": 4}, 1),
+    ]
+    try:
+        done, failed = asyncio.run(dispatch(events))
+    finally:
+        outbox._handlers.pop("test-sink")
+
+    assert delivered == [("u1", 1), ("u2", 3)]
+    assert done == [events[0].id, events[2].id]
+    assert [(event.id, error) for event, error in failed] == [
+        (events[1].id, "boom"),
+        (events[3].id, "No outbox handler for 'unknown'"),
+    ]
+
+
+class FakeWebSocket:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.received = []
+
+    async def send_json(self, message):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.received.append(message)
+
+
+def test_websocket_events_are_retried_only_after_a_failed_send(monkeypatch):
+    monkeypatch.setattr(outbox.manager, "active_connections", {})
+    monkeypatch.setattr(outbox.manager, "channels", {})
+
+    def event(recipient):
+        return ClaimedEvent(uuid.uuid4(), outbox.WEBSOCKET, recipient, {"type": "wallet_update"}, 1)
+
+    # Nobody to deliver to in this process: dropped, not retried
+    offline = event("u1")
+    done, failed = asyncio.run(dispatch([offline]))
+    assert done == [offline.id] and failed == []
+
+    socket, dead = FakeWebSocket(), FakeWebSocket(fail=True)
+    outbox.manager.active_connections["u1"] = {socket, dead}
+    partial = event("u1")
+    done, failed = asyncio.run(dispatch([partial]))
+    assert done == [] and failed[0][1] == "Sent to 1 of 2 connection(s)"
+    assert outbox.manager.active_connections["u1"] == {socket}
+
+    online = event("u1")
+    done, failed = asyncio.run(dispatch([online]))
+    assert done == [online.id] and failed == []
+    assert socket.received == [{"type": "wallet_update"}] * 2
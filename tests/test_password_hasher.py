@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.password_hasher import (
+    hash_cost, hash_password_sync, needs_rehash, verify_and_update, verify_password_sync,
+)
+
+PASSWORD = "correct horse battery"
+
+
+@pytest.fixture(autouse=True)
+def rounds(monkeypatch):
+    # Low costs keep the tests fast; only their order matters
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+
+def test_hash_cost_and_needs_rehash():
+    assert hash_cost(hash_password_sync(PASSWORD, rounds=4)) == 4
+    assert needs_rehash(hash_password_sync(PASSWORD, rounds=4)) is True
+    assert needs_rehash(hash_password_sync(PASSWORD)) is False
+    assert hash_cost("not a bcrypt hash") is None and needs_rehash("not a bcrypt hash") is True
+
+
+def test_lower_cost_hash_comes_back_upgraded():
+    old_hash = hash_password_sync(PASSWORD, rounds=4)
+    valid, new_hash = asyncio.run(verify_and_update(PASSWORD, old_hash))
+    assert valid is True
+    assert hash_cost(new_hash) == settings.BCRYPT_ROUNDS
+    assert verify_password_sync(PASSWORD, new_hash)
+
+
+def test_wrong_password_returns_no_new_hash():
+    old_hash = hash_password_sync(PASSWORD, rounds=4)
+    assert asyncio.run(verify_and_update("wrong password", old_hash)) == (False, None)
+
+
+def test_current_cost_hash_is_left_alone():
+    current = hash_password_sync(PASSWORD)
+    assert asyncio.run(verify_and_update(PASSWORD, current)) == (True, None)
+    assert asyncio.run(verify_and_update(PASSWORD, "malformed")) == (False, None)
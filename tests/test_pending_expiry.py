@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.enums import PurchaseStatus, TransactionStatus, TransactionType
+from app.models.notification import Notification
+from app.models.outbox_event import OutboxEvent
+from app.models.purchase import Purchase
+from app.models.user import User
+from app.models.wallet import Wallet, WalletTransaction
+from app.models.workflow import Workflow
+from app.services.scheduled_jobs import expire_pending_deposits, expire_pending_purchases
+
+
+@pytest.fixture
+def user_id(pg_db):
+    user = User(id=uuid.uuid4(), email="expiry@example.com", role="USER", is_deleted=False)
+    pg_db.add(user)
+    pg_db.flush()
+    pg_db.add(Wallet(id=uuid.uuid4(), user_id=user.id, balance=0, total_deposited=0, total_spent=0))
+    pg_db.commit()
+    return user.id
+
+
+def ago(minutes: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=minutes)
+
+
+def test_only_deposits_past_the_ttl_expire_and_are_notified_once(pg_db, user_id, monkeypatch):
+    monkeypatch.setattr(settings, "EXPIRY_SWEEP_BATCH_SIZE", 2)  # several batches
+    ttl = settings.DEPOSIT_PENDING_TTL_MINUTES
+    wallet_id = pg_db.query(Wallet.id).filter(Wallet.user_id == user_id).scalar()
+
+    def deposit(code, age, status=TransactionStatus.PENDING):
+        tx = WalletTransaction(id=uuid.uuid4(), wallet_id=wallet_id, transaction_type=TransactionType.DEPOSIT,
+                               amount=50000, status=status, transfer_code=code, created_at=ago(age))
+        pg_db.add(tx)
+        return tx.id
+
+    stale = [deposit(f"OLD{i}", ttl + 1 + i) for i in range(3)]
+    fresh = deposit("FRESH", ttl - 1)
+    paid = deposit("PAID", ttl + 10, TransactionStatus.SUCCESS)
+    pg_db.commit()
+
+    for _ in range(2):  # the second sweep finds nothing left to do
+        expire_pending_deposits(pg_db)
+
+    statuses = dict(pg_db.query(WalletTransaction.id, WalletTransaction.status).all())
+    assert {statuses[tx_id] for tx_id in stale} == {TransactionStatus.EXPIRED}
+    assert statuses[fresh] == TransactionStatus.PENDING
+    assert statuses[paid] == TransactionStatus.SUCCESS
+
+    notifications = pg_db.query(Notification.message).filter(Notification.user_id == user_id).all()
+    assert sorted(message.split("(code ")[1][:4] for message, in notifications) == ["OLD0", "OLD1", "OLD2"]
+    events = pg_db.query(OutboxEvent.payload).filter(OutboxEvent.recipient == str(user_id)).all()
+    assert sorted(payload["transaction"]["transfer_code"] for payload, in events) == ["OLD0", "OLD1", "OLD2"]
+
+
+def test_only_purchases_past_the_ttl_expire_and_are_notified_once(pg_db, user_id):
+    ttl = settings.PURCHASE_PENDING_TTL_MINUTES
+    workflow = Workflow(id=uuid.uuid4(), title="Sync", description="Sync sheets", price=99000)
+    pg_db.add(workflow)
+    pg_db.flush()
+
+    def purchase(age, status=PurchaseStatus.PENDING):
+        row = Purchase(id=uuid.uuid4(), user_id=user_id, workflow_id=workflow.id, amount=99000,
+                       status=status, created_at=ago(age))
+        pg_db.add(row)
+        return row.id
+
+    stale, fresh, paid = purchase(ttl + 1), purchase(ttl - 1), purchase(ttl + 1, PurchaseStatus.ACTIVE)
+    pg_db.commit()
+
+    expire_pending_purchases(pg_db)
+    expire_pending_purchases(pg_db)
+
+    statuses = dict(pg_db.query(Purchase.id, Purchase.status).all())
+    assert statuses == {stale: PurchaseStatus.EXPIRED, fresh: PurchaseStatus.PENDING, paid: PurchaseStatus.ACTIVE}
+    assert pg_db.query(Notification).filter(Notification.user_id == user_id).count() == 1
+    events = pg_db.query(OutboxEvent.payload).all()
+    assert [payload["order"]["id"] for payload, in events] == [str(stale)]
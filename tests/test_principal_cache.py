@@ -0,0 +1,124 @@
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from app.models.user import User
+from app.services import principal_cache as principal_cache_module
+from app.services.principal_cache import PrincipalCache, load_principal, principal_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(principal_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def cached_user() -> User:
+    return User(id=uuid.uuid4(), email=f"{uuid.uuid4()}@example.com")
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PrincipalCache(ttl_seconds=30, max_entries=10)
+    user = cached_user()
+    cache.put(user, cache.generation)
+    clock.now += 29
+    assert cache.get(str(user.id)) is user
+    clock.now += 1
+    assert cache.get(str(user.id)) is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+    first, second, third = cached_user(), cached_user(), cached_user()
+    cache.put(first, cache.generation)
+    cache.put(second, cache.generation)
+    assert cache.get(str(first.id)) is first  # second is now the oldest
+    cache.put(third, cache.generation)
+    assert cache.get(str(second.id)) is None
+    assert cache.get(str(first.id)) is first and cache.get(str(third.id)) is third
+
+
+def test_put_is_skipped_after_a_racing_invalidation():
+    cache = PrincipalCache(ttl_seconds=30, max_entries=10)
+    user = cached_user()
+    generation = cache.generation
+    cache.invalidate(uuid.uuid4())
+    cache.put(user, generation)
+    assert cache.get(str(user.id)) is None
+
+
+@pytest.fixture
+def user_id(pg_db):
+    principal_cache.clear()
+    user = User(id=uuid.uuid4(), email="principal@example.com", name="Before", role="USER", is_deleted=False)
+    pg_db.add(user)
+    pg_db.commit()
+    yield user.id
+    principal_cache.clear()
+
+
+def cached(user_id) -> bool:
+    return principal_cache.get(str(user_id)) is not None
+
+
+@pytest.mark.parametrize("change", [
+    {"is_deleted": True},  # ban
+    {"role": "ADMIN"},
+    {"name": "After"},
+])
+def test_orm_updates_invalidate_the_entry(pg_sessionmaker, user_id, change):
+    reader, writer = pg_sessionmaker(), pg_sessionmaker()
+    load_principal(reader, user_id)
+    assert cached(user_id)
+
+    user = writer.get(User, user_id)
+    for key, value in change.items():
+        setattr(user, key, value)
+    writer.commit()
+    assert not cached(user_id)
+
+    reader.rollback()
+    principal = load_principal(reader, user_id)
+    assert {key: getattr(principal, key) for key in change} == change
+    reader.close()
+    writer.close()
+
+
+def test_unban_invalidates_the_entry(pg_sessionmaker, user_id):
+    db = pg_sessionmaker()
+    db.get(User, user_id).is_deleted = True
+    db.commit()
+    assert load_principal(db, user_id).is_deleted is True
+
+    db.get(User, user_id).is_deleted = False
+    db.commit()
+    assert not cached(user_id)
+    assert load_principal(db, user_id).is_deleted is False
+    db.close()
+
+
+def test_bulk_updates_clear_the_cache(pg_db, user_id):
+    load_principal(pg_db, user_id)
+    pg_db.query(User).filter(User.id == user_id).update({User.role: "ADMIN"}, synchronize_session=False)
+    assert not cached(user_id)
+    # A load between the statement and the commit must not stay cached
+    pg_db.expire_all()
+    load_principal(pg_db, user_id)
+    pg_db.commit()
+    assert not cached(user_id)
+
+    load_principal(pg_db, user_id)
+    pg_db.execute(update(User).where(User.id == user_id).values(is_deleted=True))
+    pg_db.commit()
+    assert not cached(user_id)
+    assert load_principal(pg_db, user_id).is_deleted is True
@@ -0,0 +1,63 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.profiling import ProfilingMiddleware, StackSampler
+
+
+def busy_loop(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def make_client(directory, admin: bool = False, **options):
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():  # sync: runs in the threadpool
+        return {"iterations": busy_loop(0.1)}
+
+    async def authorize(headers):
+        return admin
+
+    app.add_middleware(ProfilingMiddleware, directory=str(directory), interval=0.001, authorize=authorize, **options)
+    return TestClient(app)
+
+
+def test_unselected_requests_are_not_profiled(tmp_path):
+    client = make_client(tmp_path)
+    assert "x-profile-id" not in client.get("/slow").headers
+    # The header alone is not enough without authorization
+    assert "x-profile-id" not in client.get("/slow", headers={"X-Profile": "1"}).headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_authorized_header_writes_collapsed_stacks(tmp_path):
+    client = make_client(tmp_path, admin=True)
+    response = client.get("/slow", headers={"X-Profile": "1"})
+    profile = tmp_path / f"{response.headers['x-profile-id']}.folded"
+    lines = profile.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any("busy_loop (" in line for line in lines)
+
+
+def test_sample_rate_and_max_files(tmp_path):
+    client = make_client(tmp_path, sample_rate=1.0, max_files=2)
+    ids = [client.get("/slow").headers["x-profile-id"] for _ in range(3)]
+    assert len(set(ids)) == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(f"{i}.folded" for i in ids)[1:]
+
+
+def test_sampler_skips_its_own_thread():
+    sampler = StackSampler(0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    assert sampler.samples > 0
+    assert all("stack-sampler" not in stack for stack in sampler.stacks)
@@ -0,0 +1,66 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.query_metrics import QueryMetricsMiddleware
+
+engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+
+def make_client(**options):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):  # sync: runs in the threadpool
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    @app.get("/async")
+    async def async_endpoint():
+        return {"ok": True}
+
+    app.add_middleware(QueryMetricsMiddleware, **{"default_budget": 3, **options})
+    return TestClient(app)
+
+
+def observed(name, route):
+    return REGISTRY.get_sample_value(name, {"method": "GET", "route": route}) or 0
+
+
+def test_server_timing_header_and_histograms_by_route_template():
+    client = make_client()
+    before = observed("http_request_db_queries_sum", "/items/{item_id}")
+    response = client.get("/items/2")
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="2 queries"' in response.headers["server-timing"]
+    client.get("/items/1")
+    assert observed("http_request_db_queries_sum", "/items/{item_id}") == before + 3
+    assert observed("http_request_db_queries_sum", "/items/1") == 0
+    assert 'desc="0 queries"' in client.get("/async").headers["server-timing"]
+
+
+def test_requests_over_budget_are_logged(caplog):
+    client = make_client(budgets={"GET /items/{item_id}": 4}, server_timing=False)
+    with caplog.at_level(logging.WARNING, logger="app.core.query_metrics"):
+        response = client.get("/items/4")
+        assert "server-timing" not in response.headers
+        assert not caplog.records
+        client.get("/items/5")
+    assert "GET /items/5 ran 5 queries (budget 4" in caplog.text
+
+
+def test_query_budget_fixture(query_budget):
+    client = make_client()
+    with query_budget(2) as counter:
+        client.get("/items/2")
+    assert counter.statements == ["SELECT 1", "SELECT 1"]
+    with pytest.raises(AssertionError, match="3 queries ran, budget is 2"):
+        with query_budget(2):
+            client.get("/items/3")
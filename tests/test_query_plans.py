@@ -0,0 +1,225 @@
+"""EXPLAIN the hot endpoint queries and check they are served by the intended index.
+
+The statements are not written here: each case calls the route or service
+that issues the query and the SQL it sends to the database is captured, so
+a change to a router's filters shows up in these plans. Everything runs in
+one transaction that is rolled back.
+
+Needs a real Postgres database, so it only runs when TEST_DATABASE_URL is set.
+The tables are created in a throwaway schema; with sequential scans disabled
+an empty table still shows which index the planner can use.
+
+Set QUERY_PLAN_DATABASE_URL to a database filled by benchmarks/generate_data.py
+instead to check the plans the planner actually picks at production scale:
+sequential scans stay enabled and the ids are taken from the data.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, List, NamedTuple
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.api.admin_workflows_router import router as admin_workflows_router
+from app.api.notifications_router import router as notifications_router
+from app.api.workflows_router import router as workflows_router
+from app.core.config import settings
+from app.db.database import Base, get_db
+from app.models import User, Wallet, WalletTransaction, Workflow
+from app.models.enums import TransactionStatus, TransactionType
+from app.services import pending_expiry
+from app.services.deposit_matcher import find_pending_deposit, pending_codes
+from app.services.token_service import token_service
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+QUERY_PLAN_DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not (TEST_DATABASE_URL or QUERY_PLAN_DATABASE_URL),
+                                reason="neither TEST_DATABASE_URL nor QUERY_PLAN_DATABASE_URL is set")
+
+SCHEMA = "query_plans_test"
+
+
+class Harness:
+    """The app's routers and a session, all on the planner's connection"""
+
+    def __init__(self, conn, user_id, workflow_id):
+        self.db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        admin = User(id=uuid.uuid4(), email=f"{uuid.uuid4()}@example.com", role="ADMIN", is_deleted=False)
+        self.db.add(admin)
+        if user_id is None:
+            user_id, workflow_id = uuid.uuid4(), uuid.uuid4()
+            self.db.add(User(id=user_id, email=f"{user_id}@example.com", role="USER", is_deleted=False))
+            self.db.add(Workflow(id=workflow_id, title="Sync", description="Sync", price=Decimal("99000")))
+            self._add_pending_deposits(user_id)
+        self.db.commit()
+        self.workflow_id = workflow_id
+        self.user = {"Authorization": f"Bearer {token_service.create_access_token(str(user_id))}"}
+        self.admin = {"Authorization": f"Bearer {token_service.create_access_token(str(admin.id))}"}
+
+        app = FastAPI()
+        app.include_router(workflows_router)
+        app.include_router(notifications_router, prefix="/api/notifications")
+        app.include_router(admin_workflows_router)
+
+        def override_get_db():
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        self.client = TestClient(app)
+
+    def _add_pending_deposits(self, user_id, count=2000) -> None:
+        """Without rows the partial pending-deposit index looks as cheap as the
+        transfer-code index for a lookup by code; a realistic backlog of
+        pending deposits (analyzed) lets the planner tell them apart.
+        """
+        wallet = Wallet(id=uuid.uuid4(), user_id=user_id, balance=0, total_deposited=0, total_spent=0)
+        self.db.add(wallet)
+        self.db.flush()
+        now = datetime.now(timezone.utc)
+        self.db.add_all(
+            WalletTransaction(id=uuid.uuid4(), wallet_id=wallet.id, transaction_type=TransactionType.DEPOSIT,
+                              amount=50000, status=TransactionStatus.PENDING, transfer_code=f"SEED{i:05d}",
+                              created_at=now - timedelta(minutes=i))
+            for i in range(count)
+        )
+        self.db.flush()
+        self.db.execute(text("ANALYZE wallet_transactions"))
+
+    def get(self, path: str, headers=None) -> None:
+        response = self.client.get(path, headers=headers)
+        assert response.status_code == 200, response.text
+
+
+class Case(NamedTuple):
+    table: str
+    marker: str  # identifies the statement to EXPLAIN among those the call runs
+    call: Callable[[Harness], None]
+
+
+CASES = {
+    # workflows listing: purchased ids to exclude
+    "idx_purchases_user_status": Case(
+        "purchases", "purchases.user_id = ", lambda h: h.get("/api/workflows/", h.user)),
+    # admin workflow detail: sales count
+    "idx_purchases_workflow_status": Case(
+        "purchases", "purchases.workflow_id = ",
+        lambda h: h.get(f"/api/admin/workflows/{h.workflow_id}", h.admin)),
+    # workflow detail: wishlist count
+    "idx_favorites_workflow_id": Case(
+        "favorites", "count(favorites.id)", lambda h: h.get(f"/api/workflows/{h.workflow_id}", h.user)),
+    # workflow detail: rating count
+    "idx_comments_workflow_id": Case(
+        "comments", "count(comments.id)", lambda h: h.get(f"/api/workflows/{h.workflow_id}", h.user)),
+    # notifications list
+    "idx_notifications_user_unread_created": Case(
+        "notifications", "FROM notifications", lambda h: h.get("/api/notifications/", h.user)),
+    # featured workflows
+    "idx_workflows_status_popularity": Case(
+        "workflows", "ORDER BY workflows.downloads_count DESC", lambda h: h.get("/api/workflows/feature")),
+    # Sepay webhook: transfer code lookup
+    "uq_wallet_transactions_transfer_code": Case(
+        "wallet_transactions", "upper(wallet_transactions.transfer_code) IN",
+        lambda h: find_pending_deposit(h.db, "MBVCB.123.NAP ABC123.CT", 50000)),
+    # expiry sweepers
+    "idx_wallet_transactions_pending_deposits": Case(
+        "wallet_transactions", "UPDATE wallet_transactions",
+        lambda h: pending_expiry.expire_deposits(h.db, settings.DEPOSIT_PENDING_TTL_MINUTES, 500)),
+    "idx_purchases_pending_created": Case(
+        "purchases", "UPDATE purchases",
+        lambda h: pending_expiry.expire_purchases(h.db, settings.PURCHASE_PENDING_TTL_MINUTES, 500)),
+}
+
+INDEXES = sorted(CASES)
+
+
+def _generated_data():
+    engine = create_engine(QUERY_PLAN_DATABASE_URL)
+    with engine.connect() as conn:
+        # A buyer at the 99th percentile of purchases and a workflow at the 99th
+        # popularity percentile: hot, but not the single hottest
+        user_id = conn.execute(text(
+            "SELECT user_id FROM purchases WHERE status = 'ACTIVE' GROUP BY user_id ORDER BY count(*) DESC "
+            "OFFSET (SELECT count(DISTINCT user_id) / 100 FROM purchases WHERE status = 'ACTIVE') LIMIT 1")).scalar()
+        workflow_id = conn.execute(text(
+            "SELECT id FROM workflows ORDER BY downloads_count DESC "
+            "OFFSET (SELECT count(*) / 100 FROM workflows) LIMIT 1")).scalar()
+        if user_id is None or workflow_id is None:
+            pytest.skip("QUERY_PLAN_DATABASE_URL has no generated purchases or workflows")
+        yield conn, user_id, workflow_id
+    engine.dispose()
+
+
+def _empty_schema():
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        conn.commit()
+        yield conn, None, None
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def planner():
+    yield from (_generated_data() if QUERY_PLAN_DATABASE_URL else _empty_schema())
+
+
+@pytest.fixture(scope="module")
+def harness(planner):
+    """Runs the cases in one transaction, rolled back at the end"""
+    conn, user_id, workflow_id = planner
+    transaction = conn.begin()
+    harness = Harness(conn, user_id, workflow_id)
+    yield harness
+    harness.db.close()
+    transaction.rollback()
+
+
+def capture(conn, call) -> List[tuple]:
+    """(statement, parameters) of every statement `call` sends on conn"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(conn, "before_cursor_execute", record)
+    return statements
+
+
+def explain(conn, statement: str, parameters) -> str:
+    return "\n".join(row[0] for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters or {}))
+
+
+@pytest.mark.parametrize("index_name", INDEXES)
+def test_query_uses_index(planner, harness, index_name):
+    conn = planner[0]
+    case = CASES[index_name]
+    if QUERY_PLAN_DATABASE_URL:
+        if not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {case.table})")).scalar():
+            pytest.skip(f"{case.table} has no generated rows")
+    pending_codes.invalidate()
+    statements = [(sql, params) for sql, params in capture(conn, lambda: case.call(harness)) if case.marker in sql]
+    assert statements, f"no statement containing {case.marker!r} was run"
+    for sql, params in statements:
+        plan = explain(conn, sql, params)
+        assert index_name in plan, f"{sql}\n{plan}"
+        assert f"Seq Scan on {case.table}" not in plan, f"{sql}\n{plan}"
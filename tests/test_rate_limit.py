@@ -0,0 +1,51 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import InMemoryTokenBuckets, RateLimitMiddleware, RateLimitRule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(rules, clock):
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login(request: Request):
+        return {"email": (await request.json())["email"]}
+
+    @app.get("/open")
+    async def open_endpoint():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, rules=rules, buckets=InMemoryTokenBuckets(clock=clock))
+    return TestClient(app)
+
+
+def test_ip_bucket_returns_429_with_retry_after():
+    clock = FakeClock()
+    client = make_client([RateLimitRule("login", "POST", "/login", "ip", 2, 60)], clock)
+    body = {"email": "a@example.com"}
+    assert client.post("/login", json=body).status_code == 200
+    assert client.post("/login", json=body).status_code == 200
+    response = client.post("/login", json=body)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    # Unlimited routes are untouched
+    assert client.get("/open").status_code == 200
+    clock.now += 30
+    assert client.post("/login", json=body).status_code == 200
+
+
+def test_account_bucket_is_keyed_by_email_and_body_is_replayed():
+    clock = FakeClock()
+    client = make_client([RateLimitRule("login", "POST", "/login", "account", 1, 60)], clock)
+    response = client.post("/login", json={"email": "A@example.com"})
+    assert response.json() == {"email": "A@example.com"}
+    assert client.post("/login", json={"email": "a@example.com "}).status_code == 429
+    assert client.post("/login", json={"email": "b@example.com"}).status_code == 200
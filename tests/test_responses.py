@@ -0,0 +1,47 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.core.responses import FastJSONResponse
+
+
+class Item(BaseModel):
+    id: str
+    price: float
+
+
+def test_renders_values_json_cannot():
+    item_id = uuid.uuid4()
+    at = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    body = FastJSONResponse({
+        "id": item_id, "price": Decimal("99000.50"), "at": at, "item": Item(id="a", price=1), 1: "non-str key",
+    }).body
+    assert json.loads(body) == {
+        "id": str(item_id), "price": 99000.5, "at": at.isoformat(), "item": {"id": "a", "price": 1.0},
+        "1": "non-str key",
+    }
+
+
+def test_returned_rows_skip_response_model_validation():
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/items", response_model=List[Item])
+    def trusted():
+        # Would fail validation (price is not a number) if FastAPI re-validated it
+        return FastJSONResponse([{"id": "a", "price": "unchecked"}])
+
+    @app.get("/validated", response_model=List[Item])
+    def validated():
+        return [{"id": "a", "price": "2", "extra": True}]
+
+    client = TestClient(app)
+    assert client.get("/items").json() == [{"id": "a", "price": "unchecked"}]
+    response = client.get("/validated")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [{"id": "a", "price": 2.0}]
@@ -0,0 +1,84 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.enums import EmailStatus, InboxStatus, OutboxStatus
+from app.models.outbound_email import OutboundEmail
+from app.models.outbox_event import OutboxEvent
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.models.webhook_inbox import WebhookInbox
+from app.services.scheduled_jobs import (
+    purge_ended_sessions, purge_outbound_emails, purge_outbox_events, purge_webhook_inbox,
+)
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "PURGE_BATCH_SIZE", 1)  # several batches
+
+
+def days_ago(days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def remaining(db, column) -> set:
+    return {value for value, in db.query(column).all()}
+
+
+def test_outbox_events_past_retention_are_purged(pg_db):
+    old = settings.OUTBOX_RETENTION_DAYS + 1
+
+    def add(name, status, age):
+        pg_db.add(OutboxEvent(event_type="websocket", recipient=name, payload={}, status=status,
+                              created_at=days_ago(age)))
+
+    add("done", OutboxStatus.DONE, old)
+    add("failed", OutboxStatus.FAILED, old)
+    add("pending", OutboxStatus.PENDING, old)
+    add("recent", OutboxStatus.DONE, 0)
+    pg_db.commit()
+    purge_outbox_events(pg_db)
+    assert remaining(pg_db, OutboxEvent.recipient) == {"pending", "recent"}
+
+
+def test_webhook_inbox_past_retention_is_purged(pg_db):
+    old = settings.WEBHOOK_RETENTION_DAYS + 1
+    for tx_id, status, age in [("id:done", InboxStatus.DONE, old), ("id:failed", InboxStatus.FAILED, old),
+                               ("id:processing", InboxStatus.PROCESSING, old), ("id:recent", InboxStatus.DONE, 0)]:
+        pg_db.add(WebhookInbox(provider="sepay", provider_tx_id=tx_id, payload={}, status=status,
+                               created_at=days_ago(age)))
+    pg_db.commit()
+    purge_webhook_inbox(pg_db)
+    assert remaining(pg_db, WebhookInbox.provider_tx_id) == {"id:processing", "id:recent"}
+
+
+def test_outbound_emails_past_retention_are_purged(pg_db):
+    old = settings.EMAIL_RETENTION_DAYS + 1
+    for recipient, status, age in [("sent@example.com", EmailStatus.SENT, old),
+                                   ("failed@example.com", EmailStatus.FAILED, old),
+                                   ("pending@example.com", EmailStatus.PENDING, old),
+                                   ("recent@example.com", EmailStatus.SENT, 0)]:
+        pg_db.add(OutboundEmail(recipient=recipient, subject="Hi", html_body="<p>Hi</p>", status=status,
+                                created_at=days_ago(age)))
+    pg_db.commit()
+    purge_outbound_emails(pg_db)
+    assert remaining(pg_db, OutboundEmail.recipient) == {"pending@example.com", "recent@example.com"}
+
+
+def test_sessions_ended_before_retention_are_purged(pg_db):
+    user = User(id=uuid.uuid4(), email="retention@example.com", role="USER", is_deleted=False)
+    pg_db.add(user)
+    pg_db.flush()
+    old = settings.SESSION_RETENTION_DAYS + 1
+    for agent, expires_at, revoked_at in [("expired", days_ago(old), None),
+                                          ("revoked", days_ago(-7), days_ago(old)),
+                                          ("recently revoked", days_ago(-7), days_ago(1)),
+                                          ("active", days_ago(-7), None)]:
+        pg_db.add(UserSession(user_id=user.id, refresh_token_hash=uuid.uuid4().hex, user_agent=agent,
+                              expires_at=expires_at, revoked_at=revoked_at))
+    pg_db.commit()
+    purge_ended_sessions(pg_db)
+    assert remaining(pg_db, UserSession.user_agent) == {"recently revoked", "active"}
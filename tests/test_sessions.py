@@ -0,0 +1,121 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.auth_router import router
+from app.core.config import settings
+from app.db.database import get_db
+from app.models.user import User
+from app.models.user_session import UserSession
+from app.services.password_hasher import hash_password_sync
+
+PASSWORD = "correct horse battery"
+
+
+@pytest.fixture
+def client(pg_sessionmaker):
+    app = FastAPI()
+    app.include_router(router)
+
+    def override_get_db():
+        db = pg_sessionmaker()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    db = pg_sessionmaker()
+    db.add(User(id=uuid.uuid4(), email="sessions@example.com", role="USER", is_deleted=False,
+                password_hash=hash_password_sync(PASSWORD, rounds=4)))
+    db.commit()
+    db.close()
+    return TestClient(app)
+
+
+def login(client, user_agent="laptop") -> dict:
+    response = client.post("/api/auth/login", json={"email": "sessions@example.com", "password": PASSWORD},
+                           headers={"user-agent": user_agent})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def refresh(client, tokens: dict):
+    return client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+
+def sessions(client, tokens: dict):
+    return client.get("/api/auth/sessions", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+
+def test_refresh_rotates_the_token_and_lists_the_session(client):
+    first = login(client)
+    second = refresh(client, first).json()
+    assert second["refresh_token"] != first["refresh_token"]
+    third = refresh(client, second)
+    assert third.status_code == 200
+
+    listed = sessions(client, third.json()).json()
+    assert len(listed) == 1
+    assert listed[0]["user_agent"] == "laptop" and listed[0]["current"] is True
+
+
+def test_previous_token_is_accepted_within_the_grace_window(client):
+    first = login(client)
+    assert refresh(client, first).status_code == 200
+    # A concurrent tab presenting the same token a moment later
+    retried = refresh(client, first)
+    assert retried.status_code == 200
+    assert sessions(client, retried.json()).status_code == 200
+
+
+def test_both_tabs_keep_a_valid_token_after_a_grace_retry(client):
+    first = login(client)
+    tab_a = refresh(client, first).json()
+    tab_b = refresh(client, first).json()
+    # The retry gets the refresh token of the first rotation back
+    assert tab_b["refresh_token"] == tab_a["refresh_token"]
+
+    # Whichever response the client stored last, its next refresh works
+    assert refresh(client, tab_a).status_code == 200
+
+
+def test_reuse_after_the_grace_window_revokes_the_session(client, pg_db, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_REUSE_GRACE_SECONDS", 0)
+    first = login(client)
+    second = refresh(client, first).json()
+
+    replayed = refresh(client, first)
+    assert replayed.status_code == 401
+    assert pg_db.query(UserSession.revoked_at).scalar() is not None
+    # The whole session is gone: its newest refresh token and access token too
+    assert refresh(client, second).status_code == 401
+    assert sessions(client, second).status_code == 401
+
+
+def test_revoking_a_session_rejects_its_access_tokens(client):
+    laptop, phone = login(client), login(client, user_agent="phone")
+    listed = sessions(client, laptop).json()
+    assert sorted(s["user_agent"] for s in listed) == ["laptop", "phone"]
+    phone_id = next(s["id"] for s in listed if s["user_agent"] == "phone")
+
+    response = client.delete(f"/api/auth/sessions/{phone_id}",
+                             headers={"Authorization": f"Bearer {laptop['access_token']}"})
+    assert response.status_code == 200
+    assert sessions(client, phone).status_code == 401
+    assert refresh(client, phone).status_code == 401
+    assert [s["user_agent"] for s in sessions(client, laptop).json()] == ["laptop"]
+
+
+def test_logout_all_revokes_every_session(client):
+    laptop, phone = login(client), login(client, user_agent="phone")
+    response = client.post("/api/auth/logout-all", headers={"Authorization": f"Bearer {laptop['access_token']}"})
+    assert response.status_code == 200, response.text
+    assert response.json()["message"] == "Logged out of 2 session(s)"
+
+    for tokens in (laptop, phone):
+        assert sessions(client, tokens).status_code == 401
+        assert refresh(client, tokens).status_code == 401
+    assert sessions(client, login(client)).json()[0]["current"] is True
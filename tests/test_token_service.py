@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from app.services import token_service as token_service_module
+from app.services.token_service import REFRESH, ExpiredTokenError, TokenError, TokenService
+
+OLD_KEY = "o" * 32
+NEW_KEY = "n" * 32
+
+
+def make_service(keys=None, active_kid="2024-01", audience="usitech-api", **kwargs) -> TokenService:
+    return TokenService(keys or {"2024-01": OLD_KEY}, active_kid, "HS256", audience, **kwargs)
+
+
+def test_rotated_keys_verify_by_kid():
+    old_token = make_service().create_access_token("user-1")
+    rotated = make_service({"2024-01": OLD_KEY, "2024-06": NEW_KEY}, "2024-06")
+    new_token = rotated.create_access_token("user-2")
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "2024-06"
+    assert rotated.decode(old_token)["sub"] == "user-1"
+    assert rotated.decode(new_token)["sub"] == "user-2"
+
+    # Once the old key is dropped its tokens are rejected
+    retired = make_service({"2024-06": NEW_KEY}, "2024-06")
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        retired.decode(old_token)
+
+
+def test_unknown_kid_is_rejected():
+    forged = jwt.encode({"sub": "user-1", "exp": time.time() + 60}, OLD_KEY, headers={"kid": "nope"})
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        make_service().decode(forged)
+    with pytest.raises(ValueError, match="not configured"):
+        make_service(active_kid="missing")
+
+
+def legacy_token(iat: float, exp: float) -> str:
+    return jwt.encode({"sub": "user-1", "type": "access", "iat": int(iat), "exp": int(exp)}, OLD_KEY)
+
+
+def test_legacy_tokens_need_an_opt_in_cutoff():
+    now = time.time()
+    old_token = legacy_token(now - 3600, now + 600)
+    with pytest.raises(TokenError, match="Unknown signing key"):
+        make_service(legacy_key=OLD_KEY).decode(old_token)
+
+    cutoff = datetime.fromtimestamp(now - 60, timezone.utc)
+    service = make_service(legacy_key=OLD_KEY, legacy_issued_before=cutoff)
+    assert service.decode(old_token)["sub"] == "user-1"
+    # A token minted with the old key after the cutoff, or backdated but long-lived
+    with pytest.raises(TokenError, match="cutoff"):
+        service.decode(legacy_token(now, now + 600))
+    with pytest.raises(TokenError, match="cutoff"):
+        service.decode(legacy_token(now - 3600, now + 365 * 86400))
+    with pytest.raises(TokenError, match="Invalid token"):
+        service.decode(jwt.encode({"sub": "user-1", "exp": int(now + 600)}, OLD_KEY))
+
+
+def test_audience_and_type_must_match():
+    service = make_service()
+    other_api = make_service(audience="other-api").create_access_token("user-1")
+    with pytest.raises(TokenError, match="audience"):
+        service.decode(other_api)
+    # Signed tokens must name the audience
+    no_audience = jwt.encode({"sub": "user-1", "exp": time.time() + 60}, OLD_KEY, headers={"kid": "2024-01"})
+    with pytest.raises(TokenError, match="Invalid token"):
+        service.decode(no_audience)
+
+    refresh = service.create_refresh_token("user-1")
+    with pytest.raises(TokenError, match="type"):
+        service.decode(refresh)
+    assert service.decode(refresh, expected_type=REFRESH)["sub"] == "user-1"
+
+
+def test_expired_token_is_rejected():
+    service = make_service()
+    with pytest.raises(ExpiredTokenError):
+        service.decode(service.create_access_token("user-1", expires_delta=timedelta(seconds=-1)))
+
+
+def test_decode_cache_hit_still_checks_expiry(monkeypatch):
+    service = make_service(cache_size=8)
+    token = service.create_access_token("user-1", expires_delta=timedelta(minutes=5))
+    assert service.decode(token)["sub"] == "user-1"
+
+    def not_verified(token):
+        raise AssertionError("cache hit expected")
+
+    monkeypatch.setattr(service, "_verify", not_verified)
+    assert service.decode(token)["sub"] == "user-1"
+
+    now = time.time()
+    monkeypatch.setattr(token_service_module.time, "time", lambda: now + 301)
+    with pytest.raises(ExpiredTokenError):
+        service.decode(token)
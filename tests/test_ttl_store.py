@@ -0,0 +1,81 @@
+import pytest
+
+from app.core.config import settings
+from app.services.token_service import RevokedTokenError, TokenService
+from app.services.ttl_store import InMemoryTTLStore, create_store
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    store = InMemoryTTLStore(clock=clock)
+    store.set("a@example.com", {"otp": "123456"}, ttl_seconds=600)
+    assert store.get("a@example.com") == {"otp": "123456"}
+    clock.now += 601
+    assert store.get("a@example.com") is None
+    assert len(store) == 0
+
+
+def test_replace_keeps_expiry():
+    clock = FakeClock()
+    store = InMemoryTTLStore(clock=clock)
+    store.set("k", {"verified": False}, ttl_seconds=10)
+    clock.now += 5
+    assert store.replace("k", {"verified": True})
+    assert store.get("k") == {"verified": True}
+    clock.now += 6
+    assert store.get("k") is None
+    assert not store.replace("k", {"verified": True})
+
+
+def test_memory_is_bounded():
+    clock = FakeClock()
+    store = InMemoryTTLStore(max_entries=3, clock=clock)
+    for i in range(5):
+        store.set(str(i), {"i": i}, ttl_seconds=60)
+    assert len(store) == 3
+    assert store.get("0") is None and store.get("4") == {"i": 4}
+    # Writes sweep expired entries without anyone reading them
+    clock.now += 61
+    store.set("fresh", {}, ttl_seconds=60)
+    assert len(store) == 1
+
+
+def test_unbounded_store_keeps_live_entries():
+    clock = FakeClock()
+    store = InMemoryTTLStore(max_entries=None, clock=clock)
+    for i in range(5):
+        store.set(str(i), {}, ttl_seconds=60)
+    assert len(store) == 5 and store.exists("0")
+    clock.now += 61
+    store.set("fresh", {}, ttl_seconds=60)
+    assert len(store) == 1
+
+
+def test_revocations_survive_a_burst(monkeypatch):
+    monkeypatch.setattr(settings, "STORE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "TTL_STORE_MAX_ENTRIES", 2)
+    service = TokenService({"k1": "x" * 32}, "k1", "HS256", "usitech-api",
+                           revocations=create_store("revoked-jti", evict=False))
+    token = service.create_access_token("user-1")
+    service.revoke(service.decode(token))
+    for i in range(5):
+        service.revoke_session(f"session-{i}", ttl_seconds=60)
+    with pytest.raises(RevokedTokenError):
+        service.decode(token)
+
+
+def test_revoked_jti_is_rejected():
+    service = TokenService({"k1": "x" * 32}, "k1", "HS256", "usitech-api", revocations=InMemoryTTLStore())
+    token = service.create_access_token("user-1")
+    payload = service.decode(token)
+    service.revoke(payload)
+    with pytest.raises(RevokedTokenError):
+        service.decode(token)
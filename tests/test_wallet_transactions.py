@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.wallet_router import _decode_cursor, _encode_cursor, router
+from app.db.database import get_db
+from app.models.enums import TransactionStatus, TransactionType
+from app.models.user import User
+from app.models.wallet import Wallet, WalletTransaction
+from app.services.token_service import token_service
+
+NOW = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def client(pg_sessionmaker):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/wallet")
+
+    def override_get_db():
+        db = pg_sessionmaker()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def wallet(pg_db):
+    user = User(id=uuid.uuid4(), email="wallet@example.com", role="USER", is_deleted=False)
+    wallet = Wallet(id=uuid.uuid4(), user_id=user.id, balance=0, total_deposited=0, total_spent=0)
+    pg_db.add_all([user, wallet])
+    pg_db.commit()
+    return wallet
+
+
+def add_transaction(db, wallet, minutes_ago, transaction_type=TransactionType.DEPOSIT,
+                    status=TransactionStatus.SUCCESS, amount=50000) -> WalletTransaction:
+    tx = WalletTransaction(id=uuid.uuid4(), wallet_id=wallet.id, transaction_type=transaction_type,
+                           amount=amount, status=status, created_at=NOW - timedelta(minutes=minutes_ago))
+    db.add(tx)
+    db.commit()
+    return tx
+
+
+def get_page(client, wallet, **params):
+    token = token_service.create_access_token(str(wallet.user_id))
+    response = client.get("/api/wallet/transactions", params=params, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_pages_walk_newest_first_by_created_at_then_id(client, pg_db, wallet):
+    # Two transactions share a timestamp: id breaks the tie
+    transactions = [add_transaction(pg_db, wallet, minutes) for minutes in (0, 5, 5, 10, 20)]
+    expected = [str(tx.id) for tx in sorted(transactions, key=lambda tx: (tx.created_at, tx.id), reverse=True)]
+
+    seen, cursor = [], None
+    while True:
+        page = get_page(client, wallet, limit=2, **({"cursor": cursor} if cursor else {}))
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_cursor_round_trip_and_bad_cursor(client, pg_db, wallet):
+    tx = add_transaction(pg_db, wallet, 3)
+    assert _decode_cursor(_encode_cursor(tx)) == (tx.created_at, tx.id)
+
+    token = token_service.create_access_token(str(wallet.user_id))
+    response = client.get("/api/wallet/transactions", params={"cursor": "not-a-cursor"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_filters_and_first_page_summary(client, pg_db, wallet):
+    deposit = add_transaction(pg_db, wallet, 10)
+    add_transaction(pg_db, wallet, 20, amount=20000)
+    add_transaction(pg_db, wallet, 30, status=TransactionStatus.FAILED)
+    purchase = add_transaction(pg_db, wallet, 15, transaction_type=TransactionType.PURCHASE, amount=30000)
+    add_transaction(pg_db, wallet, 60 * 24)  # outside the date range below
+
+    date_range = {"date_from": (NOW - timedelta(hours=1)).isoformat(), "date_to": NOW.isoformat()}
+    page = get_page(client, wallet, status="SUCCESS", limit=2, **date_range)
+    assert [item["id"] for item in page["items"]] == [str(deposit.id), str(purchase.id)]
+    assert page["summary"] == {
+        "DEPOSIT": {"count": 2, "total_amount": 70000.0},
+        "PURCHASE": {"count": 1, "total_amount": 30000.0},
+    }
+
+    # Later pages leave the summary out
+    next_page = get_page(client, wallet, status="SUCCESS", limit=2, cursor=page["next_cursor"], **date_range)
+    assert len(next_page["items"]) == 1 and next_page["next_cursor"] is None
+    assert next_page["summary"] is None
+
+    purchases = get_page(client, wallet, transaction_type="PURCHASE")
+    assert [item["id"] for item in purchases["items"]] == [str(purchase.id)]
+    assert get_page(client, wallet, transaction_type="REFUND") == {"items": [], "next_cursor": None, "summary": {}}
@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import webhook_router
+from app.core.config import settings
+from app.db.database import get_db
+from app.models.enums import InboxStatus
+from app.models.webhook_inbox import WebhookInbox
+from app.services import webhook_inbox
+from app.services.webhook_inbox import SEPAY, claim_batch, process_entry, sepay_transaction_id, store_webhook
+
+
+def test_transaction_id_prefers_sepay_ids_then_body_digest():
+    body = b'{"content": "NAP ABCD1234"}'
+    assert sepay_transaction_id({"id": 92704, "referenceCode": "FT1"}, body) == "id:92704"
+    assert sepay_transaction_id({"id": "", "referenceCode": "FT1"}, body) == "referenceCode:FT1"
+    digest = sepay_transaction_id({"content": "NAP ABCD1234"}, body)
+    assert digest.startswith("sha256:") and digest == sepay_transaction_id({}, body)
+    assert digest != sepay_transaction_id({}, body + b" ")
+
+
+@pytest.fixture
+def inbox(pg_sessionmaker, monkeypatch):
+    """The inbox functions open their sessions on the test schema"""
+    monkeypatch.setattr(webhook_inbox, "SessionLocal", pg_sessionmaker)
+    return pg_sessionmaker
+
+
+def add_entry(db, tx_id="id:1", **values) -> WebhookInbox:
+    entry = WebhookInbox(provider=SEPAY, provider_tx_id=tx_id, payload={"id": 1}, **values)
+    db.add(entry)
+    db.commit()
+    return entry
+
+
+def test_duplicate_webhook_is_acked_without_a_second_row(inbox, monkeypatch):
+    app = FastAPI()
+    app.include_router(webhook_router.router)
+
+    def override_get_db():
+        db = inbox()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    wakes = []
+    monkeypatch.setattr(webhook_router.webhook_worker, "wake", lambda: wakes.append(1))
+    client = TestClient(app)
+
+    body = json.dumps({"id": 92704, "content": "NAP ABCD1234", "transferAmount": 50000})
+    for _ in range(2):
+        response = client.post("/api/webhook/sepay", content=body, headers={"content-type": "application/json"})
+        assert response.status_code == 200 and response.json()["success"] is True
+    assert len(wakes) == 1
+
+    db = inbox()
+    assert db.query(WebhookInbox.provider_tx_id).all() == [("id:92704",)]
+    assert store_webhook(db, SEPAY, "id:92704", {"id": 92704}) is False
+    db.close()
+
+
+def test_failures_back_off_exponentially_then_fail(inbox, monkeypatch):
+    def broken(db, payload):
+        raise RuntimeError("matcher down")
+
+    monkeypatch.setattr(webhook_inbox, "apply_sepay_payload", broken)
+    db = inbox()
+    entry_id = add_entry(db).id
+
+    for attempt in range(1, settings.WEBHOOK_MAX_ATTEMPTS + 1):
+        # Make the retry due now instead of waiting for it
+        db.query(WebhookInbox).update({WebhookInbox.next_attempt_at: datetime.now(timezone.utc)})
+        db.commit()
+        assert claim_batch(10) == [entry_id]
+        before = datetime.now(timezone.utc)
+        assert process_entry(entry_id) is False
+
+        db.expire_all()
+        entry = db.get(WebhookInbox, entry_id)
+        assert entry.attempts == attempt and entry.last_error == "matcher down"
+        assert entry.locked_at is None
+        if attempt < settings.WEBHOOK_MAX_ATTEMPTS:
+            assert entry.status == InboxStatus.PENDING
+            delay = (entry.next_attempt_at - before).total_seconds()
+            expected = settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+            assert expected <= delay < expected + 5
+
+    assert entry.status == InboxStatus.FAILED
+    db.query(WebhookInbox).update({WebhookInbox.next_attempt_at: datetime.now(timezone.utc)})
+    db.commit()
+    assert claim_batch(10) == []
+    db.close()
+
+
+def test_claim_skips_fresh_locks_and_reclaims_stale_ones(inbox):
+    now = datetime.now(timezone.utc)
+    timeout = timedelta(seconds=settings.WEBHOOK_LOCK_TIMEOUT_SECONDS)
+    db = inbox()
+    due = add_entry(db, "id:due")
+    add_entry(db, "id:later", next_attempt_at=now + timedelta(minutes=5))
+    add_entry(db, "id:working", status=InboxStatus.PROCESSING, locked_at=now - timeout / 2, attempts=1)
+    crashed = add_entry(db, "id:crashed", status=InboxStatus.PROCESSING, locked_at=now - timeout * 2, attempts=1)
+
+    assert set(claim_batch(10)) == {due.id, crashed.id}
+    db.expire_all()
+    reclaimed = db.get(WebhookInbox, crashed.id)
+    assert reclaimed.status == InboxStatus.PROCESSING and reclaimed.attempts == 2
+    assert reclaimed.locked_at > now
+    # Both are locked again now
+    assert claim_batch(10) == []
+    db.close()
@@ -0,0 +1,52 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models import Purchase, Workflow
+from app.services.workflow_fields import (
+    LISTING_FIELDS, WORKFLOW_FIELDS, parse_fields, workflow_load_options, workflow_row,
+)
+
+
+def compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_parse_fields():
+    assert parse_fields(None) == LISTING_FIELDS
+    assert "flow" not in LISTING_FIELDS and "description" not in LISTING_FIELDS
+    # WorkflowResponse order, id always included, blanks and duplicates ignored
+    assert parse_fields("price, title,,price") == ("id", "title", "price")
+    assert parse_fields("flow") == ("id", "flow")
+    with pytest.raises(ValueError, match="Unknown fields: password_hash"):
+        parse_fields("title,password_hash")
+
+
+def test_load_options_skip_unrequested_columns_and_relationships():
+    sql = compiled(select(Workflow).options(*workflow_load_options(("id", "title", "price"))))
+    assert "workflows.title" in sql and "workflows.price" in sql
+    assert "workflows.flow" not in sql and "workflows.description" not in sql
+    assert "JOIN" not in sql
+
+    sql = compiled(select(Workflow).options(*workflow_load_options(LISTING_FIELDS)))
+    assert "workflows.flow" not in sql
+    assert "workflow_categories" in sql and "workflow_assets" in sql and "favorites" in sql
+
+    sql = compiled(select(Workflow).options(*workflow_load_options(WORKFLOW_FIELDS)))
+    assert "workflows.flow" in sql and "workflows.description" in sql
+
+
+def test_load_options_through_a_relationship():
+    sql = compiled(select(Purchase).options(*workflow_load_options(("id", "title"), through=Purchase.workflow)))
+    assert "workflows_1.title" in sql
+    assert "workflows_1.flow" not in sql
+
+
+def test_workflow_row_only_has_requested_fields():
+    workflow = Workflow(id=uuid.uuid4(), title="Sync", price=Decimal("99000"), flow={"nodes": []})
+    assert workflow_row(workflow, ("id", "title", "price", "is_like"), is_like=True) == {
+        "id": str(workflow.id), "title": "Sync", "price": 99000.0, "is_like": True,
+    }
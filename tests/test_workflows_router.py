@@ -0,0 +1,88 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.routing import Match
+
+from app.api.workflows_router import router, search_workflows
+from app.db.database import get_db
+from app.models import Favorite, User, Workflow
+from app.schemas.workflow import WorkflowListingResponse
+from app.services.token_service import token_service
+from app.services.workflow_fields import WORKFLOW_FIELDS
+
+
+def first_match(path: str):
+    scope = {"type": "http", "method": "GET", "path": path, "root_path": ""}
+    return next(route for route in router.routes if route.matches(scope)[0] == Match.FULL)
+
+
+def test_search_is_not_shadowed_by_the_detail_route():
+    assert first_match("/api/workflows/search").endpoint is search_workflows
+
+
+def test_listing_schema_only_requires_id():
+    app = FastAPI()
+    app.include_router(router)
+    openapi = app.openapi()
+    assert openapi["components"]["schemas"]["WorkflowListingResponse"]["required"] == ["id"]
+    assert tuple(WorkflowListingResponse.model_fields) == WORKFLOW_FIELDS
+    for path in ("/api/workflows/", "/api/workflows/feature", "/api/workflows/search"):
+        schema = openapi["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["items"]["$ref"].endswith("/WorkflowListingResponse")
+
+
+@pytest.fixture
+def client(pg_sessionmaker):
+    app = FastAPI()
+    app.include_router(router)
+
+    def override_get_db():
+        db = pg_sessionmaker()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+def add_workflows(db, count: int, title="Sync") -> list:
+    workflows = [Workflow(id=uuid.uuid4(), title=f"{title} {n}", description=f"{title} workflow",
+                          price=Decimal("99000")) for n in range(count)]
+    db.add_all(workflows)
+    db.commit()
+    return workflows
+
+
+def test_is_like_is_loaded_in_one_query_for_the_page(client, pg_db, query_budget):
+    user = User(id=uuid.uuid4(), email="likes@example.com", role="USER", is_deleted=False)
+    pg_db.add(user)
+    liked, *others = add_workflows(pg_db, 5)
+    pg_db.add(Favorite(user_id=user.id, workflow_id=liked.id))
+    pg_db.commit()
+    headers = {"Authorization": f"Bearer {token_service.create_access_token(str(user.id))}"}
+
+    # principal, workflows with their relationships, favorites
+    with query_budget(3):
+        response = client.get("/api/workflows/", headers=headers)
+    assert response.status_code == 200, response.text
+    rows = {row["id"]: row for row in response.json()}
+    assert rows[str(liked.id)]["is_like"] is True
+    assert all(rows[str(workflow.id)]["is_like"] is False for workflow in others)
+    assert all("flow" not in row and "description" not in row for row in rows.values())
+
+
+def test_search_returns_only_the_requested_fields(client, pg_db):
+    add_workflows(pg_db, 2)
+    add_workflows(pg_db, 1, title="Invoice")
+
+    response = client.get("/api/workflows/search", params={"q": "sync", "fields": "title,price"})
+    assert response.status_code == 200, response.text
+    rows = response.json()
+    assert len(rows) == 2
+    assert all(set(row) == {"id", "title", "price"} for row in rows)
+    assert client.get("/api/workflows/search", params={"q": "sync", "fields": "secret"}).status_code == 400